@@ -0,0 +1,46 @@
+# bench_amendments.py
+"""
+Amendment handling: structural diffs of tender versions, and a second
+pipeline pass over a re-delivered feed where a quarter of the tenders were
+amended (deadline, budget, documents, criteria) and the rest only re-dated
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from harness import scales
+
+COMPANY = {"workers": 10, "engineers": 3, "vehicles": 2, "current_projects": []}
+
+
+@pytest.mark.parametrize("count", scales(cap=10_000))
+def test_diff_classify(benchmark, count):
+    from core.amendments import classify, diff
+    from core.synthetic import AMENDMENTS, amend_tender, iter_tenders
+
+    pairs = [(t, amend_tender(t, AMENDMENTS[i % len(AMENDMENTS)])) for i, t in enumerate(iter_tenders(count))]
+    categories = benchmark.pedantic(lambda: [classify(diff(old, new)) for old, new in pairs], rounds=3, iterations=1)
+    assert all(len(c) == 1 for c in categories)
+
+
+@pytest.mark.parametrize("count", scales(10, 100, cap=100))
+def test_pipeline_amended_feed(benchmark, prozorro, claude, workspace, count):
+    """Claude calls and reprocessed tenders on the second pass (the first pass is not timed)"""
+    from core.pipeline import TenderPipeline
+    from core.synthetic import AMENDMENTS
+
+    server = prozorro(count)
+    since = datetime.now() - timedelta(days=1)
+
+    def pipeline():
+        return TenderPipeline("Construction", COMPANY, checkpoint_path=str(workspace / "checkpoint.json"),
+                              db_path=str(workspace / "tenders.db"), market_dir=str(workspace / "market"))
+
+    first = pipeline().run(since)
+    calls = claude.calls
+    server.feed.amend({i: AMENDMENTS[n % len(AMENDMENTS)] for n, i in enumerate(range(0, count, 4))})
+
+    report = benchmark.pedantic(lambda: pipeline().run(since), rounds=1, iterations=1)
+    assert not report["errors"]
+    benchmark.extra_info.update(first_pass=len(first["results"]), reprocessed=len(report["results"]),
+                                claude_calls=claude.calls - calls, dropped=report["stats"]["fetch"]["dropped"])
@@ -0,0 +1,62 @@
+# bench_documents.py
+"""
+Document compliance: the bulk coverage matrix and the vault's fuzzy matcher,
+over synthetic tenders and a vault filled from the document taxonomy
+"""
+import json
+import random
+
+import pytest
+
+from harness import scales
+
+
+def filled_vault(path, count, seed=0):
+    """A vault of `count` documents named after taxonomy synonyms, in both languages"""
+    from core.compliance_matrix import TAXONOMY_PATH
+    from core.document_vault import DocumentVault
+    from core.synthetic import ENTITIES, REGIONS
+
+    with open(TAXONOMY_PATH, "r", encoding="utf-8") as f:
+        types = json.load(f)["types"]
+    rng = random.Random(seed)
+    vault = DocumentVault(str(path), compact_every=10**9)
+    for i in range(count):
+        spec = rng.choice(list(types.values()))
+        city, region, _, council = rng.choice(REGIONS)
+        entity = rng.choice(ENTITIES)[0].format(council=council, region=region, city=city, n=i % 20 + 1)
+        vault.add(f"{rng.choice(spec['synonyms'])} {entity} {i}", spec["label"],
+                  f"{rng.randint(2024, 2028)}-12-31", None, [city])
+    return vault
+
+
+def requirements(count, seed=42):
+    from core.synthetic import analysis_record, iter_tenders
+
+    return [
+        {**analysis_record(t, seed), "tender_id": t["id"], "title": t["title"]}
+        for t in iter_tenders(count, seed=seed)
+    ]
+
+
+@pytest.mark.parametrize("count", scales(10, 1_000, 100_000))
+def test_compliance_matrix(benchmark, tmp_path, count):
+    from core.compliance_matrix import build_matrix
+
+    vault = filled_vault(tmp_path / "vault.json", 50)
+    analyses = requirements(count)
+    matrix = benchmark.pedantic(lambda: build_matrix(analyses, vault), rounds=3, iterations=1)
+    ranking = matrix.ranking()
+    assert len(ranking) == count
+    benchmark.extra_info.update(types=len(matrix.keys), ready=int(matrix.ready.sum()))
+
+
+@pytest.mark.parametrize("documents", scales(10, 1_000, 10_000, cap=10_000))
+def test_match_requirement(benchmark, tmp_path, documents):
+    """One scored lookup against a vault of `documents` (index built beforehand)"""
+    vault = filled_vault(tmp_path / "vault.json", documents)
+    matcher = vault.matcher
+    queries = [doc for a in requirements(50) for doc in a["required_documents"]]
+    cycle = iter(queries * 1000)
+    benchmark(lambda: matcher.match(next(cycle)))
+    benchmark.extra_info["queries"] = len(set(queries))
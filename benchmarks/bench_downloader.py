@@ -0,0 +1,115 @@
+# bench_downloader.py
+"""
+Download throughput against the local ProZorro fixture server
+
+BENCH_HTTP_LATENCY sets the per-response delay (seconds, default 0.02).
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from harness import scales
+
+HTTP_LATENCY = float(os.getenv("BENCH_HTTP_LATENCY", "0.02"))
+COMPANY = {"workers": 10, "engineers": 3, "vehicles": 2, "current_projects": []}
+
+
+def since():
+    return datetime.now() - timedelta(days=1)
+
+
+@pytest.mark.parametrize("count", scales())
+def test_iter_feed(benchmark, prozorro, count):
+    from core.downloader import iter_feed
+
+    server = prozorro(count, latency=HTTP_LATENCY)
+    walked = benchmark.pedantic(lambda: sum(1 for _ in iter_feed(since())), rounds=3, iterations=1)
+    assert walked == count
+    benchmark.extra_info["requests"] = server.requests
+
+
+@pytest.mark.parametrize("count", scales(cap=10_000))
+def test_pipeline_download(benchmark, prozorro, workspace, count):
+    """fetch + extract stages (no Claude): detail requests, JSON writes, text, dedup, SQLite"""
+    from core.pipeline import TenderPipeline
+
+    server = prozorro(count, latency=HTTP_LATENCY)
+
+    def run():
+        pipeline = TenderPipeline("Construction", COMPANY, checkpoint_path=None,
+                                  db_path=str(workspace / "tenders.db"), analyze=False,
+                                  market_dir=str(workspace / "market"), route_at_listing=False)
+        return pipeline.run(since())
+
+    report = benchmark.pedantic(run, rounds=1, iterations=1)
+    assert report["stats"]["fetch"]["in"] == count and not report["errors"]
+    benchmark.extra_info.update(requests=server.requests, matched=report["stats"]["extract"]["out"],
+                                tenders_per_s=count / report["seconds"])
+
+
+@pytest.mark.parametrize("count", scales(cap=10_000))
+def test_pipeline_download_cpv_routed(benchmark, prozorro, workspace, count):
+    """Same as above with CPV routing on the feed listing: off-topic tenders are never fetched"""
+    from core import metrics
+    from core.pipeline import TenderPipeline
+
+    server = prozorro(count, latency=HTTP_LATENCY)
+
+    def run():
+        metrics.reset()
+        pipeline = TenderPipeline("Construction", COMPANY, checkpoint_path=None,
+                                  db_path=str(workspace / "tenders.db"), analyze=False,
+                                  market_dir=str(workspace / "market"))
+        return pipeline.run(since())
+
+    report = benchmark.pedantic(run, rounds=1, iterations=1)
+    skipped = metrics.snapshot()["counters"].get("feed.skipped_by_cpv", 0)
+    assert report["stats"]["fetch"]["in"] + skipped == count and not report["errors"]
+    benchmark.extra_info.update(requests=server.requests, skipped=skipped,
+                                matched=report["stats"]["extract"]["out"], tenders_per_s=count / report["seconds"])
+
+
+@pytest.mark.parametrize("count", scales(10))
+def test_download_prozorro_tenders(benchmark, prozorro, count):
+    """The sequential downloader behind the Streamlit Download tab"""
+    from core.downloader import download_prozorro_tenders
+
+    server = prozorro(max(count, 100), latency=HTTP_LATENCY)
+    downloaded = benchmark.pedantic(lambda: download_prozorro_tenders("Construction", count), rounds=1, iterations=1)
+    assert len(downloaded) == count
+    benchmark.extra_info["requests"] = server.requests
+
+
+def test_pipeline_rate_limited(benchmark, prozorro, workspace):
+    """What a 20 req/s API limit costs: throttled responses surface as fetch errors"""
+    from core.pipeline import TenderPipeline
+
+    server = prozorro(200, latency=HTTP_LATENCY, rate_limit=20)
+
+    def run():
+        pipeline = TenderPipeline("Construction", COMPANY, checkpoint_path=None,
+                                  db_path=str(workspace / "tenders.db"), analyze=False,
+                                  market_dir=str(workspace / "market"))
+        return pipeline.run(since())
+
+    report = benchmark.pedantic(run, rounds=1, iterations=1)
+    benchmark.extra_info.update(throttled=server.throttled, fetch_errors=report["stats"]["fetch"]["errors"])
+
+
+@pytest.mark.parametrize("count", scales(10, 100, cap=100))
+def test_pipeline_with_claude(benchmark, prozorro, claude, workspace, count):
+    """All four stages with the stub Claude client (BENCH_LLM_LATENCY per reply)"""
+    from core.pipeline import TenderPipeline
+
+    prozorro(count, latency=HTTP_LATENCY)
+
+    def run():
+        pipeline = TenderPipeline("Construction", COMPANY, checkpoint_path=None,
+                                  db_path=str(workspace / "tenders.db"), market_dir=str(workspace / "market"))
+        return pipeline.run(since())
+
+    report = benchmark.pedantic(run, rounds=1, iterations=1)
+    assert len(report["results"]) == report["stats"]["fetch"]["out"] and not report["errors"]
+    benchmark.extra_info.update(claude_calls=claude.calls, scored=len(report["results"]),
+                                tenders_per_s=count / report["seconds"])
@@ -0,0 +1,59 @@
+# bench_estimation.py
+"""AVK5Estimator and ProfitabilityAnalyzer, per tender and vectorized"""
+import random
+
+import pytest
+
+from harness import scales
+
+COMPANY = {"workers": 10, "engineers": 3, "vehicles": 2, "current_projects": []}
+
+
+def evaluation_tenders(count, seed=42):
+    """analyze_tender inputs shaped like build_evaluation_tender's output"""
+    rng = random.Random(seed)
+    return [{
+        "title": f"Tender {i}",
+        "budget": rng.randint(100, 20_000) * 1000,
+        "materials": {"concrete": (rng.randint(10, 500), rng.choice(["M200", "M300", "M400"])),
+                      "rebar": (rng.randint(1, 40), "A500C-Ø12")},
+        "labor": {"mason": (rng.randint(100, 3000), 3), "electrician": (rng.randint(0, 800), 4)},
+        "equipment": {"crane_25t": (1, rng.randint(5, 60)), "excavator": (1, rng.randint(0, 30))},
+        "resource_requirements": {"workers": rng.randint(2, 25), "engineers": rng.randint(0, 5),
+                                  "vehicles": rng.randint(0, 4)},
+        "timeline": {"duration_days": rng.randint(30, 365)},
+        "complexity": rng.random(),
+        "payment_terms": rng.choice(["standard", "deferred"]),
+        "has_penalties": rng.random() < 0.3,
+        "competitors": rng.randint(0, 12),
+    } for i in range(count)]
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    from core.score_matrix import AVK5Estimator, ProfitabilityAnalyzer
+
+    return ProfitabilityAnalyzer(AVK5Estimator())
+
+
+@pytest.mark.parametrize("count", scales())
+def test_calculate_estimate(benchmark, analyzer, count):
+    batch = evaluation_tenders(count)
+    estimate = analyzer.estimator.calculate_estimate
+    prices = benchmark(lambda: [estimate(t["materials"], t["labor"], t["equipment"])["final_price"] for t in batch])
+    assert len(prices) == count
+
+
+@pytest.mark.parametrize("count", scales(cap=10_000))
+def test_analyze_tender(benchmark, analyzer, count):
+    batch = evaluation_tenders(count)
+    reports = benchmark.pedantic(lambda: [analyzer.analyze_tender(t, COMPANY) for t in batch], rounds=3, iterations=1)
+    assert len(reports) == count
+
+
+@pytest.mark.parametrize("count", scales())
+def test_analyze_many(benchmark, analyzer, count):
+    pytest.importorskip("pandas")
+    batch = evaluation_tenders(count)
+    ranked = benchmark.pedantic(analyzer.analyze_many, args=(batch, COMPANY), rounds=3, iterations=1)
+    assert len(ranked) == count
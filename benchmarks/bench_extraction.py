@@ -0,0 +1,55 @@
+# bench_extraction.py
+"""Tender JSON → Claude text, near-duplicate clustering and PDF text extraction"""
+import pytest
+
+from harness import TenderFeed, scales
+
+
+def tenders(count):
+    feed = TenderFeed(count)
+    return [feed.detail(feed.tender_id(i)) for i in range(count)]
+
+
+@pytest.mark.parametrize("count", scales())
+def test_build_tender_text(benchmark, count):
+    from core.claude_client import tender_content
+    from core.tender_text import build_tender_text
+
+    batch = tenders(count)
+    texts = benchmark(lambda: [(build_tender_text(t), tender_content(t)) for t in batch])
+    assert len(texts) == count
+
+
+@pytest.mark.parametrize("count", scales(cap=10_000))
+def test_dedup_add(benchmark, workspace, count):
+    from core.dedup import DuplicateIndex
+    from core.tender_text import build_tender_text
+
+    texts = [(t["id"], build_tender_text(t)) for t in tenders(count)]
+
+    def run():
+        index = DuplicateIndex(index_dir=str(workspace / "dedup"))
+        for tender_id, text in texts:
+            index.add(tender_id, text)
+        return index
+
+    index = benchmark.pedantic(run, rounds=3, iterations=1)
+    benchmark.extra_info["clusters"] = len(set(index.representative(tid) for tid, _ in texts))
+
+
+@pytest.mark.parametrize("pages", [1, 20])
+def test_extract_pdf(benchmark, workspace, pages):
+    """Digital (non-OCR) PDF path: scan check, pdfplumber text, metadata"""
+    pymupdf = pytest.importorskip("pymupdf")
+    pytest.importorskip("pdfplumber")
+    from core.data_extractor import extract_pdf
+
+    path = workspace / f"tender_{pages}.pdf"
+    doc = pymupdf.open()
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Tender documentation page {n + 1}\n" + "Technical requirements. " * 40)
+    doc.save(str(path))
+
+    meta = benchmark(extract_pdf, str(path), str(workspace / "text"))
+    assert meta["source"] == "digital" and meta["pages"] == pages
@@ -0,0 +1,56 @@
+# bench_market.py
+"""
+Market history: award ingest into Parquet parts, the aggregate rebuild, and
+ranking with market-priced bids over synthetic completed tenders
+"""
+import pytest
+
+from harness import scales
+
+COMPANY = {"workers": 10, "engineers": 3, "vehicles": 2, "current_projects": []}
+
+
+def market(path, count, seed=42):
+    from core.market_data import MarketData
+    from core.synthetic import iter_tenders
+
+    data = MarketData(str(path))
+    data.ingest(iter_tenders(count, seed=seed, complete_ratio=1.0))
+    return data
+
+
+@pytest.mark.parametrize("count", scales(cap=10_000))
+def test_ingest(benchmark, tmp_path, count):
+    from core.market_data import award_rows
+    from core.synthetic import iter_tenders
+
+    data = market(tmp_path / "market", 0)
+    tenders = list(iter_tenders(count, complete_ratio=1.0))
+    rows = [row for t in tenders for row in award_rows(t)]
+    benchmark.pedantic(lambda: data.append(rows), rounds=3, iterations=1)
+    benchmark.extra_info["awards"] = len(rows)
+
+
+@pytest.mark.parametrize("count", scales(cap=10_000))
+def test_rebuild(benchmark, tmp_path, count):
+    from core.market_data import LEVELS
+
+    data = market(tmp_path / "market", count)
+    aggregates = benchmark.pedantic(data.rebuild, rounds=3, iterations=1)
+    assert set(aggregates["level"]) <= {level for level, _ in LEVELS}
+    benchmark.extra_info["groups"] = len(aggregates)
+
+
+@pytest.mark.parametrize("count", scales(10, 1_000, 10_000, cap=10_000))
+def test_analyze_many_with_market(benchmark, tmp_path, count):
+    from core.evaluation import build_evaluation_tender
+    from core.market_data import MarketLookup
+    from core.score_matrix import AVK5Estimator, ProfitabilityAnalyzer
+    from core.synthetic import analysis_record, iter_tenders
+
+    market(tmp_path / "market", 2_000).rebuild()
+    analyzer = ProfitabilityAnalyzer(AVK5Estimator(), MarketLookup.load(str(tmp_path / "market")))
+    batch = [build_evaluation_tender(analysis_record(t), tender=t) for t in iter_tenders(count, seed=7)]
+    ranked = benchmark.pedantic(analyzer.analyze_many, args=(batch, COMPANY), rounds=3, iterations=1)
+    assert len(ranked) == count
+    benchmark.extra_info["priced"] = int(ranked["market_level"].notna().sum())
@@ -0,0 +1,51 @@
+# bench_priority.py
+"""
+Deadline-aware processing: DeadlineQueue throughput, and how early the
+pipeline gets to tenders closing within URGENT_DAYS compared with feed order
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from harness import scales
+
+HTTP_LATENCY = 0.0
+COMPANY = {"workers": 10, "engineers": 3, "vehicles": 2, "current_projects": []}
+
+
+@pytest.mark.parametrize("count", scales(cap=100_000))
+def test_queue_put_get(benchmark, count):
+    from core.priority_queue import DeadlineQueue
+    from core.synthetic import iter_tenders
+
+    entries = [{"id": t["id"], "tenderPeriod": t["tenderPeriod"]} for t in iter_tenders(count)]
+
+    def run():
+        q = DeadlineQueue()
+        for entry in entries:
+            q.put(entry)
+        return [q.get() for _ in entries]
+
+    ordered = benchmark.pedantic(run, rounds=3, iterations=1)
+    assert len(ordered) == count
+
+
+@pytest.mark.parametrize("prioritize", [False, True], ids=["feed_order", "deadline"])
+@pytest.mark.parametrize("count", scales(10, 100, cap=100))
+def test_pipeline_urgent_first(benchmark, prozorro, claude, workspace, count, prioritize):
+    """Mean finishing position (0 = first, 1 = last) of the scored tenders that close within URGENT_DAYS"""
+    from core.pipeline import TenderPipeline
+    from core.priority_queue import URGENT_DAYS, slack_days
+
+    prozorro(count, latency=HTTP_LATENCY)
+
+    def run():
+        pipeline = TenderPipeline("Construction", COMPANY, checkpoint_path=None, prioritize=prioritize,
+                                  db_path=str(workspace / "tenders.db"), market_dir=str(workspace / "market"))
+        return pipeline.run(datetime.now() - timedelta(days=1))
+
+    report = benchmark.pedantic(run, rounds=1, iterations=1)
+    results = report["results"]
+    urgent = [i for i, r in enumerate(results) if 0 <= (slack_days(r["deadline"]) or URGENT_DAYS) < URGENT_DAYS]
+    benchmark.extra_info.update(scored=len(results), urgent=len(urgent),
+                                urgent_position=sum(urgent) / len(urgent) / max(len(results) - 1, 1) if urgent else None)
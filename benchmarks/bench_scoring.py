@@ -0,0 +1,169 @@
+# bench_scoring.py
+"""
+Throughput benchmark for TenderIntelligence.calculate_scores
+
+RowwiseTenderIntelligence keeps the original per-row (DataFrame.apply)
+preparation and scoring as the reference: the *_rowwise benchmarks measure
+it on the same frames, and the vectorized results must match it.
+
+Usage:
+    python benchmarks/bench_scoring.py --rows 100000
+    pytest benchmarks/bench_scoring.py
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from model_train import TenderIntelligence
+from core.excel import COLUMNS, analysis_row
+from core.synthetic import analysis_record, iter_tenders
+from harness import scales
+
+COMPANY = {
+    "name": "BudInvest LLC",
+    "capabilities": ["Construction", "Consulting"],
+    "keywords": ["renovation", "building", "ремонт"],
+    "location_preferences": ["Київ", "Львів"],
+    "qes_certified": False
+}
+
+
+def synthetic_frame(rows, seed=42):
+    """Build an extracted-tender DataFrame shaped like Claude's Excel output, from the synthetic corpus"""
+    records = (analysis_record(t, seed) for t in iter_tenders(rows, seed=seed))
+    return pd.DataFrame([analysis_row(r) for r in records], columns=COLUMNS)
+
+
+class RowwiseTenderIntelligence(TenderIntelligence):
+    """The pre-vectorization implementation: one Python call per row and column"""
+
+    def prepare_data(self):
+        self.df['clean_budget'] = self.df['Budget'].apply(self.extract_budget_value)
+        self.df['deadline_date'] = self.df['Deadline'].apply(self.parse_date)
+        today = datetime.now().date()
+        self.df['days_until_deadline'] = self.df['deadline_date'].apply(
+            lambda x: (x - today).days if x and x > today else 0
+        )
+        self.df['project_category'] = self.categorize_projects(self.df['Project Type'], self.df.get('CPV'))
+
+    def extract_budget_value(self, budget_str):
+        if pd.isna(budget_str) or 'not specified' in str(budget_str).lower():
+            return 0
+        match = re.search(r'([£€$]?[\d,\s]+(?:\.\d+)?)', str(budget_str))
+        if match:
+            value_str = re.sub(r'[£€$]', '', match.group(1).replace(',', '').replace(' ', ''))
+            try:
+                return float(value_str)
+            except ValueError:
+                return 0
+        return 0
+
+    def parse_date(self, date_str):
+        if pd.isna(date_str) or 'not specified' in str(date_str).lower():
+            return None
+        months = 'January|February|March|April|May|June|July|August|September|October|November|December'
+        for pattern, fmt in ((rf'\d{{1,2}} (?:{months}) \d{{4}}', '%d %B %Y'), (r'\d{4}-\d{2}-\d{2}', '%Y-%m-%d')):
+            match = re.search(pattern, str(date_str))
+            if match:
+                try:
+                    return datetime.strptime(match.group(), fmt).date()
+                except ValueError:
+                    continue
+        return None
+
+    def calculate_scores(self):
+        similarity = pd.Series(self.text_similarity(), index=self.df.index)
+        self.df['alignment_score'] = self.df.apply(lambda row: self.row_alignment(row, similarity[row.name]), axis=1)
+        max_budget = self.df['clean_budget'].max() or 1
+        self.df['financial_score'] = self.df['clean_budget'].apply(lambda x: min(x / max_budget, 1) * 100)
+        max_days = self.df['days_until_deadline'].max() or 1
+        self.df['urgency_score'] = self.df['days_until_deadline'].apply(
+            lambda x: max(0, 100 - (x / max_days * 100)) if x > 0 else 100
+        )
+        self.df['risk_score'] = self.df.apply(self.row_risk, axis=1)
+        weights = self.company.get('scoring_weights', {'alignment': 0.4, 'financial': 0.3, 'urgency': 0.2, 'risk': 0.1})
+        self.df['priority_score'] = self.df.apply(lambda row: (
+            weights['alignment'] * row['alignment_score'] + weights['financial'] * row['financial_score'] +
+            weights['urgency'] * row['urgency_score'] + weights['risk'] * (100 - row['risk_score'])
+        ), axis=1)
+        self.df = self.df.sort_values('priority_score', ascending=False)
+        return self.df
+
+    def row_alignment(self, tender, similarity):
+        type_match = 1 if tender['project_category'] in self.company['capabilities'] else 0
+        location_match = int(any(loc.lower() in str(tender['Location']).lower()
+                                 for loc in self.company.get('location_preferences', [])))
+        return max(0, min(0.4 * type_match * 100 + 0.3 * location_match * 100 + 0.3 * similarity * 100, 100))
+
+    def row_risk(self, tender):
+        risk_score = 40 if tender['days_until_deadline'] < 14 else 20 if tender['days_until_deadline'] < 30 else 0
+        if tender['clean_budget'] == 0 or "not specified" in str(tender['Budget']).lower():
+            risk_score += 30
+        tender_text = f"{tender['Title']} {tender['Project Type']}".lower()
+        compliance_terms = ['QES', 'digital signature', 'eIDAS', 'KEP', 'certified']
+        if any(term in tender_text for term in compliance_terms) and not self.company.get('qes_certified', False):
+            risk_score += 50
+        if 'framework' in tender_text or 'multi-lot' in tender_text:
+            risk_score += 20
+        return min(risk_score, 100)
+
+
+def run(rows, repeat):
+    frame = synthetic_frame(rows)
+    for name, cls in (("vectorized", TenderIntelligence), ("row-wise", RowwiseTenderIntelligence)):
+        timings = {"prepare_data": float("inf"), "calculate_scores": float("inf")}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            intel = cls(frame.copy(), COMPANY)
+            prepared = time.perf_counter()
+            intel.calculate_scores()
+            done = time.perf_counter()
+            timings["prepare_data"] = min(timings["prepare_data"], prepared - start)
+            timings["calculate_scores"] = min(timings["calculate_scores"], done - prepared)
+
+        print(f"{name}:")
+        for stage, seconds in timings.items():
+            print(f"⏱️ {stage:<17} {rows} rows: {seconds:.3f}s ({rows / seconds:,.0f} rows/s)")
+        total = sum(timings.values())
+        print(f"⏱️ {'total':<17} {rows} rows: {total:.3f}s ({rows / total:,.0f} rows/s)")
+
+
+@pytest.mark.parametrize("implementation", [TenderIntelligence, RowwiseTenderIntelligence], ids=["vectorized", "rowwise"])
+@pytest.mark.parametrize("rows", scales())
+def test_calculate_scores(benchmark, rows, implementation):
+    frame = synthetic_frame(rows)
+    intel = implementation(frame.copy(), COMPANY)
+    scored = benchmark.pedantic(intel.calculate_scores, rounds=3, iterations=1)
+    assert len(scored) == rows
+
+
+@pytest.mark.parametrize("implementation", [TenderIntelligence, RowwiseTenderIntelligence], ids=["vectorized", "rowwise"])
+@pytest.mark.parametrize("rows", scales())
+def test_prepare_data(benchmark, rows, implementation):
+    frame = synthetic_frame(rows)
+    benchmark.pedantic(lambda: implementation(frame.copy(), COMPANY), rounds=3, iterations=1)
+
+
+@pytest.mark.parametrize("rows", scales(cap=1000))
+def test_vectorized_matches_rowwise(rows):
+    frame = synthetic_frame(rows)
+    columns = ["clean_budget", "days_until_deadline", "alignment_score", "financial_score",
+               "urgency_score", "risk_score", "priority_score"]
+    vectorized = TenderIntelligence(frame.copy(), COMPANY).calculate_scores().sort_index()
+    rowwise = RowwiseTenderIntelligence(frame.copy(), COMPANY).calculate_scores().sort_index()
+    pd.testing.assert_frame_equal(vectorized[columns], rowwise[columns], check_dtype=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,55 @@
+# conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from harness import FixtureServer, StubAnthropic
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    collect_ignore_glob = ["bench_*.py"]  # suites need the benchmark fixture
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Point every on-disk location at tmp_path and drop the ProZorro courtesy delay"""
+    from core import dedup, downloader, metrics
+
+    monkeypatch.setattr(downloader, "OUTPUT_DIR", str(tmp_path / "tenders"))
+    monkeypatch.setattr(downloader, "RATE_LIMIT_DELAY", 0)
+    monkeypatch.setattr(dedup, "DEDUP_DIR", str(tmp_path / "dedup"))
+    monkeypatch.setattr(metrics, "_metrics_dir", str(tmp_path / "metrics"))
+    os.makedirs(downloader.OUTPUT_DIR, exist_ok=True)
+    return tmp_path
+
+
+@pytest.fixture
+def prozorro(workspace, monkeypatch):
+    """Factory: start a FixtureServer and point the downloader at it"""
+    from core import downloader
+
+    servers = []
+
+    def start(count, latency=0.0, rate_limit=None):
+        server = FixtureServer(count, latency=latency, rate_limit=rate_limit).start()
+        servers.append(server)
+        monkeypatch.setattr(downloader, "PROZORRO_API_URL", server.url)
+        monkeypatch.setenv("PROZORRO_API_URL", server.url)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def claude(monkeypatch):
+    """StubAnthropic installed as the client every core module gets"""
+    from core import claude_client
+
+    stub = StubAnthropic()
+    monkeypatch.setattr(claude_client, "get_client", lambda key=None: stub)
+    return stub
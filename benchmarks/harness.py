@@ -0,0 +1,316 @@
+# harness.py
+"""
+Offline stand-ins for the ProZorro API and Claude, used by the benchmark suites
+
+    FixtureServer   local HTTP server serving tender listing/detail responses
+                    with configurable latency and a requests-per-second limit;
+                    tenders come from core.synthetic, or from the recorded
+                    samples with BENCH_FEED=recorded
+    StubAnthropic   drop-in for anthropic.Anthropic with realistic reply latency
+
+Refresh the replayed payloads from the live API with:
+    python benchmarks/harness.py record --count 20
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "prozorro_sample.json")
+API_PATH = "/api/2.4/tenders"
+LIVE_API_URL = "https://public.api.openprocurement.org/api/2.4/tenders"
+
+BENCH_MAX_SCALE = int(os.getenv("BENCH_MAX_SCALE", "1000"))
+LLM_LATENCY = float(os.getenv("BENCH_LLM_LATENCY", "1.2"))  # seconds per Claude reply, roughly what the API takes
+FEED = os.getenv("BENCH_FEED", "synthetic")  # or "recorded"
+
+
+def scales(*sizes, cap=None):
+    """Benchmark sizes up to BENCH_MAX_SCALE (and `cap`, for suites that are slow per item)"""
+    limit = min(BENCH_MAX_SCALE, cap) if cap else BENCH_MAX_SCALE
+    return [s for s in (sizes or (10, 1_000, 100_000)) if s <= limit] or [min(sizes or (10,))]
+
+
+def load_samples(path=SAMPLE_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["tenders"]
+
+
+# ---------------------- ProZorro fixture server ----------------------
+class TenderFeed:
+    """
+    `count` tenders, one per second of dateModified, either generated by
+    core.synthetic or built by cycling the recorded samples
+    """
+
+    def __init__(self, count, samples=None, start=None, seed=None):
+        self.count = count
+        self.samples = samples or (load_samples() if FEED == "recorded" else None)
+        self.seed = seed
+        self.start = start or datetime.now(timezone.utc).replace(microsecond=0) - timedelta(seconds=count + 60)
+        self.shift = timedelta(0)
+        self.amendments = {}
+
+    def amend(self, amendments, minutes=60):
+        """Re-deliver the whole feed `minutes` later; amendments maps index -> synthetic.amend_tender kind"""
+        self.shift = timedelta(minutes=minutes)
+        self.amendments = amendments
+
+    def tender_id(self, i):
+        return f"{i:032x}"
+
+    def date_modified(self, i):
+        return (self.start + self.shift + timedelta(seconds=i)).isoformat()
+
+    def index_at(self, offset):
+        """Position of the first tender modified after the ISO timestamp `offset`"""
+        moment = datetime.fromisoformat(offset)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return int((moment - self.start - self.shift).total_seconds()) + 1
+
+    def entry(self, i):
+        return {"id": self.tender_id(i), "dateModified": self.date_modified(i)}
+
+    def detail(self, tender_id):
+        i = int(tender_id, 16)
+        if not 0 <= i < self.count:
+            return None
+        if self.samples is None:
+            from core.synthetic import SEED, generate_tender
+
+            modified = self.start + timedelta(seconds=i)
+            tender = generate_tender(i, self.seed if self.seed is not None else SEED, modified)
+        else:
+            tender = copy.deepcopy(self.samples[i % len(self.samples)])
+            tender.update(id=tender_id, tenderID=f"UA-{self.start:%Y-%m-%d}-{i:06d}-a")
+            tender["title"] = f"{tender['title']} (лот {i})"
+        if i in self.amendments:
+            from core.synthetic import amend_tender
+
+            tender = amend_tender(tender, self.amendments[i])
+        tender["dateModified"] = self.date_modified(i)
+        return tender
+
+    def page(self, offset=None, limit=100, descending=False, opt_fields=None):
+        if descending:
+            end = self.count if offset is None else min(self.count, self.index_at(offset) - 1)
+            indexes = range(end - 1, max(-1, end - 1 - limit), -1)
+        else:
+            begin = 0 if offset is None else max(0, self.index_at(offset))
+            indexes = range(begin, min(self.count, begin + limit))
+        entries = [self.entry(i) for i in indexes]
+        for field in (opt_fields or "").split(","):
+            for entry in entries if field else ():
+                value = self.detail(entry["id"]).get(field)
+                if value is not None:
+                    entry[field] = value
+        next_offset = entries[-1]["dateModified"] if entries else offset
+        return {"data": entries, "next_page": {"offset": next_offset}}
+
+
+class RateLimiter:
+    """Token bucket; allow() is False once more than `rate` requests/s arrive"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class FixtureServer:
+    """
+    Local ProZorro API stand-in on 127.0.0.1
+
+        with FixtureServer(count=1000, latency=0.05) as server:
+            os.environ["PROZORRO_API_URL"] = server.url
+
+    Args:
+        count: number of tenders in the feed
+        latency: seconds added to every response
+        rate_limit: requests per second before answering 429 (None = unlimited)
+    """
+
+    def __init__(self, count, latency=0.0, rate_limit=None, samples=None):
+        self.feed = TenderFeed(count, samples)
+        self.latency = latency
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.requests = 0
+        self.throttled = 0
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PATH}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if server.limiter and not server.limiter.allow():
+                    server.throttled += 1
+                    return self._send(429, {"status": "error", "errors": [{"description": "Rate limit exceeded"}]})
+
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path.rstrip("/") == API_PATH:
+                    return self._send(200, server.feed.page(
+                        query.get("offset"), int(query.get("limit", 100)), query.get("descending") == "1",
+                        query.get("opt_fields")))
+                match = re.fullmatch(rf"{API_PATH}/([0-9a-f]{{32}})", url.path)
+                tender = server.feed.detail(match.group(1)) if match else None
+                if tender is None:
+                    return self._send(404, {"status": "error", "errors": [{"description": "Not Found"}]})
+                return self._send(200, {"data": tender})
+
+        return Handler
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ---------------------- Claude stub ----------------------
+class StubAnthropic:
+    """
+    Stand-in for anthropic.Anthropic: messages.create() sleeps for a realistic
+    latency and answers with a well-formed analysis built from the prompt
+    """
+
+    def __init__(self, latency=LLM_LATENCY, jitter=0.25, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.messages = SimpleNamespace(create=self.create)
+
+    def _field(self, prompt, label):
+        match = re.search(rf"^{label}:\s*(.*)$", prompt, re.MULTILINE)
+        return match.group(1).strip() if match else "N/A"
+
+    def create(self, model, messages, max_tokens=1024, **kwargs):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency * (1 + self._rng.uniform(-self.jitter, self.jitter))
+        time.sleep(max(0.0, delay))
+
+        prompt = messages[-1]["content"]
+        reply = json.dumps({
+            "title": self._field(prompt, "Tender Title"),
+            "issuer": self._field(prompt, "Issuer"),
+            "deadline": self._field(prompt, "Deadline"),
+            "budget": self._field(prompt, "Budget"),
+            "location": self._field(prompt, "Location"),
+            "project_type": "Construction",
+            "required_documents": ["Ліцензія", "Довідка про досвід", "Кошторис ПК АВК-5"],
+            "avk5_required": "АВК" in prompt,
+            "technical_specs": "Покрівельні та загальнобудівельні роботи",
+            "payment_terms": "Оплата протягом 30 днів після підписання актів",
+            "resource_requirements": "8 workers, 2 engineers, 1 vehicles",
+            "timeline_feasibility": "adequate",
+            "profitability": "medium"
+        }, ensure_ascii=False)
+        return SimpleNamespace(
+            id=f"msg_stub_{self.calls}",
+            model=model,
+            content=[SimpleNamespace(type="text", text=reply)],
+            usage=SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=len(reply) // 4),
+        )
+
+
+# ---------------------- Recording ----------------------
+def record(count=20, path=SAMPLE_PATH, api_url=LIVE_API_URL):
+    """Replace the replayed samples with the `count` most recently modified live tenders"""
+    import requests
+
+    response = requests.get(api_url, params={"descending": 1, "limit": count}, timeout=30)
+    response.raise_for_status()
+    tenders = []
+    for entry in response.json()["data"]:
+        detail = requests.get(f"{api_url}/{entry['id']}", timeout=30)
+        detail.raise_for_status()
+        tenders.append(detail.json()["data"])
+        time.sleep(0.5)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"tenders": tenders}, f, ensure_ascii=False, indent=2)
+    print(f"💾 Recorded {len(tenders)} tenders to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark fixtures")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="refresh the sample payloads from the live API")
+    rec.add_argument("--count", type=int, default=20)
+    serve = sub.add_parser("serve", help="run the fixture server in the foreground")
+    serve.add_argument("--count", type=int, default=1000)
+    serve.add_argument("--latency", type=float, default=0.05)
+    serve.add_argument("--rate-limit", type=float, default=None)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.count)
+    else:
+        with FixtureServer(args.count, args.latency, args.rate_limit) as server:
+            print(f"🧪 Serving {args.count} tenders at {server.url} (Ctrl+C to stop)")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,74 @@
+# core/__init__.py
+"""
+Tender processing library: download, extract, analyze, score
+
+Names are resolved lazily (PEP 562), so `import core` costs nothing and
+heavy dependencies (anthropic, openpyxl, pandas, sklearn, PDF tooling) are
+only imported by the submodule that actually needs them.
+"""
+import importlib
+
+_EXPORTS = {
+    # ProZorro feed and downloads
+    "download_prozorro_tenders": "core.downloader",
+    "fetch_tender": "core.downloader",
+    "iter_feed": "core.downloader",
+    "matches_topic": "core.downloader",
+    "load_topic_router": "core.downloader",
+    "CpvTrie": "core.cpv",
+    "TopicRouter": "core.cpv",
+    "setup_environment": "core.downloader",
+    # Text and extraction
+    "build_tender_text": "core.tender_text",
+    "extract_pdf": "core.data_extractor",
+    "tokenize": "core.text_utils",
+    # Claude analysis
+    "analyze_text": "core.claude_client",
+    "get_client": "core.claude_client",
+    "tender_content": "core.claude_client",
+    # Excel exports
+    "build_analysis_workbook": "core.excel",
+    "build_evaluation_workbook": "core.excel",
+    "build_materials_workbook": "core.excel",
+    "format_excel": "core.excel",
+    # Scoring and planning
+    "AVK5Estimator": "core.score_matrix",
+    "DocumentComplianceChecker": "core.score_matrix",
+    "DocumentVault": "core.document_vault",
+    "DocumentMatcher": "core.doc_matcher",
+    "DocumentTaxonomy": "core.compliance_matrix",
+    "build_matrix": "core.compliance_matrix",
+    "ProfitabilityAnalyzer": "core.score_matrix",
+    "build_evaluation_tender": "core.evaluation",
+    "CapacityScheduler": "core.scheduler",
+    "PortfolioOptimizer": "core.portfolio",
+    "CompanyProfile": "core.company_profile",
+    "ProfileStore": "core.profile_store",
+    "WinModel": "core.win_model",
+    "MarketData": "core.market_data",
+    "MarketLookup": "core.market_data",
+    "IssuerIndex": "core.issuer_index",
+    # Indexes, storage and orchestration
+    "DuplicateIndex": "core.dedup",
+    "AmendmentLog": "core.amendments",
+    "DeadlineQueue": "core.priority_queue",
+    "TenderMatcher": "core.semantic_index",
+    "TenderStore": "core.tender_store",
+    "JobQueue": "core.jobs",
+    "TenderPipeline": "core.pipeline",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'core' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value  # cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,244 @@
+# amendments.py
+import copy
+import json
+import os
+import sys
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.tender_store import STORE_PATH, connect
+
+IGNORED_FIELDS = {"dateModified"}  # changes with every version, carries no information
+KEYED = "#"                        # path segment prefix for list elements matched by their "id"
+
+# Top-level field → change category
+CATEGORY_FIELDS = {
+    "deadline": {"tenderPeriod", "enquiryPeriod", "auctionPeriod"},
+    "budget": {"value", "minimalStep", "guarantee"},
+    "documents": {"documents"},
+    "criteria": {"criteria"},
+    "scope": {"title", "description", "items", "title_en", "description_en"},
+    "status": {"status"},
+}
+LOT_CATEGORIES = {"auctionPeriod": "deadline", "value": "budget", "minimalStep": "budget", "guarantee": "budget"}
+
+# Downstream stages a category invalidates. Claude only reads the scope and
+# the criteria; deadline and budget are patched into the stored analysis and
+# rescored; anything else (bids, awards, complaints…) feeds the market and
+# issuer history directly and reprocesses nothing.
+REPROCESS = {
+    "criteria": {"extract", "analyze", "score"},
+    "scope": {"extract", "analyze", "score"},
+    "documents": {"extract"},
+    "deadline": {"score"},
+    "budget": {"score"},
+    "status": {"score"},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS amendments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tender_id TEXT,
+    date_modified TEXT,
+    previous_modified TEXT,
+    categories TEXT,
+    patch TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS amendments_tender ON amendments (tender_id, date_modified);
+"""
+
+
+# ---------------------- Structural diff ----------------------
+def _keyed(values):
+    """{id: element} when every element is a dict with a unique id, else None"""
+    if not all(isinstance(v, dict) and "id" in v for v in values):
+        return None
+    keyed = {str(v["id"]): v for v in values}
+    return keyed if len(keyed) == len(values) else None
+
+
+def diff(old, new, path=()):
+    """
+    Structural diff of two tender versions as a list of ops
+
+    Each op is {"op": "add" | "remove" | "replace", "path": [...], "old", "new"}
+    and keeps both sides, so a patch can be applied forwards or backwards.
+    Lists of objects with ids (documents, items, criteria, lots…) are matched
+    by id (path segment "#<id>"), so reordering is not a change and one edited
+    document is one small op; other lists are compared whole. When elements
+    are added or removed, an "order" op with both key sequences follows, so
+    apply() rebuilds the list in the new version's order.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in list(old) + [k for k in new if k not in old]:
+            if not path and key in IGNORED_FIELDS:
+                continue
+            if key not in new:
+                ops.append({"op": "remove", "path": [*path, key], "old": old[key]})
+            elif key not in old:
+                ops.append({"op": "add", "path": [*path, key], "new": new[key]})
+            else:
+                ops.extend(diff(old[key], new[key], (*path, key)))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and old != new:
+        old_keyed, new_keyed = _keyed(old), _keyed(new)
+        if old_keyed is not None and new_keyed is not None:
+            ops = diff({KEYED + k: v for k, v in old_keyed.items()},
+                       {KEYED + k: v for k, v in new_keyed.items()}, path)
+            if old_keyed.keys() != new_keyed.keys():
+                ops.append({"op": "order", "path": list(path), "old": list(old_keyed), "new": list(new_keyed)})
+            return ops
+    if old != new:
+        return [{"op": "replace", "path": list(path), "old": old, "new": new}]
+    return []
+
+
+def _child(container, segment, create=False):
+    if isinstance(container, list):
+        found = next((v for v in container if str(v.get("id")) == segment[len(KEYED):]), None)
+        if found is None and create:
+            found = {}
+            container.append(found)
+        return found
+    if segment not in container and create:
+        container[segment] = {}
+    return container.get(segment)
+
+
+def apply(document, ops, reverse=False):
+    """A copy of `document` with the patch applied (reverse=True undoes it)"""
+    document = copy.deepcopy(document)
+    orders = []
+    for op in (reversed(ops) if reverse else ops):
+        kind = {"add": "remove", "remove": "add"}.get(op["op"], op["op"]) if reverse else op["op"]
+        value = op.get("old") if reverse else op.get("new")
+        if kind == "order":
+            orders.append((op["path"], value))  # once all elements are in place
+            continue
+        *parents, last = op["path"] or [None]
+        if last is None:
+            return copy.deepcopy(value)
+        container = document
+        for segment in parents:
+            container = _child(container, segment, create=True)
+        if isinstance(container, list):
+            container[:] = [v for v in container if str(v.get("id")) != last[len(KEYED):]]
+            if kind != "remove":
+                container.append(copy.deepcopy(value))
+        elif kind == "remove":
+            container.pop(last, None)
+        else:
+            container[last] = copy.deepcopy(value)
+    for path, keys in orders:
+        container = document
+        for segment in path:
+            container = _child(container, segment) if container is not None else None
+        if isinstance(container, list):
+            rank = {key: i for i, key in enumerate(keys)}
+            container.sort(key=lambda v: rank.get(str(v.get("id")), len(rank)))
+    return document
+
+
+# ---------------------- Classification ----------------------
+def classify(ops):
+    """Sorted change categories of a patch (deadline, budget, documents, criteria, scope, status, other)"""
+    categories = set()
+    for op in ops:
+        root = op["path"][0] if op["path"] else ""
+        category = next((c for c, fields in CATEGORY_FIELDS.items() if root in fields), None)
+        if category is None and root == "lots":
+            category = next((LOT_CATEGORIES[s] for s in op["path"][2:3] if s in LOT_CATEGORIES), "scope")
+        categories.add(category or "other")
+    return sorted(categories)
+
+
+def plan_reprocessing(categories):
+    """Pipeline stages an amendment with these categories has to re-run"""
+    return set().union(*(REPROCESS.get(c, set()) for c in categories))
+
+
+def refresh_analysis(analysis, tender):
+    """A stored Claude analysis with the deadline and budget taken from the amended tender"""
+    analysis = dict(analysis)
+    deadline = (tender.get("tenderPeriod") or {}).get("endDate")
+    value = tender.get("value") or {}
+    if deadline:
+        analysis["deadline"] = deadline
+    if value.get("amount") is not None:
+        analysis["budget"] = f"{value['amount']:,.2f} {value.get('currency', 'UAH')}"
+    return analysis
+
+
+# ---------------------- History ----------------------
+class AmendmentLog:
+    """
+    Delta history of tender amendments, kept in the tender store's SQLite file
+
+    The tenders table holds only the latest version; each amendment adds one
+    row with the two-sided patch from the previous version, so any earlier
+    version can be rebuilt backwards from the current one.
+    """
+
+    def __init__(self, db_path=STORE_PATH, conn=None):
+        self.db_path = db_path
+        self.conn = conn or connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def record(self, old, new):
+        """
+        Diff two versions of a tender and log the patch
+
+        Returns:
+            dict: {"tender_id", "date_modified", "previous_modified", "categories", "patch"}
+            (empty categories and patch, not logged, for a re-delivery where nothing but
+            dateModified changed), or None when `new` is not a newer version
+        """
+        previous, modified = old.get("dateModified", ""), new.get("dateModified", "")
+        if modified and previous and modified <= previous:
+            return None
+        ops = diff(old, new)
+        amendment = {"tender_id": new["id"], "date_modified": modified, "previous_modified": previous,
+                     "categories": classify(ops), "patch": ops}
+        if not ops:
+            return amendment
+        self.conn.execute(
+            "INSERT INTO amendments (tender_id, date_modified, previous_modified, categories, patch, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (new["id"], modified, previous, ",".join(amendment["categories"]),
+             json.dumps(ops, ensure_ascii=False), datetime.now().isoformat())
+        )
+        return amendment
+
+    def _row(self, row):
+        return {"tender_id": row["tender_id"], "date_modified": row["date_modified"],
+                "previous_modified": row["previous_modified"], "categories": row["categories"].split(","),
+                "patch": json.loads(row["patch"])}
+
+    def history(self, tender_id):
+        """Amendments of one tender, oldest first"""
+        rows = self.conn.execute(
+            "SELECT * FROM amendments WHERE tender_id = ? ORDER BY date_modified, id", (tender_id,)
+        )
+        return [self._row(r) for r in rows]
+
+    def categories_since(self, tender_id, since):
+        """Sorted change categories of the amendments of a tender logged after `since` (ISO timestamp)"""
+        rows = self.conn.execute(
+            "SELECT categories FROM amendments WHERE tender_id = ? AND created_at > ?", (tender_id, since)
+        )
+        return sorted(set().union(*(r["categories"].split(",") for r in rows)))
+
+    def recent(self, limit=20):
+        rows = self.conn.execute("SELECT * FROM amendments ORDER BY id DESC LIMIT ?", (limit,))
+        return [self._row(r) for r in rows]
+
+    def version(self, current, date_modified):
+        """The tender as it was at `date_modified`, rebuilt by undoing the later patches of `current`"""
+        document = current
+        for amendment in reversed(self.history(current["id"])):
+            if amendment["date_modified"] <= date_modified:
+                break
+            document = apply(document, amendment["patch"], reverse=True)
+            document["dateModified"] = amendment["previous_modified"]
+        return document
@@ -0,0 +1,133 @@
+# claude_client.py
+import json
+import os
+import re
+
+from core import metrics
+
+# anthropic takes over a second to import, so it is loaded only when a client is built
+
+MODEL = "claude-3-5-sonnet-20241022"
+MAX_CHARS = 15000
+SYSTEM_PROMPT = "You are a procurement specialist analyzing Ukrainian tenders. Focus on PC AVK5 compliance and document requirements."
+
+PROMPT_TEMPLATE = """
+You are an expert in Ukrainian public procurement tenders. Analyze the tender text and extract the following information:
+
+1. Basic Information:
+   - Title or Project Name
+   - Issuer or Client
+   - Submission Deadline
+   - Estimated Budget (with currency)
+   - Location (City, Region)
+   - Project Type/Scope
+
+2. Critical Requirements:
+   - List ALL required documents (comma-separated)
+   - Does this tender require PC AVK5 cost estimates? (true/false)
+   - Key technical specifications (summarize key requirements)
+
+3. Financial & Legal:
+   - Payment terms and schedule
+   - References to Ukrainian laws/regulations (list)
+
+4. Viability Analysis:
+   - Resource requirements (equipment, personnel, etc.)
+   - Timeline feasibility assessment (adequate/risky/inadequate)
+   - Profitability assessment (high/medium/low)
+
+Return the result STRICTLY in JSON format with these keys:
+{{
+  "title": "...",
+  "issuer": "...",
+  "deadline": "...",
+  "budget": "...",
+  "location": "...",
+  "project_type": "...",
+  "required_documents": ["doc1", "doc2", ...],
+  "avk5_required": true/false,
+  "technical_specs": "...",
+  "payment_terms": "...",
+  "resource_requirements": "...",
+  "timeline_feasibility": "...",
+  "profitability": "..."
+}}
+
+Tender Text:
+\"\"\"
+{text}
+\"\"\"
+"""
+
+
+def api_key():
+    """CLAUDE_API_KEY from the environment or .env, or None"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return os.getenv("CLAUDE_API_KEY")
+
+
+def get_client(key=None):
+    """Anthropic client for the given key (defaults to CLAUDE_API_KEY), or None if unset"""
+    key = key or api_key()
+    if not key:
+        return None
+    import anthropic
+
+    return anthropic.Anthropic(api_key=key)
+
+
+def tender_content(data):
+    """Short header-style text Claude sees for a ProZorro tender JSON"""
+    entity = data.get("procuringEntity", {})
+    address = entity.get("address", {})
+    return f"""
+Tender Title: {data.get('title', '')}
+Issuer: {entity.get('name', '')}
+Location: {address.get('locality', '')}, {address.get('region', '')}
+Budget: {data.get('value', {}).get('amount', '')} {data.get('value', {}).get('currency', 'UAH')}
+Deadline: {data.get('tenderPeriod', {}).get('endDate', '')}
+Description: {data.get('description', '')}
+""".strip()
+
+
+def parse_response(result):
+    """Parse Claude's reply as JSON, falling back to the outermost {...} block"""
+    try:
+        return json.loads(result)
+    except json.JSONDecodeError:
+        match = re.search(r'({.*})', result, re.DOTALL)
+        if match:
+            try:
+                return json.loads(match.group(1))
+            except json.JSONDecodeError:
+                pass
+    return {}
+
+
+def analyze_text(text, client, max_chars=MAX_CHARS):
+    """
+    Ask Claude to extract the structured tender fields
+
+    API errors propagate to the caller; an unparseable reply returns {}.
+    """
+    metrics.incr("llm.requests")
+    with metrics.span("llm.request", model=MODEL):
+        response = client.messages.create(
+            model=MODEL,
+            max_tokens=1024,
+            temperature=0.0,
+            system=SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": PROMPT_TEMPLATE.format(text=text[:max_chars])}]
+        )
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        metrics.incr("llm.tokens_in", getattr(usage, "input_tokens", 0) or 0)
+        metrics.incr("llm.tokens_out", getattr(usage, "output_tokens", 0) or 0)
+    if not response.content:
+        return {}
+    parsed = parse_response(''.join(block.text for block in response.content if hasattr(block, 'text')))
+    if not parsed:
+        metrics.incr("llm.parse_failures")
+    return parsed
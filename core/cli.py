@@ -0,0 +1,268 @@
+# cli.py
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import metrics
+from core.evaluation import DEFAULT_COMPANY_RESOURCES
+from core.market_data import MARKET_DIR
+from core.pipeline import CHECKPOINT_PATH, DEFAULT_CONCURRENCY, QUEUE_SIZE, TenderPipeline
+from core.tender_store import STORE_PATH
+
+DURATION_RE = re.compile(r"^(\d+)\s*([mhdw])$")
+DURATION_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_since(value, now=None):
+    """Turn '24h' / '7d' / '30m' / '2w' or an ISO date into a datetime"""
+    match = DURATION_RE.match(value.strip().lower())
+    if match:
+        amount, unit = match.groups()
+        return (now or datetime.now()) - timedelta(**{DURATION_UNITS[unit]: int(amount)})
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time '{value}' (use e.g. 24h, 7d or 2024-05-01)")
+
+
+def load_company_resources(path):
+    if not path:
+        return dict(DEFAULT_COMPANY_RESOURCES)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    # Accept either a bare resources dict or a full company profile
+    return {**DEFAULT_COMPANY_RESOURCES, **data.get("resources", data)}
+
+
+def cmd_run(args):
+    concurrency = {
+        stage: getattr(args, f"{stage}_workers")
+        for stage in DEFAULT_CONCURRENCY
+        if getattr(args, f"{stage}_workers") is not None
+    }
+    if not args.no_analyze:
+        from core.claude_client import get_client
+        if get_client() is None:
+            print("❌ Claude API key not found in .env file (use --no-analyze to only download)")
+            return 1
+
+    pipeline = TenderPipeline(
+        topic=args.topic,
+        company_resources=load_company_resources(args.company),
+        concurrency=concurrency,
+        queue_size=args.queue_size,
+        checkpoint_path=None if args.no_checkpoint else args.checkpoint,
+        db_path=args.db,
+        analyze=not args.no_analyze,
+        limit=args.limit,
+        route_at_listing=not args.fetch_all,
+        prioritize=not args.feed_order
+    )
+    print(f"🚀 Processing '{args.topic}' tenders modified since {args.since.isoformat(timespec='minutes')}")
+    report = pipeline.run(args.since, args.until)
+
+    for name, stats in report["stats"].items():
+        print(f"  {name:<8} in={stats['in']:<5} out={stats['out']:<5} errors={stats['errors']:<4} "
+              f"busy={stats['seconds']:.1f}s")
+    counters = metrics.snapshot()["counters"]
+    if counters:
+        print("  " + "  ".join(f"{name}={value:g}" for name, value in sorted(counters.items())))
+    for stage, tender_id, error in report["errors"][:20]:
+        print(f"⚠️ {stage} {tender_id or ''}: {error}")
+
+    results = report["results"]
+    bids = [r for r in results if r.get("recommendation") == "BID"]
+    print(f"\n💾 {len(results)} tenders processed in {report['seconds']:.1f}s, {len(bids)} recommended to bid")
+    if report["awards"]:
+        print(f"📊 {report['awards']} awards added to the market history")
+    amended = [r for r in results if r.get("changes")]
+    if amended:
+        print(f"✏️ {len(amended)} amended tenders reprocessed only where their changes reached")
+    for r in sorted(bids, key=lambda r: -r["roi_score"])[:10]:
+        print(f"  {r['roi_score']:5.1f}  {r['id']}  {r['title'][:70]}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps({k: v for k, v in r.items() if k not in ("tender", "text")}, ensure_ascii=False) + "\n")
+        print(f"📄 Results written to {args.output}")
+    return 0
+
+
+def cmd_synth(args):
+    from core import synthetic
+
+    if not (args.files or args.jsonl or args.store):
+        print("❌ Choose at least one destination: --files, --jsonl or --store")
+        return 2
+
+    def tenders():
+        return synthetic.iter_tenders(args.count, seed=args.seed, start_index=args.start,
+                                      lot_ratio=args.lot_ratio, complete_ratio=args.complete_ratio,
+                                      topics=args.topic or None)
+
+    print(f"🧪 Generating {args.count:,} synthetic tenders (seed {args.seed})")
+    if args.files:
+        synthetic.write_files(tenders(), args.files)
+        print(f"📁 Tender JSON files written to {args.files}")
+    if args.jsonl:
+        synthetic.write_jsonl(tenders(), args.jsonl)
+        print(f"📄 JSON lines written to {args.jsonl}")
+    if args.store:
+        from core.tender_store import TenderStore
+
+        synthetic.write_store(tenders(), TenderStore(args.db), analyses=args.analyses)
+        print(f"💾 Stored in {args.db}" + (" with analyses" if args.analyses else ""))
+    return 0
+
+
+def cmd_win_model(args):
+    from core.company_profile import CompanyProfile
+    from core.tender_store import TenderStore
+    from core.win_model import MODEL_PATH, WinModel
+
+    model = WinModel(args.model or MODEL_PATH)
+    learned = model.train_from_profile(CompanyProfile(args.profile), TenderStore(args.db), full=args.full)
+    print(f"🎯 Learned from {learned} new outcomes ({model.examples} total, win rate {model.wins}/{model.examples})")
+    if not model.trained:
+        print("⚠️ Not enough wins and losses yet; rankings use the overall win rate")
+    print(f"💾 Model saved to {model.path}")
+    return 0
+
+
+def cmd_market(args):
+    from core.market_data import MarketData
+
+    market = MarketData(args.dir)
+    if args.jsonl:
+        def tenders():
+            with open(args.jsonl, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        rows = market.ingest(tenders())
+        print(f"📥 {rows:,} awards ingested from {args.jsonl}")
+    elif not args.no_ingest:
+        from core.tender_store import TenderStore
+
+        rows = market.ingest(TenderStore(args.db).iter_tenders(awarded_only=True))
+        print(f"📥 {rows:,} awards ingested from {args.db}")
+
+    aggregates = market.rebuild()
+    print(f"📊 {len(aggregates):,} aggregates over {len(market.awards()):,} awards written to {market.aggregates_path}")
+    top = aggregates[aggregates["level"] == "cpv2"].sort_values("tenders", ascending=False).head(args.top)
+    for row in top.itertuples():
+        print(f"  CPV {row.key:<3} tenders={row.tenders:<6} discount={row.median_discount:6.1%} "
+              f"bidders={row.median_bidders:.0f} single={row.single_bidder_share:.0%}")
+    return 0
+
+
+def cmd_issuers(args):
+    from core.tender_store import TenderStore
+
+    store = TenderStore(args.db)
+    if args.backfill:
+        changed = store.issuers.update_many(store.iter_tenders())
+        print(f"🏛️ {changed:,} tender versions folded into the issuer index")
+    print(f"⚠️ Least reliable buyers (at least {args.min_tenders} tenders):")
+    for s in store.issuers.riskiest(args.top, args.min_tenders):
+        cancelled = f"{s['cancellation_rate']:.0%}" if s["cancellation_rate"] is not None else "—"
+        lead = f"{s['lead_days']:.0f}d" if s["lead_days"] is not None else "—"
+        print(f"  risk={s['buyer_risk']:.2f} tenders={s['tenders']:<5} cancelled={cancelled:<4} "
+              f"complaints={s['complaints']:<3} lead={lead:<4} {s['issuer_id']} {s['name'][:60]}")
+    return 0
+
+
+def cmd_amendments(args):
+    from core.tender_store import TenderStore
+
+    store = TenderStore(args.db)
+    amendments = store.amendments.history(args.tender) if args.tender else store.amendments.recent(args.limit)
+    if not amendments:
+        print("🚫 No amendments recorded")
+    for a in amendments:
+        fields = sorted({"/".join(str(s) for s in op["path"][:2]) for op in a["patch"]})
+        print(f"  {a['date_modified'][:19]} {a['tender_id']} [{', '.join(a['categories'])}] "
+              f"{len(a['patch'])} ops: {', '.join(fields)[:80]}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core.cli", description="Tender processing from the command line")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="download → extract → analyze → score the ProZorro feed")
+    run.add_argument("--topic", default="Construction", help="topic from data/topics.json")
+    run.add_argument("--since", type=parse_since, default=parse_since("24h"), help="24h, 7d, 30m or an ISO date")
+    run.add_argument("--until", type=parse_since, default=None, help="stop at this modification time")
+    run.add_argument("--limit", type=int, default=None, help="stop after this many matching tenders")
+    for stage, workers in DEFAULT_CONCURRENCY.items():
+        run.add_argument(f"--{stage}-workers", type=int, default=None, help=f"{stage} threads (default {workers})")
+    run.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="bounded queue size between stages")
+    run.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="resumable checkpoint file")
+    run.add_argument("--no-checkpoint", action="store_true", help="reprocess everything in the window")
+    run.add_argument("--no-analyze", action="store_true", help="download and extract only (no Claude calls)")
+    run.add_argument("--feed-order", action="store_true",
+                     help="process tenders in feed order instead of closest deadline first")
+    run.add_argument("--fetch-all", action="store_true",
+                     help="fetch off-topic tenders too (full award and buyer history, more requests)")
+    run.add_argument("--company", default=None, help="JSON file with company resources or a company profile")
+    run.add_argument("--db", default=STORE_PATH, help="SQLite tender store")
+    run.add_argument("--output", default=None, help="write scored tenders as JSON lines")
+    run.set_defaults(func=cmd_run)
+
+    synth = commands.add_parser("synth", help="generate a synthetic ProZorro-shaped corpus for load testing")
+    synth.add_argument("--count", type=int, default=1000)
+    synth.add_argument("--seed", type=int, default=42)
+    synth.add_argument("--start", type=int, default=0, help="first corpus index (to extend an existing corpus)")
+    synth.add_argument("--lot-ratio", type=float, default=0.2, help="share of multi-lot tenders")
+    synth.add_argument("--complete-ratio", type=float, default=0.25, help="share of completed tenders with awards")
+    synth.add_argument("--topic", action="append", help="only these topics (repeatable)")
+    synth.add_argument("--files", default=None, help="directory for ProZorro_{id}.json files")
+    synth.add_argument("--jsonl", default=None, help="write all tenders to one JSON-lines file")
+    synth.add_argument("--store", action="store_true", help="write to the SQLite tender store (--db)")
+    synth.add_argument("--db", default=STORE_PATH, help="SQLite tender store")
+    synth.add_argument("--analyses", action="store_true", help="also store Claude-shaped analyses (UI load)")
+    synth.set_defaults(func=cmd_synth)
+
+    win = commands.add_parser("win-model", help="train the win-probability model on recorded bid outcomes")
+    win.add_argument("--profile", default="/opt/render/project/src/data/company_profile.json",
+                     help="company profile (its .db holds the performance history)")
+    win.add_argument("--db", default=STORE_PATH, help="SQLite tender store with the bid tenders")
+    win.add_argument("--model", default=None, help="model file (default data/win_model.joblib)")
+    win.add_argument("--full", action="store_true", help="refit on the whole history instead of only new outcomes")
+    win.set_defaults(func=cmd_win_model)
+
+    market = commands.add_parser("market", help="ingest award history and rebuild the market aggregates")
+    market.add_argument("--db", default=STORE_PATH, help="SQLite tender store to ingest awarded tenders from")
+    market.add_argument("--jsonl", default=None, help="ingest from a JSON-lines tender file instead of the store")
+    market.add_argument("--no-ingest", action="store_true", help="only rebuild the aggregates from stored awards")
+    market.add_argument("--dir", default=MARKET_DIR, help="award history directory")
+    market.add_argument("--top", type=int, default=10, help="CPV groups to print")
+    market.set_defaults(func=cmd_market)
+
+    issuers = commands.add_parser("issuers", help="buyer reliability from the issuer index")
+    issuers.add_argument("--db", default=STORE_PATH, help="SQLite tender store")
+    issuers.add_argument("--backfill", action="store_true", help="fold in every stored tender first")
+    issuers.add_argument("--min-tenders", type=int, default=3, help="ignore issuers with fewer tenders")
+    issuers.add_argument("--top", type=int, default=10, help="issuers to print")
+    issuers.set_defaults(func=cmd_issuers)
+
+    amendments = commands.add_parser("amendments", help="recorded tender amendments and what they changed")
+    amendments.add_argument("--db", default=STORE_PATH, help="SQLite tender store")
+    amendments.add_argument("--tender", default=None, help="full history of one tender id")
+    amendments.add_argument("--limit", type=int, default=20, help="most recent amendments to print")
+    amendments.set_defaults(func=cmd_amendments)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,12 +2,33 @@
 import json
 import os
 from datetime import datetime
+from core.profile_store import ProfileStore
 
 class CompanyProfile:
-    def __init__(self, profile_path="data/company_profile.json"):
+    """
+    Company profile backed by SQLite (core/profile_store.py)
+
+    Updates write single rows. An existing company_profile.json is imported
+    the first time its database is created; save_profile() exports the JSON.
+    """
+
+    def __init__(self, profile_path="data/company_profile.json", db_path=None):
         self.profile_path = profile_path
-        self.profile = self.load_profile()
-    
+        self.db_path = db_path or f"{os.path.splitext(profile_path)[0]}.db"
+        self.store = ProfileStore(self.db_path)
+        if self.store.is_empty():
+            self.store.seed(self.load_profile())
+
+    @property
+    def profile(self):
+        """
+        Read-only snapshot of the whole profile (company_profile.json layout)
+
+        Every access reloads it from the database, so read it once and reuse
+        the dict; edits to it are not saved, use the update methods instead.
+        """
+        return self.store.load()
+
     def load_profile(self):
         if os.path.exists(self.profile_path):
             with open(self.profile_path, "r") as f:
@@ -20,41 +41,26 @@ class CompanyProfile:
             "capabilities": [],
             "last_updated": datetime.now().isoformat()
         }
-    
+
     def save_profile(self):
-        with open(self.profile_path, "w") as f:
+        """Export the profile to profile_path"""
+        tmp_path = f"{self.profile_path}.tmp"
+        with open(tmp_path, "w") as f:
             json.dump(self.profile, f, indent=2)
-    
+        os.replace(tmp_path, self.profile_path)
+
     def add_document(self, doc_name, doc_type, validity, file_path, tags=None):
-        new_doc = {
-            "id": f"DOC-{len(self.profile['document_vault']) + 1:04d}",
-            "name": doc_name,
-            "type": doc_type,
-            "validity": validity,
-            "path": file_path,
-            "tags": tags or [],
-            "added_date": datetime.now().isoformat()
-        }
-        self.profile["document_vault"].append(new_doc)
-        self.save_profile()
-        return new_doc
-    
+        return self.store.add_document(doc_name, doc_type, validity, file_path, tags)
+
     def update_resources(self, resources):
-        self.profile["resources"] = resources
-        self.save_profile()
-    
+        self.store.replace_resources(resources)
+
     def add_capability(self, capability):
-        if capability not in self.profile["capabilities"]:
-            self.profile["capabilities"].append(capability)
-            self.save_profile()
-    
+        return self.store.add_capability(capability)
+
     def add_performance_record(self, tender_id, outcome, profit, lessons):
-        record = {
-            "tender_id": tender_id,
-            "outcome": outcome,
-            "profit": profit,
-            "lessons": lessons,
-            "date": datetime.now().isoformat()
-        }
-        self.profile["historical_performance"].append(record)
-        self.save_profile()
\ No newline at end of file
+        return self.store.add_performance_record(tender_id, outcome, profit, lessons)
+
+    def performance(self, **filters):
+        """Performance records via indexed queries (tender_id, outcome, since, until, limit, with_id)"""
+        return self.store.performance(**filters)
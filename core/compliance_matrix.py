@@ -0,0 +1,204 @@
+# compliance_matrix.py
+import difflib
+import json
+import os
+import sys
+from datetime import date
+from functools import lru_cache
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.text_utils import normalize_text, tokenize
+
+TAXONOMY_PATH = "/opt/render/project/src/data/document_taxonomy.json"
+FUZZY_CUTOFF = 0.8       # difflib ratio for requirements no synonym phrase covers
+RAW_PREFIX = "raw:"      # column key for requirements outside the taxonomy
+
+
+class DocumentTaxonomy:
+    """Canonical document types with Ukrainian/English synonyms (data/document_taxonomy.json)"""
+
+    def __init__(self, path=TAXONOMY_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            types = json.load(f)["types"]
+        self.labels = {key: spec["label"] for key, spec in types.items()}
+        # Synonyms as stem sets, most specific first: "дозвіл на роботи підвищеної небезпеки" beats "дозвіл"
+        phrases = []
+        self._fuzzy = {}
+        for key, spec in types.items():
+            for synonym in [spec["label"], *spec["synonyms"]]:
+                stems = frozenset(tokenize(synonym))
+                if stems:
+                    phrases.append((stems, key))
+                self._fuzzy.setdefault(normalize_text(synonym), key)
+        self._phrases = sorted(phrases, key=lambda p: -len(p[0]))
+        self._cache = {}
+
+    def canonical(self, text):
+        """Taxonomy key for a requirement or vault type, or raw:<normalized text> if none fits"""
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+        normalized = normalize_text(text)
+        stems = set(tokenize(text))
+        key = next((k for phrase, k in self._phrases if phrase <= stems), None)
+        if key is None:
+            close = difflib.get_close_matches(normalized, self._fuzzy, n=1, cutoff=FUZZY_CUTOFF)
+            key = self._fuzzy[close[0]] if close else f"{RAW_PREFIX}{normalized}"
+        self._cache[text] = key
+        return key
+
+    def label(self, key):
+        if key.startswith(RAW_PREFIX):
+            return key[len(RAW_PREFIX):]
+        return self.labels.get(key, key)
+
+
+@lru_cache(maxsize=4)
+def load_taxonomy(path=TAXONOMY_PATH, mtime=None):
+    return DocumentTaxonomy(path)
+
+
+def default_taxonomy(path=TAXONOMY_PATH):
+    """Taxonomy cached per file version"""
+    return load_taxonomy(path, os.path.getmtime(path) if os.path.exists(path) else None)
+
+
+class ComplianceMatrix:
+    """
+    Tenders × document types coverage for a set of analyses
+
+    Attributes:
+        keys: column keys (taxonomy types, then raw requirements)
+        required: bool [tenders, types], the tender asks for the type
+        available / expired: bool [types], the vault holds a valid / only expired document
+    """
+
+    def __init__(self, tender_ids, titles, keys, required, available, expired, requirements, taxonomy):
+        self.tender_ids = tender_ids
+        self.titles = titles
+        self.keys = keys
+        self.required = required
+        self.available = available
+        self.expired = expired
+        self.requirements = requirements  # per tender: [(requirement text, column)]
+        self.taxonomy = taxonomy
+        self._row = {tid: i for i, tid in enumerate(tender_ids)}
+
+        # One pass over the whole matrix
+        self.covered = required & available
+        self.expired_required = required & expired
+        self.missing = required & ~available & ~expired
+        self.n_required = required.sum(axis=1)
+        self.n_covered = self.covered.sum(axis=1)
+        self.n_missing = self.missing.sum(axis=1)
+        self.n_expired = self.expired_required.sum(axis=1)
+        self.coverage = np.where(self.n_required > 0, self.n_covered / np.maximum(self.n_required, 1), 1.0)
+        self.ready = (self.n_missing + self.n_expired) == 0
+
+    def labels(self):
+        return [self.taxonomy.label(k) for k in self.keys]
+
+    def report(self, tender_id):
+        """check_compliance-style report for one tender, in its own requirement wording"""
+        i = self._row[tender_id]
+        missing, expired, canonical = [], [], {}
+        for text, col in self.requirements[i]:
+            canonical[text] = self.taxonomy.label(self.keys[col])
+            if self.expired[col]:
+                expired.append(text)
+            elif not self.available[col]:
+                missing.append(text)
+        return {
+            "required_documents": [text for text, _ in self.requirements[i]],
+            "available_documents": [self.taxonomy.label(k) for k, ok in zip(self.keys, self.available) if ok],
+            "missing_documents": missing,
+            "expired_documents": expired,
+            "canonical": canonical,
+            "compliance_score": float(self.coverage[i]),
+            "is_compliant": bool(self.ready[i])
+        }
+
+    def ranking(self):
+        """Tenders ranked by "ready to bid now": fully covered first, then by coverage"""
+        import pandas as pd
+
+        labels = np.array(self.labels(), dtype=object)
+        frame = pd.DataFrame({
+            "tender_id": self.tender_ids,
+            "title": self.titles,
+            "ready": self.ready,
+            "coverage": self.coverage,
+            "required": self.n_required,
+            "missing": self.n_missing,
+            "expired": self.n_expired,
+            "missing_documents": [", ".join(labels[row]) for row in self.missing],
+            "expired_documents": [", ".join(labels[row]) for row in self.expired_required],
+        })
+        frame["_gap"] = frame["missing"] + frame["expired"]
+        frame = frame.sort_values(["ready", "coverage", "_gap"], ascending=[False, False, True], kind="stable")
+        return frame.drop(columns="_gap").reset_index(drop=True)
+
+    def to_frame(self):
+        """Status grid: ✅ covered, ⌛ only expired, ❌ missing, blank when not required"""
+        import pandas as pd
+
+        grid = np.full(self.required.shape, "", dtype=object)
+        grid[self.covered] = "✅"
+        grid[self.expired_required] = "⌛"
+        grid[self.missing] = "❌"
+        used = self.required.any(axis=0)
+        labels = np.array(self.labels(), dtype=object)
+        return pd.DataFrame(grid[:, used], index=self.tender_ids, columns=labels[used])
+
+
+def vault_status(vault, taxonomy, on_date=None):
+    """Latest validity date per taxonomy key from a DocumentVault (or DocumentComplianceChecker)"""
+    vault = getattr(vault, "vault", vault)
+    on_date = on_date or date.today().isoformat()
+    until = {}
+    for type_key, valid_until in vault.valid_until.items():
+        key = taxonomy.canonical(vault.type_names[type_key])
+        until[key] = max(until.get(key, ""), valid_until)
+    return until, on_date
+
+
+def build_matrix(analyses, vault, taxonomy=None, on_date=None):
+    """
+    Coverage matrix for every analysis' required_documents against the vault
+
+    Each distinct requirement string is canonicalized once; counts, coverage
+    and readiness come from boolean array operations over the whole set.
+    """
+    taxonomy = taxonomy or default_taxonomy()
+    until, on_date = vault_status(vault, taxonomy, on_date)
+
+    columns = {}
+    tender_ids, titles, requirements, rows, cols = [], [], [], [], []
+    for i, analysis in enumerate(analyses):
+        tender_ids.append(analysis.get("tender_id", i))
+        titles.append(analysis.get("title", ""))
+        docs = analysis.get("required_documents") or []
+        if isinstance(docs, str):
+            docs = [d.strip() for d in docs.split(",") if d.strip()]
+        reqs = []
+        for text in docs:
+            col = columns.setdefault(taxonomy.canonical(text), len(columns))
+            reqs.append((text, col))
+            rows.append(i)
+            cols.append(col)
+        requirements.append(reqs)
+
+    keys = list(columns)
+    required = np.zeros((len(tender_ids), len(keys)), dtype=bool)
+    required[rows, cols] = True
+    valid_until = np.array([until.get(k, "") for k in keys], dtype=str)
+    held = valid_until != ""
+    available = held & (valid_until >= on_date)
+    expired = held & ~available
+    return ComplianceMatrix(tender_ids, titles, keys, required, available, expired, requirements, taxonomy)
+
+
+def check_requirements(required_docs, vault, taxonomy=None, on_date=None):
+    """Single-tender report with the same synonym mapping as the bulk matrix"""
+    matrix = build_matrix([{"tender_id": 0, "required_documents": required_docs}], vault, taxonomy, on_date)
+    return matrix.report(0)
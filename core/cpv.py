@@ -0,0 +1,220 @@
+# cpv.py
+import json
+import os
+import sys
+from functools import lru_cache
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.text_utils import tokenize
+
+CPV_PATH = "/opt/render/project/src/data/cpv_dk021.json"
+TOPICS_PATH = "/opt/render/project/src/data/topics.json"
+UNCLASSIFIED = {"99999999"}  # ProZorro's "not defined" code
+DEFAULT_CATEGORY = "Other"
+
+
+def cpv_digits(code):
+    """'45233142-6' → '45233142' (None for anything that is not an 8-digit CPV code)"""
+    digits = str(code or "").split("-")[0].strip()
+    return digits if len(digits) == 8 and digits.isdigit() and digits not in UNCLASSIFIED else None
+
+
+def cpv_prefix(code):
+    """Significant digits of a CPV code: division 45000000 → '45', class 45230000 → '4523'"""
+    digits = cpv_digits(code) or str(code).strip()
+    return digits.rstrip("0").ljust(2, "0")
+
+
+def item_codes(tender):
+    """CPV codes of a tender's (or feed entry's) items, in item order, without duplicates"""
+    codes = []
+    for item in tender.get("items") or []:
+        classification = item.get("classification") or {}
+        if classification.get("scheme", "ДК021") in ("ДК021", "CPV"):
+            digits = cpv_digits(classification.get("id"))
+            if digits and digits not in codes:
+                codes.append(digits)
+    return codes
+
+
+def primary_code(tender):
+    """The first item's CPV code ('' when unclassified), carried into analyses for categorization"""
+    codes = item_codes(tender or {})
+    return codes[0] if codes else ""
+
+
+class _Node:
+    __slots__ = ("children", "code", "name", "topic")
+
+    def __init__(self):
+        self.children = {}
+        self.code = None
+        self.name = None
+        self.topic = None
+
+
+class CpvTrie:
+    """
+    Digit trie over DK 021:2015 (CPV) codes
+
+    Each code is stored under its significant digits, so a lookup walks at
+    most eight nodes and lands on the deepest known ancestor of any code,
+    including codes the bundled list does not name.
+    """
+
+    def __init__(self, codes=None):
+        self.root = _Node()
+        for code, name in (codes or {}).items():
+            self.insert(code, name=name)
+
+    def _path(self, prefix):
+        node = self.root
+        for digit in prefix:
+            node = node.children.setdefault(digit, _Node())
+        return node
+
+    def insert(self, code, name=None, topic=None):
+        """Name a code and/or route its whole subtree to a topic (code may be a bare prefix like '45')"""
+        node = self._path(cpv_prefix(code) if len(str(code)) >= 8 else str(code))
+        if name is not None:
+            node.code, node.name = cpv_digits(code) or str(code).ljust(8, "0"), name
+        if topic is not None:
+            node.topic = topic
+        return node
+
+    def walk(self, code):
+        """Nodes from the division down to the deepest stored ancestor of `code`"""
+        digits = cpv_digits(code)
+        node, path = self.root, []
+        for digit in digits or "":
+            node = node.children.get(digit)
+            if node is None:
+                break
+            path.append(node)
+        return path
+
+    def describe(self, code):
+        """{"code", "name"} of the deepest named ancestor (None for unknown divisions)"""
+        named = [n for n in self.walk(code) if n.name]
+        return {"code": named[-1].code, "name": named[-1].name} if named else None
+
+    def topic(self, code):
+        """Topic of the most specific routed subtree containing `code`, or None"""
+        topic = None
+        for node in self.walk(code):
+            topic = node.topic or topic
+        return topic
+
+
+class TopicRouter:
+    """
+    Topics as CPV subtrees plus fallback keywords (data/topics.json)
+
+    A tender belongs to a topic when one of its items is classified inside
+    the topic's subtrees. Keywords are only consulted for tenders without a
+    usable classification, so a pharmacy tender that mentions "ремонт" no
+    longer lands in Construction.
+    """
+
+    def __init__(self, topics, trie=None):
+        self.trie = trie or CpvTrie()
+        self.topics = {}
+        self._phrases = {}  # stem → [(topic order, stem set)]
+        for order, (name, spec) in enumerate(topics.items()):
+            spec = spec if isinstance(spec, dict) else {"keywords": spec}  # keywords.json-style list
+            self.topics[name] = {
+                "category": spec.get("category", name),
+                "cpv": list(spec.get("cpv", [])),
+                "keywords": list(spec.get("keywords", [])),
+                "order": order,
+            }
+            for prefix in spec.get("cpv", []):
+                self.trie.insert(prefix, topic=name)
+            for keyword in spec.get("keywords", []):
+                stems = frozenset(tokenize(keyword))
+                if stems:
+                    self._phrases.setdefault(min(stems), []).append((order, stems, name))
+
+    def __contains__(self, topic):
+        return topic in self.topics
+
+    def category(self, topic):
+        return self.topics[topic]["category"] if topic in self.topics else DEFAULT_CATEGORY
+
+    def topics_for_codes(self, codes):
+        """Topics of a list of CPV codes (one trie walk per code), in code order"""
+        found = []
+        for code in codes:
+            topic = self.trie.topic(code)
+            if topic and topic not in found:
+                found.append(topic)
+        return found
+
+    def topics_for_text(self, text):
+        """Topics whose keywords all appear (as stems) in `text`, in topics.json order"""
+        stems = set(tokenize(text))
+        hits = {(order, name) for stem in stems for order, phrase, name in self._phrases.get(stem, ())
+                if phrase <= stems}
+        return [name for _, name in sorted(hits)]
+
+    def topics_of(self, tender):
+        """Topics of a tender or feed entry: from its CPV codes, or its title/description when unclassified"""
+        codes = item_codes(tender)
+        if codes:
+            return self.topics_for_codes(codes)
+        return self.topics_for_text(f"{tender.get('title', '')} {tender.get('description', '')}")
+
+    def matches(self, tender, topic):
+        """
+        True if the tender belongs to `topic`
+
+        Classified tenders are routed by CPV alone; keywords decide for
+        unclassified tenders and for keyword-only topics.
+        """
+        spec = self.topics.get(topic)
+        if spec is None:
+            return False
+        codes = item_codes(tender)
+        if codes and spec["cpv"]:
+            return topic in self.topics_for_codes(codes)
+        return topic in self.topics_for_text(f"{tender.get('title', '')} {tender.get('description', '')}")
+
+    def excludes(self, entry, topic):
+        """
+        True when a feed-listing entry is certainly off-topic: its items are
+        classified and none falls under the topic. Entries listed without
+        items (or unclassified) are never excluded, so they still get fetched.
+        """
+        spec = self.topics.get(topic)
+        codes = item_codes(entry)
+        return bool(spec and spec["cpv"] and codes) and topic not in self.topics_for_codes(codes)
+
+    def relevance(self, tender, topic):
+        """Share of a tender's classified items that fall under `topic` (None when none are classified)"""
+        codes = item_codes(tender)
+        if not codes:
+            return None
+        return sum(self.trie.topic(code) == topic for code in codes) / len(codes)
+
+    def categorize(self, code=None, text=""):
+        """TenderIntelligence category: the CPV code's topic, else the first keyword topic, else 'Other'"""
+        topics = self.topics_for_codes([code]) if cpv_digits(code) else []
+        topics = topics or self.topics_for_text(text)
+        return self.category(topics[0]) if topics else DEFAULT_CATEGORY
+
+
+@lru_cache(maxsize=4)
+def load_router(topics_path=TOPICS_PATH, cpv_path=CPV_PATH, mtimes=None):
+    """TopicRouter over the bundled classifier (mtimes only keys the cache)"""
+    codes = {}
+    if os.path.exists(cpv_path):
+        with open(cpv_path, "r", encoding="utf-8") as f:
+            codes = json.load(f)["codes"]
+    with open(topics_path, "r", encoding="utf-8") as f:
+        topics = json.load(f)
+    return TopicRouter(topics, CpvTrie(codes))
+
+
+def default_router(topics_path=TOPICS_PATH, cpv_path=CPV_PATH):
+    """Shared router, rebuilt when topics.json or the classifier file changes"""
+    mtimes = tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in (topics_path, cpv_path))
+    return load_router(topics_path, cpv_path, mtimes)
@@ -1,28 +1,35 @@
 import os
-import pdfplumber
-import pymupdf
-from pdf2image import convert_from_path
-import pytesseract
-import pandas as pd
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import metrics
+
+# PDF/OCR libraries are imported inside the functions so listing PDFs stays cheap
 
 TENDER_DIR = "/opt/render/project/src/tenders/"
 TEXT_DIR = "/opt/render/project/src/tenders/text"
-os.makedirs(TEXT_DIR, exist_ok=True)
-
-metadata = []
 
 def extract_text_pdfplumber(path):
+    import pdfplumber
+
     with pdfplumber.open(path) as pdf:
         return "\n".join([p.extract_text() or "" for p in pdf.pages])
 
 def extract_text_ocr(path):
-    images = convert_from_path(path)
+    from pdf2image import convert_from_path
+    import pytesseract
+
+    with metrics.span("pdf.rasterize"):
+        images = convert_from_path(path)
     text = ""
     for img in images:
-        text += pytesseract.image_to_string(img)
+        with metrics.span("pdf.ocr_page"):
+            text += pytesseract.image_to_string(img)
+        metrics.incr("pdf.pages_ocr")
     return text
 
 def is_scanned(path):
+    import pymupdf
+
     doc = pymupdf.open(path)  # type: ignore
     for page in doc:
         text = page.get_text()  # type: ignore
@@ -30,14 +37,11 @@ def is_scanned(path):
             return False
     return True
 
-for filename in os.listdir(TENDER_DIR):
-    if not filename.lower().endswith(".pdf"):
-        continue
-
-    full_path = os.path.join(TENDER_DIR, filename)
-    print(f"Processing {filename}...")
+def extract_pdf(full_path, text_dir=TEXT_DIR):
+    """Extract text from one PDF (OCR for scanned files) and save it next to the others"""
+    import pymupdf
 
-    try:
+    with metrics.span("pdf.extract") as attrs:
         scanned = is_scanned(full_path)
         if not scanned:
             text = extract_text_pdfplumber(full_path)
@@ -45,21 +49,39 @@ for filename in os.listdir(TENDER_DIR):
         else:
             text = extract_text_ocr(full_path)
             source = "ocr"
+        attrs["source"] = source
+    metrics.incr("pdf.files")
+
+    # Save extracted text
+    filename = os.path.basename(full_path)
+    os.makedirs(text_dir, exist_ok=True)
+    text_file = os.path.join(text_dir, filename.replace(".pdf", ".txt"))
+    with open(text_file, "w", encoding="utf-8") as f:
+        f.write(text)
 
-        # Save extracted text
-        text_file = os.path.join(TEXT_DIR, filename.replace(".pdf", ".txt"))
-        with open(text_file, "w", encoding="utf-8") as f:
-            f.write(text)
+    pages = pymupdf.open(full_path).page_count  # type: ignore
+    metrics.incr("pdf.pages", pages)
+    return {
+        "filename": filename,
+        "pages": pages,
+        "source": source,
+        "text_len": len(text),
+        "text_file": text_file
+    }
 
-        metadata.append({
-            "filename": filename,
-            "pages": pymupdf.open(full_path).page_count,  # type: ignore
-            "source": source,
-            "text_len": len(text)
-        })
+def list_pdfs(tender_dir=TENDER_DIR):
+    return [os.path.join(tender_dir, f) for f in sorted(os.listdir(tender_dir)) if f.lower().endswith(".pdf")]
 
-    except Exception as e:
-        print(f"❌ Error with {filename}: {e}")
-        continue
+def extract_directory(tender_dir=TENDER_DIR, text_dir=TEXT_DIR):
+    metadata = []
+    for full_path in list_pdfs(tender_dir):
+        print(f"Processing {os.path.basename(full_path)}...")
+        try:
+            metadata.append(extract_pdf(full_path, text_dir))
+        except Exception as e:
+            print(f"❌ Error with {os.path.basename(full_path)}: {e}")
+            continue
+    return metadata
 
-    
\ No newline at end of file
+if __name__ == "__main__":
+    extract_directory()
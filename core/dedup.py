@@ -0,0 +1,199 @@
+# dedup.py
+import fcntl
+import json
+import os
+import sys
+import threading
+import zlib
+from contextlib import contextmanager
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import metrics
+from core.text_utils import tokenize
+
+DEDUP_DIR = "/opt/render/project/src/tenders/dedup"
+NUM_PERM = 128
+BANDS = 16               # 16 bands x 8 rows: candidate pairs from ~0.7 Jaccard upwards
+THRESHOLD = 0.7          # estimated Jaccard needed to join a cluster
+SHINGLE_SIZE = 3
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+_save_lock = threading.Lock()  # fcntl locks are per process; threads of one process queue here first
+
+
+class DuplicateIndex:
+    """
+    MinHash + LSH index that clusters re-published and cloned tenders
+
+    Several runs (download jobs, the pipeline, the UI) may hold their own copy
+    at once. save() merges the entries this copy added into whatever is on
+    disk under an exclusive lock and replaces the files atomically, so
+    overlapping runs never drop each other's entries.
+    """
+
+    def __init__(self, index_dir=None, num_perm=NUM_PERM, bands=BANDS, threshold=THRESHOLD, seed=1, load=True):
+        """
+        Args:
+            load: read the saved index; without it the index is empty and only
+                serves cached_analysis()/store_analysis() for ids that are
+                already cluster representatives (no O(N) load per lookup)
+        """
+        self.index_dir = index_dir or DEDUP_DIR
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+        self.ids = []
+        self.position = {}
+        self.signatures = []
+        self.parent = {}
+        self.buckets = {}
+        self.added = []          # ids added since load, merged into the saved index by save()
+        if load:
+            self.load()
+
+    # ---------------------- MinHash ----------------------
+    def shingles(self, text):
+        tokens = tokenize(text)
+        if len(tokens) < SHINGLE_SIZE:
+            return {" ".join(tokens)} if tokens else set()
+        return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+    def signature(self, text):
+        """MinHash signature of the text's word 3-gram shingles"""
+        hashes = np.array(
+            [zlib.crc32(s.encode("utf-8")) & MERSENNE_PRIME for s in self.shingles(text)],
+            dtype=np.uint64
+        )
+        if not len(hashes):
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint32)
+        permuted = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    # ---------------------- Clusters ----------------------
+    def representative(self, tender_id):
+        """Cluster representative (the earliest-seen member) for a tender"""
+        root = tender_id
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        # Path compression
+        while self.parent.get(tender_id, tender_id) != root:
+            self.parent[tender_id], tender_id = root, self.parent[tender_id]
+        return root
+
+    def add(self, tender_id, text):
+        """
+        Index a tender and attach it to a near-duplicate cluster
+
+        Returns:
+            str: representative tender id (the tender itself when it is new)
+        """
+        if tender_id in self.position:
+            return self.representative(tender_id)
+        self.added.append(tender_id)
+        return self._insert(tender_id, self.signature(text))
+
+    def _insert(self, tender_id, signature):
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+
+        best_rep = None
+        if candidates:
+            rows = [self.position[c] for c in candidates]
+            similarity = (np.array([self.signatures[r] for r in rows]) == signature).mean(axis=1)
+            matches = [c for c, s in zip(candidates, similarity) if s >= self.threshold]
+            if matches:
+                best_rep = min((self.representative(c) for c in matches), key=lambda r: self.position[r])
+
+        self.position[tender_id] = len(self.ids)
+        self.ids.append(tender_id)
+        self.signatures.append(signature)
+        self.parent[tender_id] = best_rep or tender_id
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(tender_id)
+        return self.representative(tender_id)
+
+    def clusters(self):
+        """Return {representative: [member ids]} for clusters with more than one tender"""
+        groups = {}
+        for tender_id in self.ids:
+            groups.setdefault(self.representative(tender_id), []).append(tender_id)
+        return {rep: members for rep, members in groups.items() if len(members) > 1}
+
+    # ---------------------- Analysis reuse ----------------------
+    def _analysis_path(self, tender_id):
+        return os.path.join(self.index_dir, "analyses", f"{tender_id}.json")
+
+    def cached_analysis(self, tender_id):
+        """Claude analysis stored for this tender's cluster representative, if any"""
+        path = self._analysis_path(self.representative(tender_id))
+        if os.path.exists(path):
+            metrics.incr("cache.analysis_hits")
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        metrics.incr("cache.analysis_misses")
+        return None
+
+    def store_analysis(self, tender_id, analysis):
+        """Store an analysis under the cluster representative so duplicates can reuse it"""
+        path = self._analysis_path(self.representative(tender_id))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(analysis, f, ensure_ascii=False, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    # ---------------------- Persistence ----------------------
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        with _save_lock, open(os.path.join(self.index_dir, "index.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self):
+        """Merge this copy's new entries into the saved index and write it atomically"""
+        with self._locked():
+            signatures = dict(zip(self.ids, self.signatures))
+            added = self.added
+            self.ids, self.position, self.signatures, self.parent, self.buckets = [], {}, [], {}, {}
+            self.load()
+            for tender_id in added:
+                if tender_id not in self.position:
+                    self._insert(tender_id, signatures[tender_id])
+            self.added = []
+
+            signatures_path = os.path.join(self.index_dir, "signatures.npy")
+            meta_path = os.path.join(self.index_dir, "index.json")
+            with open(f"{signatures_path}.tmp", "wb") as f:
+                np.save(f, np.array(self.signatures, dtype=np.uint32).reshape(-1, self.num_perm))
+            with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump({"ids": self.ids, "parent": self.parent}, f, ensure_ascii=False)
+            # Signatures first: a reader between the two renames sees more rows than ids, never fewer
+            os.replace(f"{signatures_path}.tmp", signatures_path)
+            os.replace(f"{meta_path}.tmp", meta_path)
+
+    def load(self):
+        meta_path = os.path.join(self.index_dir, "index.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.ids = meta["ids"]
+        self.parent = meta["parent"]
+        self.position = {tender_id: i for i, tender_id in enumerate(self.ids)}
+        self.signatures = list(np.load(os.path.join(self.index_dir, "signatures.npy"))[:len(self.ids)])
+        for tender_id, signature in zip(self.ids, self.signatures):
+            for key in self._band_keys(signature):
+                self.buckets.setdefault(key, []).append(tender_id)
@@ -0,0 +1,136 @@
+# doc_matcher.py
+import heapq
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.text_utils import tokenize
+
+MIN_SCORE = 0.35         # Dice similarity of trigram sets below which a candidate is dropped
+SYNONYM_SCORE = 0.9      # same canonical type in the taxonomy, whatever the language
+
+
+def trigrams(text):
+    """Character trigrams of the stemmed tokens, padded so word starts and ends count"""
+    grams = set()
+    for token in tokenize(text):
+        padded = f"<{token}>"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class DocumentMatcher:
+    """
+    Scored vault candidates for a document requirement
+
+    Every distinct name, type and tag in the vault is a term with a trigram
+    set and a taxonomy type; postings map each trigram to the terms containing
+    it. A query counts shared trigrams for all terms at once with a bincount
+    over its postings, and adds the terms of its own taxonomy type so Ukrainian
+    and English names match each other. Scores are per term; documents are
+    read off the best terms until `limit`.
+    """
+
+    def __init__(self, taxonomy=None):
+        if taxonomy is None:
+            from core.compliance_matrix import default_taxonomy
+            taxonomy = default_taxonomy()
+        self.taxonomy = taxonomy
+        self.documents = {}      # id -> document
+        self.terms = {}          # term text -> term id
+        self.term_grams = []     # term id -> trigram set
+        self.term_docs = []      # term id -> {doc ids}
+        self.postings = {}       # trigram -> [term ids]
+        self.by_canonical = {}   # taxonomy type -> {term ids}
+        self._arrays = {}        # trigram -> postings as an int array, dropped when the postings grow
+        self._sizes = None       # term id -> trigram count
+
+    def __len__(self):
+        return len(self.documents)
+
+    @classmethod
+    def from_vault(cls, vault, taxonomy=None):
+        matcher = cls(taxonomy)
+        for doc in vault.documents.values():
+            matcher.add(doc)
+        return matcher
+
+    def _fields(self, doc):
+        return filter(None, [doc.get("name"), doc.get("type"), *(doc.get("tags") or [])])
+
+    def _term(self, text):
+        term = self.terms.get(text)
+        if term is None:
+            term = self.terms[text] = len(self.term_grams)
+            grams = trigrams(text)
+            self.term_grams.append(grams)
+            self.term_docs.append(set())
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(term)
+                self._arrays.pop(gram, None)
+            key = self.taxonomy.canonical(text)
+            if key in self.taxonomy.labels:
+                self.by_canonical.setdefault(key, set()).add(term)
+        return term
+
+    def add(self, doc):
+        self.documents[doc["id"]] = doc
+        for text in self._fields(doc):
+            self.term_docs[self._term(text)].add(doc["id"])
+
+    def remove(self, doc_id):
+        doc = self.documents.pop(doc_id, None)
+        if doc is None:
+            return
+        # Terms stay indexed; they simply stop pointing at the document
+        for text in self._fields(doc):
+            self.term_docs[self.terms[text]].discard(doc_id)
+
+    def _posting_array(self, gram):
+        array = self._arrays.get(gram)
+        if array is None:
+            array = self._arrays[gram] = np.array(self.postings[gram], dtype=np.int32)
+        return array
+
+    def _trigram_scores(self, grams, min_score):
+        """Dice similarity of the query against every term, from one bincount over its postings"""
+        postings = [self._posting_array(g) for g in grams if g in self.postings]
+        if not postings:
+            return {}
+        if self._sizes is None or len(self._sizes) != len(self.term_grams):
+            self._sizes = np.array([len(g) for g in self.term_grams], dtype=np.float64)
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.term_grams))
+        dice = 2 * shared / (len(grams) + self._sizes)
+        hits = np.flatnonzero(dice >= min_score)
+        return dict(zip(hits.tolist(), dice[hits].tolist()))
+
+    def match(self, requirement, limit=5, min_score=MIN_SCORE):
+        """
+        Vault documents that could satisfy a requirement, best first
+
+        Terms of the requirement's own taxonomy type score SYNONYM_SCORE, plus a
+        share of their trigram score so closer wording ranks first.
+
+        Returns:
+            list: [{"id", "name", "type", "score", "via"}], via is "synonym" or "trigram"
+        """
+        grams = trigrams(requirement)
+        scores = self._trigram_scores(grams, min_score) if grams else {}
+        synonyms = self.by_canonical.get(self.taxonomy.canonical(requirement), set())
+        ranked = sorted(
+            ((SYNONYM_SCORE + (1 - SYNONYM_SCORE) * score if term in synonyms else score, term)
+             for term, score in scores.items()),
+            reverse=True
+        )
+        plain = ((SYNONYM_SCORE, term) for term in synonyms if term not in scores)
+
+        matches, seen = [], set()
+        for score, term in heapq.merge(ranked, plain, key=lambda item: -item[0]):
+            for doc_id in sorted(self.term_docs[term] - seen):
+                seen.add(doc_id)
+                doc = self.documents[doc_id]
+                matches.append({"id": doc_id, "name": doc["name"], "type": doc["type"], "score": round(score, 3),
+                                "via": "synonym" if term in synonyms else "trigram"})
+                if len(matches) == limit:
+                    return matches
+        return matches
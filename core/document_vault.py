@@ -0,0 +1,267 @@
+# document_vault.py
+import hashlib
+import json
+import os
+import threading
+from bisect import bisect_left, insort
+from datetime import date, datetime
+
+VAULT_PATH = "/opt/render/project/src/data/document_vault.json"
+COMPACT_EVERY = 50       # journal entries before the snapshot is rewritten
+NO_EXPIRY = "9999-12-31"
+
+
+def type_key(doc_type):
+    """Lookup key for a document type: case- and whitespace-insensitive"""
+    return " ".join(str(doc_type).split()).casefold()
+
+
+def expiry_date(validity):
+    """ISO date a document is valid until (NO_EXPIRY when unset or unparseable)"""
+    try:
+        return date.fromisoformat(str(validity)[:10]).isoformat()
+    except ValueError:
+        return NO_EXPIRY
+
+
+def content_hash(doc_type, name, validity, path):
+    """
+    Dedup key: the file's bytes when the file is readable, otherwise its metadata,
+    scoped to the document type and expiry (a renewed document re-uploaded with
+    the same file but a new validity is a new entry, not a duplicate)
+    """
+    digest = hashlib.sha256(f"{type_key(doc_type)}\0{expiry_date(validity)}\0".encode("utf-8"))
+    if path and os.path.isfile(path):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    else:
+        digest.update(json.dumps([name, validity, path], ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DocumentVault:
+    """
+    Company document vault
+
+    The JSON snapshot keeps the original document_vault.json layout; changes
+    are appended to a journal next to it and folded into the snapshot by an
+    atomic rewrite every COMPACT_EVERY entries. Replaying the journal is
+    idempotent, so a crash between the snapshot rename and the journal reset
+    loses nothing. Documents are indexed by content hash, type, tag and expiry.
+    """
+
+    def __init__(self, path=VAULT_PATH, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.documents = {}      # id -> document
+        self.by_hash = {}        # content hash -> id
+        self.by_type = {}        # type key -> [ids]
+        self.by_tag = {}         # tag -> {ids}
+        self.expiries = []       # sorted [(expiry, id)]
+        self.valid_until = {}    # type key -> latest expiry of any document of that type
+        self.type_names = {}     # type key -> type as first entered
+        self.journal_entries = 0
+        self.last_updated = datetime.now().isoformat()
+        self._next_id = 1
+        self._matcher = None     # DocumentMatcher, built on first suggest_alternatives()
+
+    # ---------------------- Index maintenance ----------------------
+    def _index(self, doc):
+        doc.setdefault("hash", content_hash(doc["type"], doc["name"], doc.get("validity"), doc.get("path")))
+        if doc["hash"] in self.by_hash:
+            return False  # duplicate content: keep the first copy
+        key = type_key(doc["type"])
+        expiry = expiry_date(doc.get("validity"))
+        self.documents[doc["id"]] = doc
+        self.by_hash[doc["hash"]] = doc["id"]
+        self.by_type.setdefault(key, []).append(doc["id"])
+        self.type_names.setdefault(key, doc["type"])
+        for tag in doc.get("tags") or []:
+            self.by_tag.setdefault(tag, set()).add(doc["id"])
+        insort(self.expiries, (expiry, doc["id"]))
+        self.valid_until[key] = max(self.valid_until.get(key, ""), expiry)
+        if self._matcher is not None:
+            self._matcher.add(doc)
+        number = doc["id"].rsplit("-", 1)[-1]
+        if number.isdigit():
+            self._next_id = max(self._next_id, int(number) + 1)
+        return True
+
+    def _unindex(self, doc_id):
+        doc = self.documents.pop(doc_id, None)
+        if doc is None:
+            return None
+        key = type_key(doc["type"])
+        self.by_hash.pop(doc["hash"], None)
+        self.by_type[key].remove(doc_id)
+        for tag in doc.get("tags") or []:
+            self.by_tag.get(tag, set()).discard(doc_id)
+        self.expiries.remove((expiry_date(doc.get("validity")), doc_id))
+        if self._matcher is not None:
+            self._matcher.remove(doc_id)
+        if self.by_type[key]:
+            self.valid_until[key] = max(expiry_date(self.documents[i].get("validity")) for i in self.by_type[key])
+        else:
+            del self.by_type[key], self.valid_until[key], self.type_names[key]
+        return doc
+
+    # ---------------------- Persistence ----------------------
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.last_updated = snapshot.get("last_updated", self.last_updated)
+            for doc in snapshot.get("documents", []):
+                self._index(doc)
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn final write
+                    self._apply(entry)
+                    self.journal_entries += 1
+
+    def _apply(self, entry):
+        if entry["op"] == "add":
+            self._index(entry["doc"])
+        elif entry["op"] == "remove":
+            self._unindex(entry["id"])
+        self.last_updated = entry.get("at", self.last_updated)
+
+    def _journal(self, entry):
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_entries += 1
+        if self.journal_entries >= self.compact_every:
+            self._compact()
+
+    def snapshot(self):
+        """The vault in document_vault.json layout"""
+        categories = {}
+        for key, ids in self.by_type.items():
+            categories[self.type_names[key]] = list(ids)
+        return {
+            "documents": sorted(self.documents.values(), key=lambda d: d["id"]),
+            "categories": categories,
+            "last_updated": self.last_updated
+        }
+
+    def _compact(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_entries = 0
+
+    def compact(self):
+        """Fold the journal into the snapshot (atomic rename)"""
+        with self._lock:
+            self._compact()
+
+    # ---------------------- Documents ----------------------
+    def add(self, doc_name, doc_type, validity, file_path, tags=None):
+        """Add a document; re-adding the same content returns the existing entry"""
+        with self._lock:
+            digest = content_hash(doc_type, doc_name, validity, file_path)
+            if digest in self.by_hash:
+                return self.documents[self.by_hash[digest]]
+            now = datetime.now().isoformat()
+            doc = {
+                "id": f"DOC-{self._next_id:04d}",
+                "name": doc_name,
+                "type": doc_type,
+                "validity": validity,
+                "path": file_path,
+                "tags": tags or [],
+                "added_date": now,
+                "hash": digest
+            }
+            self._index(doc)
+            self.last_updated = now
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._journal({"op": "add", "doc": doc, "at": now})
+            return doc
+
+    def remove(self, doc_id):
+        with self._lock:
+            doc = self._unindex(doc_id)
+            if doc is not None:
+                self.last_updated = datetime.now().isoformat()
+                self._journal({"op": "remove", "id": doc_id, "at": self.last_updated})
+            return doc
+
+    def by_type_name(self, doc_type):
+        return [self.documents[i] for i in self.by_type.get(type_key(doc_type), [])]
+
+    def tagged(self, tag):
+        return [self.documents[i] for i in sorted(self.by_tag.get(tag, ()))]
+
+    def expiring(self, before, after=None):
+        """Documents whose validity ends in [after, before)"""
+        start = bisect_left(self.expiries, (after or "",))
+        end = bisect_left(self.expiries, (str(before),))
+        return [self.documents[doc_id] for _, doc_id in self.expiries[start:end]]
+
+    def has_valid(self, doc_type, on_date=None):
+        """True if some document of this type is valid on on_date (today by default)"""
+        until = self.valid_until.get(type_key(doc_type))
+        return until is not None and until >= (on_date or date.today().isoformat())
+
+    # ---------------------- Compliance ----------------------
+    def check_compliance(self, required_docs, on_date=None):
+        """
+        Check tender document requirements against the vault
+
+        A requirement is met only by a document of that type that is still
+        valid on on_date (today by default); expired ones are reported separately.
+
+        Returns:
+            dict: compliance report with missing and expired documents
+        """
+        on_date = on_date or date.today().isoformat()
+        missing, expired = [], []
+        for doc_type in required_docs:
+            until = self.valid_until.get(type_key(doc_type))
+            if until is None:
+                missing.append(doc_type)
+            elif until < on_date:
+                expired.append(doc_type)
+
+        unmet = len(missing) + len(expired)
+        return {
+            "required_documents": required_docs,
+            "available_documents": sorted(self.type_names[k] for k, until in self.valid_until.items() if until >= on_date),
+            "missing_documents": missing,
+            "expired_documents": expired,
+            "compliance_score": 1 - (unmet / len(required_docs)) if required_docs else 1.0,
+            "is_compliant": unmet == 0
+        }
+
+    @property
+    def matcher(self):
+        """Trigram/synonym index over document names, types and tags, kept in step with add/remove"""
+        if self._matcher is None:
+            from core.doc_matcher import DocumentMatcher
+            self._matcher = DocumentMatcher.from_vault(self)
+        return self._matcher
+
+    def suggest_alternatives(self, missing_docs, limit=5):
+        """Scored vault documents that may cover each missing requirement"""
+        with self._lock:
+            return {doc: self.matcher.match(doc, limit) for doc in missing_docs}
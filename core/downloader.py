@@ -1,42 +1,120 @@
 import os
+import sys
 import json
 import time
 import requests
 from datetime import datetime, timedelta
-import xml.etree.ElementTree as ET
-from urllib.parse import urlencode
-
-# Configuration
-PROZORRO_API_URL = "https://public.api.openprocurement.org/api/2.4/tenders"
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import metrics
+from core.cpv import TOPICS_PATH, TopicRouter, default_router
+from core.dedup import DuplicateIndex
+from core.priority_queue import by_deadline
+from core.tender_store import AMENDED, NEW
+from core.tender_text import build_tender_text
+
+# Configuration (PROZORRO_API_URL can point at a mirror or the benchmark fixture server)
+PROZORRO_API_URL = os.getenv("PROZORRO_API_URL", "https://public.api.openprocurement.org/api/2.4/tenders")
 OUTPUT_DIR = "/opt/render/project/src/tenders"
 MAX_RESULTS = 3
 RATE_LIMIT_DELAY = 1.5
 
+KEYWORDS_PATH = "/opt/render/project/src/data/keywords.json"  # legacy keyword-only topics
+REQUEST_TIMEOUT = 30
+LISTING_FIELDS = "items,tenderPeriod"  # opt_fields asked of the feed listing: route by CPV, rank by deadline
+
 def setup_environment():
     """Create output directory if it doesn't exist"""
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     print(f"📁 Output directory created: {OUTPUT_DIR}")
-    
-def download_prozorro_tenders(topic="Construction", total_to_download=10, days_back=7):
+
+def load_topic_router(topic, topics_path=TOPICS_PATH, keywords_path=KEYWORDS_PATH):
     """
-    Download tenders from ProZorro API based on tender topic (using keywords.json)
+    TopicRouter that knows `topic`: CPV subtrees from topics.json, or a
+    keyword-only topic from the legacy keywords.json
     """
-    print(f"🔍 Downloading tenders for topic: {topic}")
+    if os.path.exists(topics_path):
+        router = default_router(topics_path)
+        if topic in router:
+            return router
+    if os.path.exists(keywords_path):
+        with open(keywords_path, "r", encoding="utf-8") as f:
+            topic_keywords = json.load(f).get(topic, [])
+        if topic_keywords:
+            return TopicRouter({topic: topic_keywords})
+    raise ValueError(f"❌ Topic '{topic}' not found in topics.json or keywords.json")
+
+def matches_topic(tender_data, topic, router=None):
+    """True if the tender's CPV codes fall under the topic (keywords only for unclassified tenders)"""
+    return (router or load_topic_router(topic)).matches(tender_data, topic)
+
+def fetch_tender(tender_id, session=None):
+    """Full tender JSON from the ProZorro API"""
+    with metrics.span("http.fetch_tender"):
+        response = (session or requests).get(f"{PROZORRO_API_URL}/{tender_id}", timeout=REQUEST_TIMEOUT)
+    metrics.incr("http.requests")
+    metrics.incr("http.bytes", len(response.content))
+    response.raise_for_status()
+    return response.json()["data"]
+
+def iter_feed(since, until=None, session=None, opt_fields=None):
+    """
+    Walk the ProZorro change feed forward from `since`
+
+    Yields {"id", "dateModified"} entries in modification order, following the
+    API's next_page offsets, and stops at `until` or when the feed is exhausted.
+    With opt_fields (e.g. LISTING_FIELDS) the entries also carry those fields
+    where the API returns them.
+    """
+    session = session or requests
+    offset = since.isoformat() if isinstance(since, datetime) else str(since)
+    params = {"limit": 100, **({"opt_fields": opt_fields} if opt_fields else {})}
+    while True:
+        with metrics.span("http.feed_page"):
+            response = session.get(PROZORRO_API_URL, params={**params, "offset": offset}, timeout=REQUEST_TIMEOUT)
+        metrics.incr("http.requests")
+        metrics.incr("http.bytes", len(response.content))
+        response.raise_for_status()
+        payload = response.json()
+        entries = payload.get("data", [])
+        if not entries:
+            return
+        for entry in entries:
+            if until and entry.get("dateModified", "") > until.isoformat():
+                return
+            yield entry
+        next_offset = payload.get("next_page", {}).get("offset")
+        if not next_offset or next_offset == offset:
+            return
+        offset = next_offset
+
+def tender_filename(tender_data):
+    return f"ProZorro_{tender_data['id']}.json"
+
+def save_tender(tender_data, output_dir=None):
+    """Write a tender as ProZorro_{id}.json (in OUTPUT_DIR by default) and return the filename"""
+    filename = tender_filename(tender_data)
+    with metrics.span("io.write_tender"):
+        with open(os.path.join(output_dir or OUTPUT_DIR, filename), "w", encoding="utf-8") as f:
+            json.dump(tender_data, f, ensure_ascii=False, indent=2)
+    metrics.incr("io.tenders_written")
+    return filename
+
+def download_prozorro_tenders(topic="Construction", total_to_download=10, days_back=7, progress=None, store=None):
+    """
+    Download tenders from ProZorro API based on tender topic (CPV subtrees from topics.json)
 
-    # Load topic keywords
-    keywords_path = "/opt/render/project/src/data/keywords.json"
-    if not os.path.exists(keywords_path):
-        raise FileNotFoundError("❌ keywords.json not found!")
+    Args:
+        progress: optional callback(fraction, message) for job status reporting
+        store: optional TenderStore that saved tenders are also written to
+    """
+    print(f"🔍 Downloading tenders for topic: {topic}")
 
-    with open(keywords_path, "r", encoding="utf-8") as f:
-        topic_keywords = json.load(f).get(topic, [])
-    
-    if not topic_keywords:
-        raise ValueError(f"❌ No keywords found for topic '{topic}' in keywords.json")
+    router = load_topic_router(topic)
 
     setup_environment()
     
     downloaded = []
+    dedup = DuplicateIndex()
     offset_time = datetime.now()
     checked = 0
 
@@ -44,50 +122,64 @@ def download_prozorro_tenders(topic="Construction", total_to_download=10, days_b
         params = {
             "descending": 1,
             "limit": 100,
+            "opt_fields": LISTING_FIELDS,
             "offset": offset_time.strftime("%Y-%m-%dT%H:%M:%S")
         }
 
         try:
-            response = requests.get(PROZORRO_API_URL, params=params)
+            with metrics.span("http.feed_page"):
+                response = requests.get(PROZORRO_API_URL, params=params)
+            metrics.incr("http.requests")
+            metrics.incr("http.bytes", len(response.content))
             response.raise_for_status()
             tenders = response.json().get("data", [])
             if not tenders:
                 print("🚫 No more tenders found.")
                 break
 
-            for tender in tenders:
+            # Closest deadlines first, so urgent tenders are saved before the quota runs out
+            for tender in by_deadline(tenders, lambda entry: router.relevance(entry, topic)):
                 tender_id = tender["id"]
+                if router.excludes(tender, topic):
+                    metrics.incr("feed.skipped_by_cpv")
+                    checked += 1
+                    continue
                 try:
-                    tender_url = f"{PROZORRO_API_URL}/{tender_id}"
-                    tender_response = requests.get(tender_url)
-                    tender_response.raise_for_status()
-                    tender_data = tender_response.json()["data"]
-
-                    title = tender_data.get("title", "").lower()
-                    description = tender_data.get("description", "").lower()
-
-                    # Check if any keyword matches
-                    if any(kw.lower() in title or kw.lower() in description for kw in topic_keywords):
-                        filename = f"ProZorro_{tender_id}.json"
-                        filepath = os.path.join(OUTPUT_DIR, filename)
-
-                        with open(filepath, "w", encoding="utf-8") as f:
-                            json.dump(tender_data, f, ensure_ascii=False, indent=2)
-
-                        downloaded.append({
-                            "id": tender_id,
-                            "title": tender_data.get("title", "Без назви"),
-                            "date": tender_data.get("dateModified", ""),
-                            "budget": tender_data.get("value", {}).get("amount", 0),
-                            "file": filename
-                        })
-                        print(f"✅ Saved: {filename}")
-
-                        if len(downloaded) >= total_to_download:
-                            break
+                    tender_data = fetch_tender(tender_id)
+
+                    if matches_topic(tender_data, topic, router):
+                        filename = tender_filename(tender_data)
+                        representative = dedup.add(tender_id, build_tender_text(tender_data))
+                        change = None
+                        if store is not None:
+                            change = store.upsert_tender(tender_data, topic=topic, file=filename,
+                                                         cluster_id=representative)
+                        # Only a new or changed version is written, reported and counted toward the quota
+                        if change is not None and change["status"] not in (NEW, AMENDED):
+                            metrics.incr("feed.unchanged")
+                            print(f"⏭️ Already stored: {filename}")
+                        else:
+                            save_tender(tender_data)
+                            downloaded.append({
+                                "id": tender_id,
+                                "title": tender_data.get("title", "Без назви"),
+                                "date": tender_data.get("dateModified", ""),
+                                "budget": tender_data.get("value", {}).get("amount", 0),
+                                "file": filename,
+                                "duplicate_of": representative if representative != tender_id else None,
+                                "changes": change["categories"] if change and change["status"] != NEW else None
+                            })
+                            print(f"✅ Saved: {filename}")
+
+                            if len(downloaded) >= total_to_download:
+                                break
 
                     checked += 1
-                    time.sleep(RATE_LIMIT_DELAY)
+                    if progress:
+                        progress(len(downloaded) / total_to_download,
+                                 f"Checked {checked} tenders, saved {len(downloaded)}")
+                    with metrics.span("rate_limit.sleep"):
+                        time.sleep(RATE_LIMIT_DELAY)
 
                 except Exception as e:
                     print(f"⚠️ Error for {tender_id}: {e}")
@@ -100,5 +192,7 @@ def download_prozorro_tenders(topic="Construction", total_to_download=10, days_b
             print(f"❌ API error: {e}")
             break
 
+    dedup.save()
+    metrics.flush()
     print(f"\n💾 Total downloaded tenders: {len(downloaded)} for topic: {topic}")
     return downloaded
\ No newline at end of file
@@ -0,0 +1,87 @@
+# evaluation.py
+import re
+from datetime import datetime
+from core.market_data import tender_keys
+
+# Defaults used when no company profile is supplied (same as the Streamlit session defaults)
+DEFAULT_COMPANY_RESOURCES = {
+    "workers": 10,
+    "engineers": 2,
+    "vehicles": 3,
+    "bid_capacity_days": 20,
+    "current_projects": []
+}
+
+
+# Evaluation inputs derived from Claude's analysis
+def extract_resources(text):
+    resources = {"workers": 0, "engineers": 0, "vehicles": 0}
+    patterns = {
+        "workers": r"(\d+)\s*(workers|laborers|people)",
+        "engineers": r"(\d+)\s*(engineers)",
+        "vehicles": r"(\d+)\s*(vehicles|trucks|cars)"
+    }
+    for key, pattern in patterns.items():
+        found = re.search(pattern, text, re.IGNORECASE)
+        if found:
+            resources[key] = int(found.group(1))
+    return resources
+
+def estimate_complexity(text):
+    text = text.lower()
+    if any(w in text for w in ["automation", "bim", "hvac", "deep foundation"]): return 8
+    if any(w in text for w in ["roof", "paving", "electrical"]): return 5
+    if any(w in text for w in ["painting", "doors"]): return 3
+    return 4
+
+def tender_timeline(tender=None):
+    """
+    Planned start and duration of the work from the ProZorro JSON
+
+    Uses the contract period, else the items' delivery dates; work starts no
+    earlier than the bid deadline (or today). Without any dates: 90 days from today.
+    """
+    tender = tender or {}
+    contract = tender.get("contractPeriod") or {}
+    periods = [contract] if contract.get("endDate") else [i.get("deliveryDate") or {} for i in tender.get("items") or []]
+    starts = [p["startDate"][:10] for p in periods if p.get("startDate")]
+    ends = [p["endDate"][:10] for p in periods if p.get("endDate")]
+    deadline = ((tender.get("tenderPeriod") or {}).get("endDate") or "")[:10]
+    start = max([datetime.now().date().isoformat(), deadline, min(starts) if starts else ""])
+    try:
+        duration = (datetime.fromisoformat(max(ends)) - datetime.fromisoformat(start)).days if ends else 90
+    except ValueError:
+        duration = 90
+    return {"duration_days": duration if duration > 0 else 90, "start_date": start}
+
+def safe_budget(budget_raw):
+    """Leading amount of a budget string ("5 000 000 UAH for 2025" -> 5000000.0), same pattern as extract_budget_values"""
+    match = re.match(r'\s*[£€$]?([\d,\s]+(?:\.\d+)?)', str(budget_raw or ""))
+    try:
+        return float(re.sub(r'[,\s]', '', match.group(1)))
+    except (AttributeError, ValueError):
+        return 0.0
+
+def build_evaluation_tender(tender_data, estimated_cost=0, tender=None):
+    """
+    Build the ProfitabilityAnalyzer input from a Claude analysis result
+
+    With the ProZorro tender JSON the input also carries its CPV code, region
+    and issuer EDRPOU, so pricing and competition come from market aggregates
+    (core/market_data.py) instead of the default 3 competitors.
+    """
+    evaluation = {
+        "title": tender_data.get("title", ""),
+        "budget": safe_budget(tender_data.get("budget", "0")),
+        "resource_requirements": extract_resources(tender_data.get("resource_requirements", "")),
+        "estimated_cost": estimated_cost,
+        "timeline": tender_timeline(tender),
+        "complexity": estimate_complexity(tender_data.get("technical_specs", "")),
+        "payment_terms": tender_data.get("payment_terms", "standard").lower(),
+        "has_penalties": False,
+        "competitors": 3,
+        "required_docs": tender_data.get("required_documents", [])
+    }
+    if tender:
+        evaluation.update(tender_keys(tender))
+    return evaluation
@@ -0,0 +1,204 @@
+# excel.py
+import json
+from io import BytesIO
+
+from core import metrics
+
+# openpyxl is imported inside the functions: it costs ~0.25 s and is only needed on export
+
+COLUMNS = [
+    "Title", "Issuer", "Deadline", "Budget", "Location",
+    "Project Type", "Required Documents", "PC AVK5 Required",
+    "Technical Specifications", "Payment Terms", "Resource Requirements",
+    "Timeline Feasibility", "Profitability Assessment", "Filename", "CPV"
+]
+COLUMN_WIDTHS = [40, 30, 15, 15, 20, 25, 40, 15, 50, 30, 40, 20, 20, 30, 12]
+
+
+def format_excel(ws):
+    """Write the styled header row and column widths; returns (ws, columns)"""
+    from openpyxl.styles import Alignment, Border, Font, Side
+    from openpyxl.utils import get_column_letter
+
+    header_font = Font(bold=True, size=11)
+    header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    thin_border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+    for col_num, (column_title, width) in enumerate(zip(COLUMNS, COLUMN_WIDTHS), 1):
+        cell = ws.cell(row=1, column=col_num, value=column_title)
+        cell.font = header_font
+        cell.alignment = header_alignment
+        cell.border = thin_border
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+
+    return ws, COLUMNS
+
+
+def analysis_row(res, filename=None):
+    """Cell values for one Claude analysis, in COLUMNS order"""
+    documents = res.get("required_documents", [])
+    return [
+        res.get("title", "N/A"),
+        res.get("issuer", "N/A"),
+        res.get("deadline", "N/A"),
+        res.get("budget", "N/A"),
+        res.get("location", "N/A"),
+        res.get("project_type", "N/A"),
+        ", ".join(documents) if isinstance(documents, list) else documents,
+        "Yes" if res.get("avk5_required", False) else "No",
+        res.get("technical_specs", "N/A"),
+        res.get("payment_terms", "N/A"),
+        res.get("resource_requirements", "N/A"),
+        res.get("timeline_feasibility", "N/A"),
+        res.get("profitability", "N/A"),
+        filename or res.get("Filename", "N/A"),
+        res.get("cpv", "")
+    ]
+
+
+def write_row(ws, row_idx, values):
+    from openpyxl.styles import Alignment, Border, Side
+
+    border = Border(left=Side(style='thin'), right=Side(style='thin'), bottom=Side(style='thin'))
+    for col_idx, value in enumerate(values, 1):
+        cell = ws.cell(row=row_idx, column=col_idx, value=value)
+        cell.alignment = Alignment(wrap_text=True, vertical='top')
+        cell.border = border
+
+
+def new_analysis_workbook():
+    """Workbook with a formatted "Tender Analysis" sheet; returns (wb, ws)"""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    if ws is None:
+        ws = wb.create_sheet("Tender Analysis")
+    else:
+        ws.title = "Tender Analysis"
+    format_excel(ws)
+    return wb, ws
+
+
+@metrics.timed("excel.analysis")
+def build_analysis_workbook(results):
+    """Excel export of analysis results as an in-memory .xlsx buffer"""
+    wb, ws = new_analysis_workbook()
+    for row_idx, res in enumerate(results, 2):
+        write_row(ws, row_idx, analysis_row(res))
+    buf = BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return buf
+
+
+@metrics.timed("excel.materials")
+def build_materials_workbook(materials, total):
+    """AVK5 custom material costs as an in-memory .xlsx buffer"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook()
+    ws = wb.active
+    if ws is None:
+        ws = wb.create_sheet(title="AVK5 Custom Materials")
+    else:
+        ws.title = "AVK5 Custom Materials"
+    headers = ["Category", "Specification", "Quantity", "Unit Price", "Total"]
+    for col_num, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col_num, value=header)
+        cell.font = Font(bold=True)
+        ws.column_dimensions[get_column_letter(col_num)].width = 20
+    for i, m in enumerate(materials, 2):
+        ws.cell(row=i, column=1, value=m["category"])
+        ws.cell(row=i, column=2, value=m["specification"])
+        ws.cell(row=i, column=3, value=m["quantity"])
+        ws.cell(row=i, column=4, value=m["unit_price"])
+        ws.cell(row=i, column=5, value=m["total"])
+    ws.cell(row=len(materials) + 2, column=4, value="Total:")
+    ws.cell(row=len(materials) + 2, column=5, value=total)
+
+    buf = BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return buf
+
+
+def _cell(value):
+    """Excel-safe cell value: nested lists/dicts become JSON text"""
+    return json.dumps(value, ensure_ascii=False, default=str) if isinstance(value, (list, dict)) else value
+
+
+@metrics.timed("excel.evaluation")
+def build_evaluation_workbook(tender, analysis):
+    """Tender evaluation report (inputs, financials, risks, resource gaps) as an .xlsx buffer"""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    if ws is None:
+        ws = wb.create_sheet(title="Tender Evaluation")
+    else:
+        ws.title = "Tender Evaluation"
+
+    ws.append(["Tender Title", tender["title"]])
+    ws.append(["Budget", tender["budget"]])
+    ws.append(["Duration (days)", tender["timeline"]["duration_days"]])
+    ws.append(["Complexity", tender["complexity"]])
+    ws.append(["Payment Terms", tender["payment_terms"]])
+    ws.append(["Has Penalties", tender["has_penalties"]])
+    ws.append(["Competitors", (analysis.get("market") or {}).get("bidders") or tender["competitors"]])
+    ws.append(["ROI Score", analysis["roi_score"]])
+    ws.append(["Profit Margin", analysis["profit_margin"]])
+    ws.append(["Recommendation", analysis["recommendation"]])
+    ws.append([])
+
+    # Financial Breakdown
+    ws.append(["📈 Financial Breakdown"])
+    ws.append(["Tender Value", analysis["tender_value"]])
+    ws.append(["Bid Price", analysis.get("bid_price", analysis["tender_value"])])
+    ws.append(["Estimated Cost", analysis["estimated_cost"]])
+    ws.append(["Gross Profit", analysis["gross_profit"]])
+    ws.append([])
+
+    # Cost Breakdown
+    ws.append(["📦 Cost Breakdown"])
+    ws.append(["Category", "Amount (UAH)"])
+    for cat, val in analysis.get("cost_breakdown", {}).items():
+        ws.append([cat, _cell(val)])
+    ws.append([])
+
+    # Timeline Feasibility
+    ws.append(["⏱️ Timeline Feasibility"])
+    for key, val in analysis.get("timeline_feasibility", {}).items():
+        ws.append([key, _cell(val)])
+    ws.append([])
+
+    # Risk Factors
+    ws.append(["⚠️ Risk Factors"])
+    for risk, val in analysis.get("risk_factors", {}).items():
+        ws.append([risk, _cell(val)])
+    ws.append([])
+
+    # Resource Gaps
+    ws.append(["Resource", "Required", "Available", "Gap", "Gap %"])
+    for resource, data in analysis["resource_gap"]["gap_analysis"].items():
+        ws.append([
+            resource,
+            data["required"],
+            data["available"],
+            data["gap"],
+            f"{data['gap_percent']*100:.1f}%"
+        ])
+
+    # Export
+    buf = BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return buf
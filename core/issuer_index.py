@@ -0,0 +1,232 @@
+# issuer_index.py
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.tender_store import STORE_PATH, connect
+
+MIN_TENDERS = 3                     # tenders an issuer needs before its record counts in scoring
+FINAL_STATUSES = {"complete", "cancelled", "unsuccessful"}
+# buyer_risk = weighted cancellation rate, complaints per tender and lead time (LEAD_DAYS_CAP → 1)
+RISK_WEIGHTS = {"cancellation_rate": 0.5, "complaint_rate": 0.3, "lead_time": 0.2}
+LEAD_DAYS_CAP = 120
+PRIOR_FINISHED = 4                  # pseudo-tenders without cancellation, so 1 of 1 cancelled isn't 100%
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issuer_tenders (
+    tender_id TEXT PRIMARY KEY,
+    issuer_id TEXT,
+    date_modified TEXT,
+    finished INTEGER,
+    cancelled INTEGER,
+    complaints INTEGER,
+    contract_ratio REAL,
+    lead_days REAL
+);
+CREATE TABLE IF NOT EXISTS issuers (
+    issuer_id TEXT PRIMARY KEY,
+    name TEXT,
+    tenders INTEGER DEFAULT 0,
+    finished INTEGER DEFAULT 0,
+    cancelled INTEGER DEFAULT 0,
+    complaints INTEGER DEFAULT 0,
+    ratio_sum REAL DEFAULT 0,
+    ratio_count INTEGER DEFAULT 0,
+    lead_sum REAL DEFAULT 0,
+    lead_count INTEGER DEFAULT 0,
+    updated_at TEXT
+);
+"""
+
+
+def _days_between(start, end):
+    try:
+        return (datetime.fromisoformat(str(end)[:19]) - datetime.fromisoformat(str(start)[:19])).total_seconds() / 86400
+    except ValueError:
+        return None
+
+
+def tender_facts(tender):
+    """
+    What one tender version contributes to its issuer's record
+
+    Complaints are counted on the tender, its awards, qualifications and
+    cancellations; the contract ratio is signed contract value over expected
+    value; lead time runs from the tender start to the first contract signature.
+    """
+    entity = tender.get("procuringEntity") or {}
+    contracts = [c for c in tender.get("contracts") or [] if c.get("status") in ("active", "terminated")]
+    budget = (tender.get("value") or {}).get("amount")
+    contracted = sum((c.get("value") or {}).get("amount") or 0 for c in contracts)
+    signed = sorted(c.get("dateSigned") or c.get("date") for c in contracts if c.get("dateSigned") or c.get("date"))
+    start = (tender.get("tenderPeriod") or {}).get("startDate") or tender.get("date")
+    lead_days = _days_between(start, signed[0]) if signed and start else None
+    complaints = len(tender.get("complaints") or []) + sum(
+        len(entry.get("complaints") or [])
+        for section in ("awards", "qualifications", "cancellations") for entry in tender.get(section) or []
+    )
+    return {
+        "issuer_id": (entity.get("identifier") or {}).get("id") or "",
+        "name": entity.get("name", ""),
+        "date_modified": tender.get("dateModified", ""),
+        "finished": int(tender.get("status") in FINAL_STATUSES),
+        "cancelled": int(tender.get("status") == "cancelled"),
+        "complaints": complaints,
+        "contract_ratio": contracted / budget if contracted and budget else None,
+        "lead_days": lead_days if lead_days is not None and lead_days >= 0 else None,
+    }
+
+
+def buyer_risk(stats):
+    """0 (reliable) … 1 (cancels, draws complaints, slow to sign) from an issuer record"""
+    lead = min(stats["lead_days"] or 0, LEAD_DAYS_CAP) / LEAD_DAYS_CAP
+    cancellation = stats["cancelled"] / (stats["finished"] + PRIOR_FINISHED)
+    return (
+        RISK_WEIGHTS["cancellation_rate"] * cancellation
+        + RISK_WEIGHTS["complaint_rate"] * min(stats["complaint_rate"], 1.0)
+        + RISK_WEIGHTS["lead_time"] * lead
+    )
+
+
+class IssuerIndex:
+    """
+    Running totals per procuringEntity EDRPOU, kept in the tender store's SQLite file
+
+    issuer_tenders remembers what each tender last contributed, so a new
+    version of a tender swaps its old contribution for the new one: the
+    aggregates stay exact as the feed re-delivers tenders, at two row writes
+    per tender. Lookups are primary-key reads.
+    """
+
+    def __init__(self, db_path=STORE_PATH, conn=None):
+        self.db_path = db_path
+        self.conn = conn or connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        """IMMEDIATE so concurrent fetch threads queue on the write lock; joins an open transaction"""
+        if self.conn.in_transaction:
+            yield self
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    # ---------------------- Updates ----------------------
+    def _apply(self, issuer_id, facts, sign, name=None):
+        ratio, lead = facts["contract_ratio"], facts["lead_days"]
+        self.conn.execute(
+            """
+            INSERT INTO issuers (issuer_id, name, tenders, finished, cancelled, complaints,
+                                 ratio_sum, ratio_count, lead_sum, lead_count, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(issuer_id) DO UPDATE SET
+                name=COALESCE(excluded.name, issuers.name),
+                tenders=issuers.tenders + excluded.tenders,
+                finished=issuers.finished + excluded.finished,
+                cancelled=issuers.cancelled + excluded.cancelled,
+                complaints=issuers.complaints + excluded.complaints,
+                ratio_sum=issuers.ratio_sum + excluded.ratio_sum,
+                ratio_count=issuers.ratio_count + excluded.ratio_count,
+                lead_sum=issuers.lead_sum + excluded.lead_sum,
+                lead_count=issuers.lead_count + excluded.lead_count,
+                updated_at=excluded.updated_at
+            """,
+            (issuer_id, name, sign, sign * facts["finished"], sign * facts["cancelled"], sign * facts["complaints"],
+             sign * (ratio or 0), sign * (ratio is not None), sign * (lead or 0), sign * (lead is not None),
+             datetime.now().isoformat())
+        )
+
+    def _update(self, tender):
+        facts = tender_facts(tender)
+        if not facts["issuer_id"]:
+            return False
+        old = self.conn.execute("SELECT * FROM issuer_tenders WHERE tender_id = ?", (tender["id"],)).fetchone()
+        if old is not None:
+            if (old["date_modified"] or "") >= facts["date_modified"]:
+                return False  # this version (or a newer one) is already counted
+            self._apply(old["issuer_id"], dict(old), -1)
+        self._apply(facts["issuer_id"], facts, 1, facts["name"] or None)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO issuer_tenders (tender_id, issuer_id, date_modified, finished, cancelled, complaints, "
+            "contract_ratio, lead_days) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (tender["id"], facts["issuer_id"], facts["date_modified"], facts["finished"], facts["cancelled"],
+             facts["complaints"], facts["contract_ratio"], facts["lead_days"])
+        )
+        return True
+
+    def update(self, tender):
+        """Fold one tender version into its issuer's totals; False if unchanged or without an EDRPOU"""
+        with self.transaction():
+            return self._update(tender)
+
+    def update_many(self, tenders):
+        """Fold a batch of tenders in one transaction; returns how many changed the totals"""
+        with self.transaction():
+            return sum(self._update(t) for t in tenders)
+
+    def version(self):
+        """(latest update, issuer count): changes only when the issuer totals do"""
+        row = self.conn.execute("SELECT MAX(updated_at), COUNT(*) FROM issuers").fetchone()
+        return tuple(row)
+
+    # ---------------------- Lookups ----------------------
+    def _stats(self, row):
+        stats = {
+            "issuer_id": row["issuer_id"],
+            "name": row["name"],
+            "tenders": row["tenders"],
+            "finished": row["finished"],
+            "cancelled": row["cancelled"],
+            "cancellation_rate": row["cancelled"] / row["finished"] if row["finished"] else None,
+            "complaints": row["complaints"],
+            "complaint_rate": row["complaints"] / row["tenders"] if row["tenders"] else 0.0,
+            "contract_ratio": row["ratio_sum"] / row["ratio_count"] if row["ratio_count"] else None,
+            "lead_days": row["lead_sum"] / row["lead_count"] if row["lead_count"] else None,
+        }
+        stats["buyer_risk"] = buyer_risk(stats)
+        return stats
+
+    def get(self, issuer_id, min_tenders=MIN_TENDERS):
+        """Issuer record (rates, averages and buyer_risk), or None when it has fewer than min_tenders"""
+        row = self.conn.execute("SELECT * FROM issuers WHERE issuer_id = ?", (str(issuer_id or ""),)).fetchone()
+        return self._stats(row) if row and row["tenders"] >= min_tenders else None
+
+    def get_many(self, issuer_ids, min_tenders=MIN_TENDERS):
+        """{issuer_id: record} for the issuers with at least min_tenders tenders"""
+        ids = sorted({str(i) for i in issuer_ids if i})
+        found = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT * FROM issuers WHERE tenders >= ? AND issuer_id IN ({','.join('?' * len(chunk))})",
+                [min_tenders, *chunk]
+            )
+            found.update((r["issuer_id"], self._stats(r)) for r in rows)
+        return found
+
+    def riskiest(self, limit=10, min_tenders=MIN_TENDERS):
+        """Issuers with the highest buyer_risk (for the CLI report)"""
+        rows = self.conn.execute("SELECT * FROM issuers WHERE tenders >= ?", (min_tenders,))
+        return sorted((self._stats(r) for r in rows), key=lambda s: -s["buyer_risk"])[:limit]
+
+
+_default = {}
+_default_lock = threading.Lock()
+
+
+def default_index(db_path=STORE_PATH):
+    """Shared IssuerIndex over the tender store, or None before any tender has been stored"""
+    with _default_lock:
+        if db_path not in _default:
+            if not os.path.exists(db_path):
+                return None
+            _default[db_path] = IssuerIndex(db_path)
+        return _default[db_path]
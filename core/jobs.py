@@ -0,0 +1,362 @@
+# jobs.py
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+import traceback
+import uuid
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import metrics
+from core.priority_queue import AGING_DAYS_PER_HOUR, NORMAL, deadline_of, priority_key, slack_days
+from core.tender_store import STORE_PATH, TenderStore, connect
+
+TENDER_DIR = "/opt/render/project/src/tenders"
+POLL_INTERVAL = 1.0
+HEARTBEAT_TIMEOUT = 300  # a worker silent this long is presumed dead and its jobs are requeued
+MAX_ATTEMPTS = 3
+RATE_LIMIT_DELAY = 1.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    priority INTEGER NOT NULL DEFAULT 0,
+    tier INTEGER NOT NULL DEFAULT 1,
+    rank REAL NOT NULL DEFAULT 0,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    batch TEXT,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    pid INTEGER,
+    heartbeat REAL
+);
+"""
+INDEXES = """
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority DESC, tier, rank, id);
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch);
+DROP INDEX IF EXISTS jobs_queue;
+"""
+
+
+class JobQueue:
+    """SQLite-backed job queue shared by the Streamlit app and worker processes"""
+
+    def __init__(self, db_path=STORE_PATH):
+        self.db_path = db_path
+        self.conn = connect(db_path)
+        self.conn.executescript(SCHEMA)
+        columns = {r["name"] for r in self.conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in (("tier", f"INTEGER NOT NULL DEFAULT {NORMAL}"), ("rank", "REAL NOT NULL DEFAULT 0")):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        self.conn.executescript(INDEXES)
+
+    @staticmethod
+    def _row(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    # ---------------------- Producer side ----------------------
+    @staticmethod
+    def _rank(payload, now):
+        """
+        (tier, rank) of a job, lowest first within a priority, fixed at submit time
+
+        The tender deadline (payload "deadline", optional "relevance") is ranked
+        as in priority_queue; jobs without one are served in submission order
+        ahead of non-urgent tender work. As in DeadlineQueue, waiting ages every
+        non-urgent job forward at the same rate, so adding aging × submit time
+        once keeps the stored ranks comparable and claim() a single indexed lookup.
+        """
+        if payload.get("deadline"):
+            tier, score = priority_key(payload["deadline"], payload.get("relevance"), now)
+        else:
+            tier, score = NORMAL, 0.0
+        if tier == NORMAL:
+            score += AGING_DAYS_PER_HOUR * now / 3600
+        return tier, score
+
+    def submit(self, kind, payload=None, priority=0, batch=None):
+        """Queue a job and return its id (higher priority runs first)"""
+        payload = payload or {}
+        tier, rank = self._rank(payload, time.time())
+        cur = self.conn.execute(
+            "INSERT INTO jobs (kind, payload, priority, tier, rank, batch, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (kind, json.dumps(payload, ensure_ascii=False), priority, tier, rank, batch, datetime.now().isoformat())
+        )
+        return cur.lastrowid
+
+    def submit_batch(self, kind, payloads, priority=0):
+        """Queue one job per payload under a shared batch id; returns the batch id"""
+        batch = uuid.uuid4().hex[:12]
+        for payload in payloads:
+            self.submit(kind, payload, priority, batch)
+        return batch
+
+    def get(self, job_id):
+        return self._row(self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def batch(self, batch):
+        rows = self.conn.execute("SELECT * FROM jobs WHERE batch = ? ORDER BY id", (batch,)).fetchall()
+        return [self._row(r) for r in rows]
+
+    def recent(self, limit=20):
+        rows = self.conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row(r) for r in rows]
+
+    def cancel(self, job_id):
+        """Cancel a job that has not started yet"""
+        self.conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+            (datetime.now().isoformat(), job_id)
+        )
+
+    # ---------------------- Worker side ----------------------
+    def claim(self, worker_id, kinds=None):
+        """
+        Atomically take the most pressing queued job (priority, then tier and rank, see _rank)
+
+        BEGIN IMMEDIATE takes the write lock up front, so two workers can never
+        claim the same row; the pick is one lookup on the jobs_claim index.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            query = "SELECT id FROM jobs WHERE status = 'queued'"
+            params = []
+            if kinds:
+                query += f" AND kind IN ({','.join('?' * len(kinds))})"
+                params.extend(kinds)
+            query += " ORDER BY priority DESC, tier, rank, id LIMIT 1"
+            row = self.conn.execute(query, params).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                """UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1,
+                   started_at = ?, progress = 0, message = NULL WHERE id = ?""",
+                (worker_id, datetime.now().isoformat(), row["id"])
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def progress(self, job_id, fraction, message=None):
+        self.conn.execute(
+            "UPDATE jobs SET progress = ?, message = ? WHERE id = ?",
+            (max(0.0, min(1.0, float(fraction))), message, job_id)
+        )
+
+    def complete(self, job_id, result=None):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'done', progress = 1, result = ?, finished_at = ? WHERE id = ?",
+            (json.dumps(result, ensure_ascii=False, default=str), datetime.now().isoformat(), job_id)
+        )
+
+    def fail(self, job_id, error):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            (str(error), datetime.now().isoformat(), job_id)
+        )
+
+    def heartbeat(self, worker_id):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO workers (id, pid, heartbeat) VALUES (?, ?, ?)",
+            (worker_id, os.getpid(), time.time())
+        )
+
+    def live_workers(self, timeout=HEARTBEAT_TIMEOUT):
+        rows = self.conn.execute("SELECT id FROM workers WHERE heartbeat > ?", (time.time() - timeout,)).fetchall()
+        return [r["id"] for r in rows]
+
+    def requeue_stale(self, timeout=HEARTBEAT_TIMEOUT):
+        """Put running jobs of dead workers back in the queue (or fail them after MAX_ATTEMPTS)"""
+        cutoff = time.time() - timeout
+        stale = "worker NOT IN (SELECT id FROM workers WHERE heartbeat > ?)"
+        self.conn.execute(
+            f"UPDATE jobs SET status = 'failed', error = 'worker died', finished_at = ? "
+            f"WHERE status = 'running' AND attempts >= ? AND {stale}",
+            (datetime.now().isoformat(), MAX_ATTEMPTS, cutoff)
+        )
+        self.conn.execute(
+            f"UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND {stale}",
+            (cutoff,)
+        )
+
+
+# ---------------------- Job handlers ----------------------
+def run_download(payload, progress, store):
+    from core.downloader import download_prozorro_tenders
+
+    return download_prozorro_tenders(
+        topic=payload.get("topic", "Construction"),
+        total_to_download=payload.get("count", 10),
+        days_back=payload.get("days_back", 7),
+        progress=progress,
+        store=store
+    )
+
+
+def run_pdf_extraction(payload, progress, store):
+    from core.data_extractor import extract_pdf
+
+    progress(0.1, f"Extracting {os.path.basename(payload['path'])}")
+    return extract_pdf(payload["path"])
+
+
+def load_tender(tender_id, store):
+    tender = store.get_tender(tender_id)
+    if tender is None:
+        path = os.path.join(TENDER_DIR, f"ProZorro_{tender_id}.json")
+        with open(path, "r", encoding="utf-8") as f:
+            tender = json.load(f)
+        store.upsert_tender(tender, file=os.path.basename(path))
+    return tender
+
+
+def run_analysis(payload, progress, store):
+    """
+    Analyze one near-duplicate cluster: Claude sees the representative once and
+    every member tender gets the same analysis row in the store.
+
+    A cached analysis is reused unless the representative was amended since it
+    was saved: criteria or scope changes send it back to Claude, deadline and
+    budget changes are patched in (as in TenderPipeline).
+    """
+    from core.amendments import plan_reprocessing, refresh_analysis
+    from core.claude_client import analyze_text, get_client, tender_content
+    from core.cpv import primary_code
+    from core.dedup import DuplicateIndex
+
+    cluster_id = payload["cluster_id"]
+    members = payload.get("tender_ids") or [cluster_id]
+    dedup = DuplicateIndex(load=False)  # cluster_id is the representative: its analysis is looked up by key
+
+    analysis = dedup.cached_analysis(cluster_id)
+    analyzed_at = store.analyzed_at(cluster_id)
+    changes = store.amendments.categories_since(cluster_id, analyzed_at) if analysis and analyzed_at else []
+    if changes:
+        metrics.incr("amendments.detected")
+        if "analyze" in plan_reprocessing(changes):
+            analysis = None
+        else:
+            analysis = refresh_analysis(analysis, load_tender(cluster_id, store))
+            dedup.store_analysis(cluster_id, analysis)
+    if analysis is None:
+        tender = load_tender(cluster_id, store)
+        slack = slack_days(deadline_of(tender) or payload.get("deadline"))
+        if slack is not None and slack < 0:
+            raise ValueError(f"Submission deadline of {cluster_id} has passed; not sent to Claude")
+        progress(0.2, f"Analyzing {cluster_id}")
+        client = get_client()
+        if client is None:
+            raise RuntimeError("Claude API key not found in .env file")
+        analysis = analyze_text(tender_content(tender), client)
+        if not analysis:
+            raise ValueError("Claude returned invalid JSON.")
+        dedup.store_analysis(cluster_id, analysis)
+        time.sleep(RATE_LIMIT_DELAY)
+
+    results = []
+    for tid in members:
+        result = {**analysis, "tender_id": tid, "Filename": f"{tid}.txt", "cluster_id": cluster_id,
+                  "cpv": primary_code(store.get_tender(tid))}
+        if tid != cluster_id:
+            result["duplicate_of"] = cluster_id
+        store.save_analysis(tid, result, cluster_id, result.get("duplicate_of"))
+        results.append(result)
+    return results
+
+
+HANDLERS = {
+    "download": run_download,
+    "extract_pdf": run_pdf_extraction,
+    "analyze": run_analysis,
+}
+
+
+# ---------------------- Workers ----------------------
+def run_worker(db_path=STORE_PATH, worker_id=None, poll_interval=POLL_INTERVAL, max_jobs=None):
+    """Claim and run jobs until max_jobs have been processed (forever by default)"""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    queue = JobQueue(db_path)
+    store = TenderStore(db_path)
+    processed = 0
+    print(f"👷 Worker {worker_id} started")
+
+    while max_jobs is None or processed < max_jobs:
+        queue.heartbeat(worker_id)
+        queue.requeue_stale()
+        job = queue.claim(worker_id)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+
+        def progress(fraction, message=None, job_id=job["id"]):
+            queue.progress(job_id, fraction, message)
+            queue.heartbeat(worker_id)
+
+        try:
+            handler = HANDLERS[job["kind"]]
+            with metrics.span(f"job.{job['kind']}", job_id=job["id"]):
+                result = handler(job["payload"], progress, store)
+            queue.complete(job["id"], result)
+            metrics.incr("jobs.completed")
+            print(f"✅ Job {job['id']} ({job['kind']}) done")
+        except Exception as e:
+            traceback.print_exc()
+            queue.fail(job["id"], e)
+            metrics.incr("jobs.failed")
+            print(f"❌ Job {job['id']} ({job['kind']}) failed: {e}")
+        processed += 1
+        # Worker processes are daemons and may never reach atexit, so publish after every job
+        metrics.flush()
+        metrics.write_prometheus(source=f"worker-{os.getpid()}")
+
+
+def start_workers(count=None, db_path=STORE_PATH):
+    """
+    Spawn worker processes (one per CPU core by default)
+
+    The spawn start method is used so workers never inherit the Streamlit
+    server's threads or open SQLite handles.
+    """
+    count = count or os.cpu_count() or 1
+    ctx = multiprocessing.get_context("spawn")
+    processes = []
+    for _ in range(count):
+        proc = ctx.Process(target=run_worker, args=(db_path,), daemon=True)
+        proc.start()
+        processes.append(proc)
+    return processes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background tender job workers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--db", default=STORE_PATH)
+    args = parser.parse_args()
+
+    workers = start_workers(args.workers, args.db)
+    for proc in workers:
+        proc.join()
@@ -0,0 +1,239 @@
+# market_data.py
+import json
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+MARKET_DIR = "/opt/render/project/src/data/market"
+AWARDS_DIR = "awards"                  # append-only Parquet parts, one per ingest
+AGGREGATES_FILE = "aggregates.parquet"
+COMPACT_PARTS = 20                     # parts merged into one on rebuild beyond this
+MIN_TENDERS = 5                        # awards a group needs before its numbers are trusted
+TOP_SUPPLIERS = 5
+
+AWARD_COLUMNS = ["tender_id", "lot_id", "date", "cpv", "region", "issuer_id", "issuer_name", "budget",
+                 "bidders", "award_value", "contract_value", "discount", "supplier_id", "supplier_name"]
+
+# Aggregation levels, most specific first: (name, key columns). No catch-all level:
+# a tender with no comparable history gets no market stats rather than the global average.
+LEVELS = [
+    ("issuer_cpv2", ["issuer_id", "cpv2"]),
+    ("cpv4_region", ["cpv4", "region"]),
+    ("issuer", ["issuer_id"]),
+    ("cpv4", ["cpv4"]),
+    ("cpv2", ["cpv2"]),
+]
+
+
+def tender_keys(tender):
+    """CPV code, region and issuer EDRPOU of a ProZorro tender"""
+    items = tender.get("items") or []
+    entity = tender.get("procuringEntity") or {}
+    return {
+        "cpv": ((items[0].get("classification") or {}).get("id") or "").split("-")[0] if items else "",
+        "region": (entity.get("address") or {}).get("region") or "",
+        "issuer_id": (entity.get("identifier") or {}).get("id") or "",
+    }
+
+
+def award_rows(tender):
+    """
+    One row per active award of a tender (none while it is still open)
+
+    Discount is 1 - award / expected value, against the lot's value when the
+    award belongs to a lot.
+    """
+    awards = [a for a in tender.get("awards") or [] if a.get("status") == "active"]
+    if not awards:
+        return []
+    keys = tender_keys(tender)
+    entity = tender.get("procuringEntity") or {}
+    lot_values = {lot["id"]: (lot.get("value") or {}).get("amount") for lot in tender.get("lots") or []}
+    contracts = {c.get("awardID"): (c.get("value") or {}).get("amount")
+                 for c in tender.get("contracts") or [] if c.get("status") in ("active", "terminated")}
+    bids = tender.get("bids") or []
+    rows = []
+    for award in awards:
+        lot_id = award.get("lotID") or ""
+        budget = lot_values.get(lot_id) if lot_id else (tender.get("value") or {}).get("amount")
+        lot_bids = [b for b in bids if not lot_id or lot_id in {v.get("relatedLot") for v in b.get("lotValues") or []}]
+        value = (award.get("value") or {}).get("amount")
+        supplier = (award.get("suppliers") or [{}])[0]
+        rows.append({
+            **keys,
+            "tender_id": tender["id"],
+            "lot_id": lot_id,
+            "date": award.get("date") or tender.get("dateModified", ""),
+            "issuer_name": entity.get("name", ""),
+            "budget": budget,
+            "bidders": len(lot_bids) if bids else tender.get("numberOfBids"),
+            "award_value": value,
+            "contract_value": contracts.get(award.get("id")),
+            "discount": 1 - value / budget if value and budget else None,
+            "supplier_id": (supplier.get("identifier") or {}).get("id", ""),
+            "supplier_name": supplier.get("name", ""),
+        })
+    return rows
+
+
+class MarketData:
+    """
+    Award history as Parquet plus per-group aggregates
+
+    Each ingest appends a Parquet part under awards/; rebuild() reads the
+    parts once, keeps the latest row per (tender, lot) and writes the
+    aggregates the analyzers look up: typical discount to budget, bidder
+    count and winning suppliers per issuer, CPV and region.
+    """
+
+    def __init__(self, market_dir=MARKET_DIR):
+        self.market_dir = market_dir
+        self.awards_dir = os.path.join(market_dir, AWARDS_DIR)
+        self.aggregates_path = os.path.join(market_dir, AGGREGATES_FILE)
+        self._lock = threading.Lock()
+
+    def parts(self):
+        if not os.path.isdir(self.awards_dir):
+            return []
+        return sorted(os.path.join(self.awards_dir, f) for f in os.listdir(self.awards_dir) if f.endswith(".parquet"))
+
+    def append(self, rows):
+        """Write award rows as a new Parquet part; returns its path (None when empty)"""
+        import pandas as pd
+
+        if not rows:
+            return None
+        frame = pd.DataFrame(rows, columns=AWARD_COLUMNS)
+        for column in ("budget", "bidders", "award_value", "contract_value", "discount"):
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").astype("float64")
+        with self._lock:
+            os.makedirs(self.awards_dir, exist_ok=True)
+            path = os.path.join(self.awards_dir, f"part-{time.time_ns()}-{os.getpid()}.parquet")
+            frame.to_parquet(f"{path}.tmp", engine="pyarrow", index=False)
+            os.replace(f"{path}.tmp", path)
+        return path
+
+    def ingest(self, tenders):
+        """Extract and append the awards of completed tenders; returns the number of award rows"""
+        rows = [row for tender in tenders for row in award_rows(tender)]
+        self.append(rows)
+        return len(rows)
+
+    def awards(self):
+        """All award rows, latest version of each (tender, lot)"""
+        import pandas as pd
+
+        parts = self.parts()
+        if not parts:
+            return pd.DataFrame(columns=AWARD_COLUMNS)
+        frame = pd.concat([pd.read_parquet(p, engine="pyarrow") for p in parts], ignore_index=True)
+        return frame.drop_duplicates(["tender_id", "lot_id"], keep="last").reset_index(drop=True)
+
+    def rebuild(self):
+        """Recompute the aggregates (and merge the parts when there are many); returns the aggregate frame"""
+        import pandas as pd
+
+        with self._lock:
+            parts = self.parts()
+            awards = self.awards()
+            if len(parts) > COMPACT_PARTS:
+                merged = os.path.join(self.awards_dir, f"part-{time.time_ns()}-merged.parquet")
+                awards.to_parquet(f"{merged}.tmp", engine="pyarrow", index=False)
+                os.replace(f"{merged}.tmp", merged)
+                for part in parts:
+                    os.remove(part)
+
+            awards = awards.assign(
+                cpv2=awards["cpv"].str[:2], cpv4=awards["cpv"].str[:4],
+                single=(awards["bidders"] == 1).astype(float),
+            )
+            frames = []
+            for level, keys in LEVELS:
+                stats = awards.groupby(keys, dropna=False).agg(
+                    tenders=("tender_id", "nunique"),
+                    median_discount=("discount", "median"),
+                    mean_discount=("discount", "mean"),
+                    median_bidders=("bidders", "median"),
+                    mean_bidders=("bidders", "mean"),
+                    single_bidder_share=("single", "mean"),
+                ).reset_index()
+                winners = (
+                    awards[awards["supplier_name"] != ""]
+                    .groupby(keys + ["supplier_name"], dropna=False).size().rename("wins").reset_index()
+                    .sort_values("wins", ascending=False, kind="stable")
+                    .groupby(keys, dropna=False).head(TOP_SUPPLIERS)
+                )
+                winners["pair"] = [[name, int(wins)] for name, wins in zip(winners["supplier_name"], winners["wins"])]
+                top = winners.groupby(keys, dropna=False)["pair"].agg(
+                    lambda pairs: json.dumps(list(pairs), ensure_ascii=False)
+                ).rename("top_suppliers").reset_index()
+                stats = stats.merge(top, on=keys, how="left")
+                stats["key"] = stats[keys].astype(str).agg("|".join, axis=1)
+                stats["level"] = level
+                frames.append(stats.drop(columns=keys))
+
+            aggregates = pd.concat(frames, ignore_index=True)
+            aggregates["top_suppliers"] = aggregates["top_suppliers"].fillna("[]")
+            os.makedirs(self.market_dir, exist_ok=True)
+            aggregates.to_parquet(f"{self.aggregates_path}.tmp", engine="pyarrow", index=False)
+            os.replace(f"{self.aggregates_path}.tmp", self.aggregates_path)
+        return aggregates
+
+
+class MarketLookup:
+    """Precomputed aggregates as {level: {key: stats}}, answering per tender with the most specific trusted level"""
+
+    def __init__(self, aggregates=None, min_tenders=MIN_TENDERS):
+        self.min_tenders = min_tenders
+        self.levels = {level: {} for level, _ in LEVELS}
+        if aggregates is not None:
+            for row in aggregates.to_dict("records"):
+                if row["level"] in self.levels and row["tenders"] >= min_tenders:  # skips levels since dropped
+                    row = {k: None if isinstance(v, float) and v != v else v for k, v in row.items()}  # NaN → None
+                    row["top_suppliers"] = json.loads(row["top_suppliers"] or "[]")
+                    self.levels[row["level"]][row["key"]] = row
+
+    def __bool__(self):
+        return any(self.levels.values())
+
+    @classmethod
+    def load(cls, market_dir=MARKET_DIR, min_tenders=MIN_TENDERS):
+        import pandas as pd
+
+        path = os.path.join(market_dir, AGGREGATES_FILE)
+        return cls(pd.read_parquet(path, engine="pyarrow") if os.path.exists(path) else None, min_tenders)
+
+    def lookup(self, cpv="", region="", issuer_id=""):
+        """
+        Market stats for a tender
+
+        Returns:
+            dict: level, tenders, median_discount, median_bidders, single_bidder_share,
+            top_suppliers ([name, wins]) — or None when no level has enough awards
+        """
+        cpv = str(cpv or "").split("-")[0]
+        values = {"issuer_id": str(issuer_id or ""), "cpv2": cpv[:2], "cpv4": cpv[:4], "region": str(region or "")}
+        for level, keys in LEVELS:
+            if any(not values[k] for k in keys):
+                continue
+            stats = self.levels[level].get("|".join(values[k] for k in keys))
+            if stats is not None:
+                return stats
+        return None
+
+
+_default = {"mtime": None, "lookup": None}
+_default_lock = threading.Lock()
+
+
+def default_lookup(market_dir=MARKET_DIR):
+    """MarketLookup for the shared market directory, reloaded when the aggregates change"""
+    path = os.path.join(market_dir, AGGREGATES_FILE)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    with _default_lock:
+        if _default["lookup"] is None or _default["mtime"] != (path, mtime):
+            _default["lookup"] = MarketLookup.load(market_dir) if mtime else MarketLookup()
+            _default["mtime"] = (path, mtime)
+        return _default["lookup"]
@@ -0,0 +1,210 @@
+# metrics.py
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+METRICS_DIR = "/opt/render/project/src/data/metrics"
+EVENTS_FILE = "events.jsonl"
+FLUSH_EVERY = 200  # buffered span events written per batch
+FLUSH_INTERVAL = 30  # seconds between flush_if_due() writes
+MAX_EVENTS_BYTES = 20 * 1024 * 1024  # events.jsonl is rotated to events.jsonl.1 past this
+TAIL_BLOCK = 64 * 1024  # summarize_events reads the file backwards in blocks of this size
+
+_lock = threading.Lock()
+_spans = defaultdict(lambda: {"count": 0, "total": 0.0, "min": float("inf"), "max": 0.0})
+_counters = defaultdict(float)
+_events = []
+_last_flush = 0.0
+_metrics_dir = os.getenv("TENDER_METRICS_DIR", METRICS_DIR)
+_enabled = os.getenv("TENDER_METRICS", "1") != "0"
+
+
+def configure(metrics_dir=None, enabled=None):
+    """Change where events/exports are written, or switch the file sink off"""
+    global _metrics_dir, _enabled
+    if metrics_dir is not None:
+        _metrics_dir = metrics_dir
+    if enabled is not None:
+        _enabled = enabled
+
+
+def events_path():
+    return os.path.join(_metrics_dir, EVENTS_FILE)
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block: aggregates count/total/min/max per name and buffers a JSONL event
+
+        with span("http.fetch", tender_id=tid):
+            ...
+    """
+    started = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        elapsed = time.perf_counter() - started
+        with _lock:
+            stats = _spans[name]
+            stats["count"] += 1
+            stats["total"] += elapsed
+            stats["min"] = min(stats["min"], elapsed)
+            stats["max"] = max(stats["max"], elapsed)
+            if _enabled:
+                _events.append({"ts": time.time(), "pid": os.getpid(), "span": name,
+                                "seconds": round(elapsed, 6), **attrs})
+                full = len(_events) >= FLUSH_EVERY
+            else:
+                full = False
+        if full:
+            flush()
+
+
+def timed(name):
+    """Decorator form of span()"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def incr(name, value=1):
+    """Add to a counter (requests, bytes, tokens, cache hits, pages...)"""
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot():
+    """Current in-process aggregates: {"spans": {...}, "counters": {...}}"""
+    with _lock:
+        return {
+            "spans": {k: dict(v) for k, v in _spans.items()},
+            "counters": dict(_counters),
+        }
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _events.clear()
+
+
+def flush():
+    """Append buffered span events, plus a counters record, to the JSONL file"""
+    global _last_flush
+    if not _enabled:
+        return
+    with _lock:
+        _last_flush = time.monotonic()
+        events, _events[:] = list(_events), []
+        counters = dict(_counters)
+    if counters:
+        events.append({"ts": time.time(), "pid": os.getpid(), "counters": counters})
+    if not events:
+        return
+    try:
+        os.makedirs(_metrics_dir, exist_ok=True)
+        path = events_path()
+        if os.path.exists(path) and os.path.getsize(path) > MAX_EVENTS_BYTES:
+            os.replace(path, f"{path}.1")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in events))
+    except OSError:
+        pass  # metrics must never break the pipeline
+
+
+def flush_if_due(interval=FLUSH_INTERVAL):
+    """flush() at most once per `interval` seconds (for callers that run on every UI rerun)"""
+    if time.monotonic() - _last_flush >= interval:
+        flush()
+
+
+def _tail_lines(path, limit):
+    """Last `limit` lines of a file, reading backwards from the end instead of the whole file"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= limit:
+            step = min(TAIL_BLOCK, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = data.split(b"\n")
+    if position > 0:
+        lines = lines[1:]  # first line may be cut mid-record
+    return [line.decode("utf-8", errors="replace") for line in lines if line.strip()][-limit:]
+
+
+def write_prometheus(path=None, source=None):
+    """Write the in-process aggregates in Prometheus text format (textfile-collector friendly)"""
+    source = source or f"pid{os.getpid()}"
+    path = path or os.path.join(_metrics_dir, f"{source}.prom")
+    data = snapshot()
+    lines = [
+        "# HELP tender_span_seconds Time spent in instrumented spans",
+        "# TYPE tender_span_seconds summary",
+    ]
+    for name, stats in sorted(data["spans"].items()):
+        lines.append(f'tender_span_seconds_count{{span="{name}",source="{source}"}} {stats["count"]}')
+        lines.append(f'tender_span_seconds_sum{{span="{name}",source="{source}"}} {stats["total"]:.6f}')
+    lines += ["# HELP tender_events_total Instrumented counters", "# TYPE tender_events_total counter"]
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f'tender_events_total{{name="{name}",source="{source}"}} {value:g}')
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def summarize_events(path=None, limit=20000):
+    """
+    Aggregate the last `limit` JSONL records (all processes) for display
+
+    Counters are cumulative per process, so the latest record of each pid is summed.
+
+    Returns:
+        dict: {"spans": {name: {count, total, mean, max}}, "counters": {name: value}}
+    """
+    path = path or events_path()
+    if not os.path.exists(path):
+        return {"spans": {}, "counters": {}}
+    lines = _tail_lines(path, limit)
+
+    spans = defaultdict(lambda: {"count": 0, "total": 0.0, "max": 0.0})
+    latest_counters = {}
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if "counters" in event:
+            latest_counters[event.get("pid")] = event["counters"]
+        elif "span" in event:
+            stats = spans[event["span"]]
+            stats["count"] += 1
+            stats["total"] += event["seconds"]
+            stats["max"] = max(stats["max"], event["seconds"])
+    for stats in spans.values():
+        stats["mean"] = stats["total"] / stats["count"]
+
+    counters = defaultdict(float)
+    for per_pid in latest_counters.values():
+        for name, value in per_pid.items():
+            counters[name] += value
+    return {"spans": dict(spans), "counters": dict(counters)}
+
+
+atexit.register(flush)
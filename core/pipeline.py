@@ -0,0 +1,435 @@
+# pipeline.py
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import metrics
+from core.amendments import plan_reprocessing, refresh_analysis
+from core.market_data import MARKET_DIR, MarketData, award_rows
+from core.priority_queue import LAST, DeadlineQueue, deadline_of, priority_key, slack_days
+from core.tender_store import AMENDED, NEW, STALE, STORE_PATH, TenderStore
+
+CHECKPOINT_PATH = "/opt/render/project/src/data/pipeline_checkpoint.json"
+QUEUE_SIZE = 64
+CHECKPOINT_EVERY = 20
+DEFAULT_CONCURRENCY = {"fetch": 4, "extract": 2, "analyze": 2, "score": 1}
+
+_DONE = object()  # end-of-stream marker passed between stages
+
+
+class Stage:
+    """One pipeline step: `func(item, ctx)` returns the item for the next stage, or None to drop it"""
+
+    def __init__(self, name, func, workers=1, setup=None):
+        """
+        Args:
+            name: stage name used in stats and the checkpoint
+            func: callable(item, ctx)
+            workers: number of threads running this stage
+            setup: optional callable() -> ctx, called once per worker thread
+                (e.g. to open a per-thread SQLite connection)
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.setup = setup
+
+
+class Pipeline:
+    """
+    Thread pipeline with bounded queues between stages
+
+    Stages run concurrently, so a slow stage (Claude) overlaps with fetching the
+    next tenders; a full queue blocks the stage before it (backpressure).
+
+    With `rank` (callable(item) -> (tier, score), see priority_queue) the queues
+    are DeadlineQueues: every stage takes the most urgent waiting item instead
+    of the oldest. The source queue is then unbounded, so the whole feed
+    listing is ranked rather than a window of queue_size entries.
+    """
+
+    def __init__(self, stages, queue_size=QUEUE_SIZE, on_result=None, rank=None):
+        self.stages = stages
+        if rank is None:
+            self.queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+        else:
+            ranked = lambda item: (LAST, 0) if item is _DONE else rank(item)
+            self.queues = [DeadlineQueue(0 if i == 0 else queue_size, ranked) for i in range(len(stages) + 1)]
+        self.on_result = on_result
+        self.stats = {s.name: {"in": 0, "out": 0, "dropped": 0, "errors": 0, "seconds": 0.0} for s in stages}
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def _count(self, stage, key, value=1):
+        with self._lock:
+            self.stats[stage.name][key] += value
+
+    def _feed(self, source):
+        try:
+            for item in source:
+                self.queues[0].put(item)
+        except Exception as e:
+            with self._lock:
+                self.errors.append(("source", None, repr(e)))
+        finally:
+            for _ in range(self.stages[0].workers):
+                self.queues[0].put(_DONE)
+
+    def _work(self, index, remaining):
+        stage = self.stages[index]
+        inbox, outbox = self.queues[index], self.queues[index + 1]
+        ctx, setup_error = None, None
+        try:
+            ctx = stage.setup() if stage.setup else None
+        except Exception as e:
+            # Keep consuming so the stream still terminates; every item fails with the setup error
+            setup_error = e
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            self._count(stage, "in")
+            started = time.perf_counter()
+            try:
+                if setup_error is not None:
+                    raise setup_error
+                with metrics.span(f"pipeline.{stage.name}"):
+                    result = stage.func(item, ctx)
+            except Exception as e:
+                self._count(stage, "errors")
+                with self._lock:
+                    self.errors.append((stage.name, item.get("id") if isinstance(item, dict) else item, repr(e)))
+                result = None
+            self._count(stage, "seconds", time.perf_counter() - started)
+            if result is None:
+                self._count(stage, "dropped")
+                continue
+            self._count(stage, "out")
+            outbox.put(result)
+
+        # The last worker of a stage closes the stream for the next one
+        with self._lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+        if last:
+            next_workers = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+            for _ in range(next_workers):
+                outbox.put(_DONE)
+
+    def _drain(self):
+        sink = self.queues[-1]
+        while True:
+            item = sink.get()
+            if item is _DONE:
+                return
+            if self.on_result:
+                self.on_result(item)
+
+    def run(self, source):
+        """Push every item from `source` through the stages; returns per-stage stats"""
+        remaining = [s.workers for s in self.stages]
+        threads = [threading.Thread(target=self._feed, args=(source,), daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads += [
+                threading.Thread(target=self._work, args=(index, remaining), name=f"{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)
+            ]
+        for thread in threads:
+            thread.start()
+        self._drain()
+        for thread in threads:
+            thread.join()
+        return self.stats
+
+
+class Checkpoint:
+    """Resumable record of tenders already taken through the pipeline (id -> dateModified)"""
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        self.path = path
+        self.done = {}
+        self.last_run = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.done = data.get("done", {})
+            self.last_run = data.get("last_run")
+
+    def is_done(self, tender_id, date_modified):
+        """True if this exact version of the tender has been processed already"""
+        return self.done.get(tender_id) == date_modified
+
+    def mark(self, tender_id, date_modified):
+        with self._lock:
+            self.done[tender_id] = date_modified
+            self._pending += 1
+            flush = self._pending >= CHECKPOINT_EVERY
+        if flush:
+            self.save()
+
+    def save(self, prune_before=None):
+        """Atomically rewrite the checkpoint, optionally forgetting versions older than prune_before"""
+        if not self.path:
+            return
+        with self._lock:
+            if prune_before:
+                self.done = {k: v for k, v in self.done.items() if (v or "") >= prune_before}
+            self._pending = 0
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"last_run": self.last_run, "done": self.done}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+class TenderPipeline:
+    """download → extract → analyze → score over the ProZorro change feed"""
+
+    def __init__(self, topic, company_resources, concurrency=None, queue_size=QUEUE_SIZE,
+                 checkpoint_path=CHECKPOINT_PATH, db_path=STORE_PATH, analyze=True, limit=None,
+                 market_dir=MARKET_DIR, route_at_listing=True, prioritize=True):
+        """
+        Args:
+            topic: topics.json topic (or legacy keywords.json topic) that tenders must match
+            company_resources: dict used by ProfitabilityAnalyzer (workers, projects, ...)
+            concurrency: {stage name: worker threads}, merged over DEFAULT_CONCURRENCY
+            checkpoint_path: JSON checkpoint file (None disables resuming)
+            analyze: when False, stop after extraction (no Claude calls, no scoring)
+            limit: stop after this many matching tenders
+            market_dir: award history directory (None disables collecting awards)
+            route_at_listing: skip feed entries whose listed CPV codes are off-topic without
+                fetching them (their awards and buyers then stay out of the market history)
+            prioritize: take tenders closest to their deadline (weighted by topic relevance)
+                first at every stage instead of in feed order
+        """
+        from core.downloader import load_topic_router
+
+        self.topic = topic
+        self.router = load_topic_router(topic)
+        self.route_at_listing = route_at_listing
+        self.prioritize = prioritize
+        self.company_resources = company_resources
+        self.concurrency = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self.queue_size = queue_size
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.db_path = db_path
+        self.analyze = analyze
+        self.limit = limit
+        self.market_dir = market_dir
+        self.matched = 0
+        self.results = []
+        self.awards = []  # award rows of completed tenders in the feed, whatever their topic
+        self._lock = threading.Lock()
+        self._dedup = None
+
+    # ---------------------- Stage functions ----------------------
+    def _store(self):
+        return {"store": TenderStore(self.db_path)}
+
+    @staticmethod
+    def _reruns(item, stage):
+        """False for stages an amendment of an already analyzed tender does not affect"""
+        return "plan" not in item or stage in item["plan"]
+
+    def fetch(self, entry, ctx):
+        from core.downloader import fetch_tender, matches_topic, save_tender, tender_filename, RATE_LIMIT_DELAY
+
+        tender_data = fetch_tender(entry["id"])
+        with metrics.span("rate_limit.sleep"):
+            time.sleep(RATE_LIMIT_DELAY)
+        awards = award_rows(tender_data)
+        if awards:
+            with self._lock:
+                self.awards.extend(awards)
+        if not matches_topic(tender_data, self.topic, self.router):
+            # Off-topic tenders still count towards their buyer's track record
+            ctx["store"].issuers.update(tender_data)
+            self.checkpoint.mark(entry["id"], entry.get("dateModified"))
+            return None
+        with self._lock:
+            if self.limit is not None and self.matched >= self.limit:
+                return None
+        change = ctx["store"].upsert_tender(tender_data, topic=self.topic, file=tender_filename(tender_data))
+        if change["status"] == STALE:
+            self.checkpoint.mark(entry["id"], entry.get("dateModified"))
+            return None
+        if change["status"] in (NEW, AMENDED):
+            # Only a stored new version counts toward the limit (concurrent fetches may overshoot it by a few)
+            with self._lock:
+                self.matched += 1
+            save_tender(tender_data)
+        item = {"id": tender_data["id"], "dateModified": entry.get("dateModified"), "tender": tender_data}
+        previous = ctx["store"].get_analysis(item["id"]) if change["status"] != NEW else None
+        if previous is not None:
+            # Analyzed before: only the stages the amendment's changes touch run again
+            plan = plan_reprocessing(change["categories"])
+            if not plan:
+                self.checkpoint.mark(entry["id"], entry.get("dateModified"))
+                return None
+            metrics.incr("amendments.detected")
+            item.update(changes=change["categories"], plan=plan, analysis=refresh_analysis(previous, tender_data),
+                        cluster_id=previous.get("cluster_id") or item["id"])
+        return item
+
+    def extract(self, item, ctx):
+        from core.tender_text import build_tender_text
+
+        if not self._reruns(item, "extract"):
+            return item
+        item["text"] = build_tender_text(item["tender"])
+        with self._lock:
+            item["cluster_id"] = self._dedup.add(item["id"], item["text"])
+        return item
+
+    def analyze_tender(self, item, ctx):
+        from core.claude_client import analyze_text, tender_content
+        from core.cpv import primary_code
+        from core.downloader import RATE_LIMIT_DELAY
+
+        if not self._reruns(item, "analyze"):
+            metrics.incr("amendments.analysis_reused")
+            ctx["store"].save_analysis(item["id"], item["analysis"], item["cluster_id"],
+                                       item["analysis"].get("duplicate_of"))
+            return item
+        amended = "plan" in item  # the cached analysis is of the version before the amendment
+        with self._lock:
+            analysis = None if amended else self._dedup.cached_analysis(item["id"])
+        if analysis is None:
+            analysis = analyze_text(tender_content(item["tender"]), ctx["client"])
+            if not analysis:
+                raise ValueError("Claude returned invalid JSON.")
+            if not amended or item["cluster_id"] == item["id"]:
+                with self._lock:
+                    self._dedup.store_analysis(item["id"], analysis)
+            with metrics.span("rate_limit.sleep"):
+                time.sleep(RATE_LIMIT_DELAY)
+        duplicate_of = item["cluster_id"] if item["cluster_id"] != item["id"] else None
+        item["analysis"] = {**analysis, "tender_id": item["id"], "Filename": f"{item['id']}.txt",
+                            "cluster_id": item["cluster_id"], "cpv": primary_code(item["tender"])}
+        if duplicate_of:
+            item["analysis"]["duplicate_of"] = duplicate_of
+        ctx["store"].save_analysis(item["id"], item["analysis"], item["cluster_id"], duplicate_of)
+        return item
+
+    def score(self, item, ctx):
+        from core.evaluation import build_evaluation_tender
+
+        evaluation = None if self._reruns(item, "score") else ctx["store"].get_score(item["id"])
+        rescored = evaluation is None
+        if rescored:
+            evaluation = ctx["analyzer"].analyze_tender(
+                build_evaluation_tender(item["analysis"], tender=item["tender"]), self.company_resources
+            )
+        result = {"id": item["id"], "title": item["tender"].get("title", ""), "cluster_id": item["cluster_id"],
+                  "dateModified": item["dateModified"], "deadline": deadline_of(item["tender"]),
+                  "roi_score": evaluation["roi_score"],
+                  "recommendation": evaluation["recommendation"]}
+        if "changes" in item:
+            result["changes"] = item["changes"]
+        if not rescored:
+            return result
+        if ctx["win_model"].trained:
+            from core.win_model import tender_features
+
+            features = tender_features(item["tender"], item["analysis"], evaluation)
+            evaluation["win_probability"] = result["win_probability"] = float(ctx["win_model"].predict([features])[0])
+        ctx["store"].save_score(item["id"], evaluation)
+        return result
+
+    def _analyze_ctx(self):
+        from core.claude_client import get_client
+
+        client = get_client()
+        if client is None:
+            raise RuntimeError("Claude API key not found in .env file")
+        return {**self._store(), "client": client}
+
+    def _score_ctx(self):
+        from core.score_matrix import AVK5Estimator, ProfitabilityAnalyzer
+        from core.win_model import WinModel
+
+        ctx = self._store()
+        analyzer = ProfitabilityAnalyzer(AVK5Estimator(), issuers=ctx["store"].issuers)
+        return {**ctx, "analyzer": analyzer, "win_model": WinModel()}
+
+    def stages(self):
+        stages = [
+            Stage("fetch", self.fetch, self.concurrency["fetch"], self._store),
+            Stage("extract", self.extract, self.concurrency["extract"]),
+        ]
+        if self.analyze:
+            stages += [
+                Stage("analyze", self.analyze_tender, self.concurrency["analyze"], self._analyze_ctx),
+                Stage("score", self.score, self.concurrency["score"], self._score_ctx),
+            ]
+        return stages
+
+    def rank(self, item):
+        """Queue priority of a feed entry or in-flight item: deadline slack × CPV relevance to the topic"""
+        tender = item.get("tender", item)
+        return priority_key(deadline_of(tender), self.router.relevance(tender, self.topic))
+
+    def _finish(self, item):
+        self.checkpoint.mark(item["id"], item.get("dateModified"))
+        self.results.append(item)
+        slack = slack_days(item.get("deadline") or deadline_of(item.get("tender")))
+        if slack is not None and slack < 0:
+            metrics.incr("pipeline.finished_after_deadline")
+
+    # ---------------------- Run ----------------------
+    def source(self, since, until=None):
+        """Feed entries not yet processed at this version (minus those listed under off-topic CPV codes)"""
+        from core.downloader import LISTING_FIELDS, iter_feed
+
+        opt_fields = LISTING_FIELDS if self.route_at_listing else None
+        for entry in iter_feed(since, until, opt_fields=opt_fields):
+            if self.limit is not None and self.matched >= self.limit:
+                return
+            if self.checkpoint.is_done(entry["id"], entry.get("dateModified")):
+                continue
+            if self.route_at_listing and self.router.excludes(entry, self.topic):
+                metrics.incr("feed.skipped_by_cpv")
+                self.checkpoint.mark(entry["id"], entry.get("dateModified"))
+                continue
+            yield entry
+
+    def run(self, since, until=None):
+        """
+        Process every tender modified in [since, until]
+
+        Returns:
+            dict: per-stage stats, errors and the scored tenders
+        """
+        from core.dedup import DuplicateIndex
+        from core.downloader import setup_environment
+
+        setup_environment()
+        self._dedup = DuplicateIndex()
+        started = time.perf_counter()
+        pipeline = Pipeline(self.stages(), self.queue_size, on_result=self._finish,
+                            rank=self.rank if self.prioritize else None)
+        stats = pipeline.run(self.source(since, until))
+
+        self._dedup.save()
+        if self.market_dir and self.awards:
+            with metrics.span("market.rebuild", rows=len(self.awards)):
+                market = MarketData(self.market_dir)
+                market.append(self.awards)
+                market.rebuild()
+        self.checkpoint.last_run = datetime.now().isoformat()
+        self.checkpoint.save(prune_before=since.isoformat() if isinstance(since, datetime) else None)
+        metrics.flush()
+        metrics.write_prometheus(source="pipeline")
+        return {
+            "stats": stats,
+            "errors": pipeline.errors,
+            "results": self.results,
+            "awards": len(self.awards),
+            "seconds": time.perf_counter() - started
+        }
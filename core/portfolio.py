@@ -0,0 +1,155 @@
+# portfolio.py
+from datetime import timedelta
+import numpy as np
+from core.scheduler import CapacityScheduler, RESOURCE_TYPES
+
+DEFAULT_BID_PREP_DAYS = 3
+DEFAULT_BID_CAPACITY_DAYS = 20
+MAX_DELAY_RATIO = 0.3  # same tolerance as the 70/100 feasibility threshold
+ASSUMED_MARGIN = 0.10 / 1.10  # profit share of an AVK5 price (cost + 10% profit) when no cost is known
+
+
+def expected_profit(evaluation, margin=ASSUMED_MARGIN):
+    """Gross profit of a ProfitabilityAnalyzer row, or its bid price at `margin` when no cost was estimated"""
+    if evaluation.get("estimated_cost"):
+        return evaluation["gross_profit"]
+    return evaluation.get("bid_price", 0) * margin
+
+
+class PortfolioOptimizer:
+    """Pick the set of tenders that maximizes expected profit under shared capacity"""
+
+    def __init__(self, company_resources, max_delay_ratio=MAX_DELAY_RATIO):
+        """
+        Args:
+            company_resources: dict with workers/engineers/vehicles, current_projects
+                and optional bid_capacity_days (bid team days available)
+            max_delay_ratio: how late a tender may start, as a share of its duration
+        """
+        self.scheduler = CapacityScheduler(company_resources)
+        self.bid_capacity = float(company_resources.get("bid_capacity_days", DEFAULT_BID_CAPACITY_DAYS))
+        self.max_delay_ratio = max_delay_ratio
+
+    def _prepare(self, candidates):
+        """Normalize candidates into arrays used by the bound and the greedy passes"""
+        items = []
+        for cand in candidates:
+            win_probability = cand.get("win_probability")
+            win_probability = 1.0 if win_probability is None else float(win_probability)
+            profit = float(cand.get("expected_profit", 0) or 0) * win_probability
+            if not np.isfinite(profit) or profit <= 0:  # NaN profit or probability would poison the knapsack
+                continue
+            duration = max(1, int(cand.get("duration_days", 0) or 0))
+            items.append({
+                "candidate": cand,
+                "profit": profit,
+                "duration": duration,
+                "demand": self.scheduler.demand_vector(cand.get("resource_requirements")),
+                "bid_prep": float(cand.get("bid_prep_days", DEFAULT_BID_PREP_DAYS)),
+                "first_day": self.scheduler._offset(cand.get("start_date")),
+            })
+        return items
+
+    def _weights(self, items):
+        """
+        Resource-days per item as a share of each constraint's total capacity
+
+        The horizon includes the start delay each tender is allowed, so the
+        bound still covers schedules that push work past the nominal end.
+        """
+        horizon = max([it["first_day"] + it["duration"] + int(np.ceil(self.max_delay_ratio * it["duration"]))
+                       for it in items] + [1])
+        free_days = np.maximum(
+            self.scheduler.capacity * horizon - self.scheduler.usage[:, :horizon].sum(axis=1), 0
+        )
+        usage = np.array([it["demand"] * it["duration"] for it in items])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shares = np.where(usage > 0, usage / free_days, 0.0)
+        shares = np.nan_to_num(shares, nan=np.inf, posinf=np.inf)
+        bid = np.array([it["bid_prep"] for it in items]) / self.bid_capacity if self.bid_capacity else np.zeros(len(items))
+        return np.column_stack([shares, bid])
+
+    @staticmethod
+    def upper_bound(profits, weights):
+        """
+        Fractional-knapsack bound: relax to each single constraint, keep the tightest
+
+        Capacity over time is aggregated into resource-days, which can only loosen
+        the real problem, so the result is a valid bound on the optimum.
+        """
+        best = np.inf
+        for col in weights.T:
+            order = np.argsort(-(profits / np.where(col > 0, col, 1e-12)))
+            cum = np.cumsum(col[order])
+            full = np.searchsorted(cum, 1.0, side="right")
+            bound = profits[order][:full].sum()
+            if full < len(order) and np.isfinite(col[order][full]):
+                remaining = 1.0 - (cum[full - 1] if full else 0.0)
+                bound += profits[order][full] * remaining / col[order][full]
+            best = min(best, bound)
+        return float(best)
+
+    def _greedy(self, items, order):
+        scheduler = self.scheduler.copy()
+        bid_used = 0.0
+        chosen = []
+        for idx in order:
+            it = items[idx]
+            if bid_used + it["bid_prep"] > self.bid_capacity:
+                continue
+            offset = scheduler.earliest_start(it["duration"], dict(zip(RESOURCE_TYPES, it["demand"])),
+                                              scheduler.today + timedelta(days=it["first_day"]))
+            if offset is None or offset - it["first_day"] > self.max_delay_ratio * it["duration"]:
+                continue
+            start = scheduler.today + timedelta(days=offset)
+            scheduler.reserve(start, it["duration"], dict(zip(RESOURCE_TYPES, it["demand"])))
+            bid_used += it["bid_prep"]
+            chosen.append((idx, start))
+        return chosen, sum(items[i]["profit"] for i, _ in chosen), bid_used
+
+    def optimize(self, candidates):
+        """
+        Select a subset of candidates maximizing expected profit
+
+        Args:
+            candidates: list of dicts with tender_id, expected_profit, duration_days,
+                start_date, resource_requirements and optional bid_prep_days / win_probability
+
+        Returns:
+            dict: selected tenders with planned start dates, totals and the optimality bound
+        """
+        items = self._prepare(candidates)
+        if not items:
+            return {"selected": [], "expected_profit": 0.0, "upper_bound": 0.0,
+                    "optimality_gap": 0.0, "bid_days_used": 0.0}
+
+        profits = np.array([it["profit"] for it in items])
+        weights = self._weights(items)
+        bound = self.upper_bound(profits, weights)
+
+        # Multi-start greedy: profit density, tightest-constraint density and raw profit
+        with np.errstate(divide="ignore"):
+            density_sum = profits / np.maximum(weights.sum(axis=1), 1e-12)
+            density_max = profits / np.maximum(weights.max(axis=1), 1e-12)
+        orderings = [np.argsort(-density_sum), np.argsort(-density_max), np.argsort(-profits)]
+
+        best = max((self._greedy(items, order) for order in orderings), key=lambda r: r[1])
+        chosen, total, bid_used = best
+
+        selected = []
+        for idx, start in sorted(chosen, key=lambda c: c[1]):
+            it = items[idx]
+            selected.append({
+                **it["candidate"],
+                "planned_start": start.isoformat(),
+                "planned_end": (start + timedelta(days=it["duration"])).isoformat(),
+                "expected_value": it["profit"]
+            })
+
+        return {
+            "selected": selected,
+            "expected_profit": total,
+            "upper_bound": bound,
+            "optimality_gap": (bound - total) / bound if bound and np.isfinite(bound) else 0.0,
+            "bid_days_used": bid_used
+        }
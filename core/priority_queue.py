@@ -0,0 +1,128 @@
+# priority_queue.py
+import heapq
+import itertools
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import metrics
+
+URGENT_DAYS = 2.0           # slack under this preempts: jumps the queue and never waits on a full one
+HORIZON_DAYS = 60.0         # unknown or farther deadlines rank as if they were this far out
+RELEVANCE_WEIGHT = 1.0      # an irrelevant tender ranks as if its deadline were (1 + weight)× further away
+NEUTRAL_RELEVANCE = 0.5     # relevance assumed when nothing is known
+AGING_DAYS_PER_HOUR = 1.0   # slack forgiven per hour spent waiting, so distant tenders are not starved
+
+# Tiers, served in this order
+URGENT, NORMAL, CLOSED, LAST = range(4)
+
+
+def deadline_of(tender):
+    """Bid submission deadline (tenderPeriod.endDate) of a tender or feed entry, or None"""
+    return ((tender or {}).get("tenderPeriod") or {}).get("endDate") or None
+
+
+def slack_days(deadline, now=None):
+    """Days left until `deadline` (negative once it has passed; None if unknown)"""
+    if not deadline:
+        return None
+    try:
+        end = datetime.fromisoformat(str(deadline))
+    except ValueError:
+        return None
+    return (end.timestamp() - (time.time() if now is None else now)) / 86400
+
+
+def priority_key(deadline=None, relevance=None, now=None):
+    """
+    (tier, score) of a tender, lowest first
+
+    score is deadline slack × (1 + RELEVANCE_WEIGHT × (1 - relevance)): a
+    fully relevant tender ranks at its real slack, an irrelevant one as if it
+    had twice as long. Tenders closing within URGENT_DAYS form their own tier
+    ahead of everything; tenders already closed go last.
+    """
+    slack = slack_days(deadline, now)
+    if slack is not None and slack < 0:
+        return (CLOSED, -slack)
+    slack = HORIZON_DAYS if slack is None else min(slack, HORIZON_DAYS)
+    relevance = NEUTRAL_RELEVANCE if relevance is None else max(0.0, min(1.0, float(relevance)))
+    return (URGENT if slack < URGENT_DAYS else NORMAL, slack * (1 + RELEVANCE_WEIGHT * (1 - relevance)))
+
+
+def by_deadline(tenders, relevance=None, now=None):
+    """Tenders (or feed entries) sorted most urgent first; relevance is an optional callable(tender)"""
+    now = time.time() if now is None else now
+    return sorted(tenders, key=lambda t: priority_key(deadline_of(t), relevance(t) if relevance else None, now))
+
+
+class DeadlineQueue:
+    """
+    Thread-safe priority queue ordering tenders by deadline slack × relevance
+
+    A drop-in for queue.Queue between pipeline stages. `rank(item)` gives the
+    item's (tier, score); lower is served first.
+
+    - Preemption: URGENT items go ahead of every other tier, and their put()
+      never blocks on a full queue, so backpressure cannot hold them back.
+    - Starvation protection: within the NORMAL tier, every hour an item waits
+      takes AGING_DAYS_PER_HOUR off its score. All waiting items age at the
+      same rate, so the heap stores score + aging × enqueue time once and
+      never needs re-sorting.
+
+    Tiers are fixed at put() time; a tender that becomes urgent while waiting
+    keeps its place by score, which is already the lowest in its tier.
+    """
+
+    def __init__(self, maxsize=0, rank=None, aging=AGING_DAYS_PER_HOUR, clock=time.time):
+        self.maxsize = maxsize
+        self.rank = rank or (lambda tender: priority_key(deadline_of(tender)))
+        self.aging = aging
+        self.clock = clock
+        self._epoch = clock()
+        self._heap = []
+        self._seq = itertools.count()  # FIFO among equal keys
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def qsize(self):
+        with self._lock:
+            return len(self._heap)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def _full(self):
+        return 0 < self.maxsize <= len(self._heap)
+
+    def put(self, item, block=True, timeout=None):
+        tier, score = self.rank(item)
+        with self._not_full:
+            if tier == URGENT:
+                if self._full():
+                    metrics.incr("queue.preempted")
+            elif self._full():
+                if not block or not self._not_full.wait_for(lambda: not self._full(), timeout):
+                    raise queue.Full
+            if tier == NORMAL:
+                score += self.aging * (self.clock() - self._epoch) / 3600
+            heapq.heappush(self._heap, (tier, score, next(self._seq), item))
+            self._not_empty.notify()
+
+    def put_nowait(self, item):
+        self.put(item, block=False)
+
+    def get(self, block=True, timeout=None):
+        with self._not_empty:
+            if not self._heap and (not block or not self._not_empty.wait_for(lambda: self._heap, timeout)):
+                raise queue.Empty
+            item = heapq.heappop(self._heap)[-1]
+            self._not_full.notify()
+            return item
+
+    def get_nowait(self):
+        return self.get(block=False)
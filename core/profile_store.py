@@ -0,0 +1,266 @@
+# profile_store.py
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.tender_store import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS resources (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS capabilities (
+    name TEXT PRIMARY KEY,
+    added_at TEXT
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    type TEXT,
+    validity TEXT,
+    path TEXT,
+    tags TEXT,
+    added_date TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_type ON documents (type);
+CREATE INDEX IF NOT EXISTS documents_validity ON documents (validity);
+CREATE TABLE IF NOT EXISTS performance (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tender_id TEXT,
+    outcome TEXT,
+    profit REAL,
+    lessons TEXT,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS performance_tender ON performance (tender_id);
+CREATE INDEX IF NOT EXISTS performance_outcome_date ON performance (outcome, date);
+CREATE INDEX IF NOT EXISTS performance_date ON performance (date, outcome, profit);
+"""
+
+
+class ProfileStore:
+    """
+    SQLite backing for CompanyProfile
+
+    One table per profile section, so adding a capability, document or
+    performance record writes one row instead of the whole profile. WAL mode
+    (see tender_store.connect) lets concurrent Streamlit sessions read while
+    another writes.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Group writes into one commit; IMMEDIATE so concurrent writers queue instead of failing mid-way"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def is_empty(self):
+        return not any(
+            self.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+            for table in ("profile", "resources", "capabilities", "documents", "performance")
+        )
+
+    # ---------------------- Profile fields ----------------------
+    def get(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM profile WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def set(self, key, value):
+        self.conn.execute(
+            "INSERT INTO profile (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+            (key, json.dumps(value, ensure_ascii=False))
+        )
+
+    def touch(self):
+        self.set("last_updated", datetime.now().isoformat())
+
+    # ---------------------- Resources ----------------------
+    def resources(self):
+        return {r["name"]: json.loads(r["value"]) for r in self.conn.execute("SELECT name, value FROM resources")}
+
+    def set_resource(self, name, value):
+        self.conn.execute(
+            "INSERT INTO resources (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value=excluded.value",
+            (name, json.dumps(value, ensure_ascii=False))
+        )
+
+    def replace_resources(self, resources):
+        """Make the stored resources equal `resources`, touching only rows that differ"""
+        with self.transaction():
+            current = self.resources()
+            stale = [name for name in current if name not in resources]
+            self.conn.executemany("DELETE FROM resources WHERE name = ?", [(name,) for name in stale])
+            for name, value in resources.items():
+                if current.get(name, object()) != value:
+                    self.set_resource(name, value)
+            self.touch()
+
+    # ---------------------- Capabilities ----------------------
+    def capabilities(self):
+        return [r["name"] for r in self.conn.execute("SELECT name FROM capabilities ORDER BY rowid")]
+
+    def has_capability(self, capability):
+        return self.conn.execute("SELECT 1 FROM capabilities WHERE name = ?", (capability,)).fetchone() is not None
+
+    def add_capability(self, capability):
+        """True if the capability was new"""
+        with self.transaction():
+            added = self.conn.execute(
+                "INSERT OR IGNORE INTO capabilities (name, added_at) VALUES (?, ?)",
+                (capability, datetime.now().isoformat())
+            ).rowcount == 1
+            if added:
+                self.touch()
+        return added
+
+    def remove_capability(self, capability):
+        with self.transaction():
+            removed = self.conn.execute("DELETE FROM capabilities WHERE name = ?", (capability,)).rowcount == 1
+            if removed:
+                self.touch()
+        return removed
+
+    # ---------------------- Documents ----------------------
+    def _document(self, row):
+        doc = dict(row)
+        doc["tags"] = json.loads(doc["tags"] or "[]")
+        return doc
+
+    def add_document(self, doc_name, doc_type, validity, file_path, tags=None):
+        with self.transaction():
+            last = self.conn.execute("SELECT MAX(CAST(substr(id, 5) AS INTEGER)) FROM documents").fetchone()[0]
+            doc = {
+                "id": f"DOC-{(last or 0) + 1:04d}",
+                "name": doc_name,
+                "type": doc_type,
+                "validity": validity,
+                "path": file_path,
+                "tags": tags or [],
+                "added_date": datetime.now().isoformat()
+            }
+            self._insert_document(doc)
+            self.touch()
+        return doc
+
+    def _insert_document(self, doc):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO documents (id, name, type, validity, path, tags, added_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (doc["id"], doc["name"], doc["type"], doc.get("validity"), doc.get("path"),
+             json.dumps(doc.get("tags") or [], ensure_ascii=False), doc.get("added_date"))
+        )
+
+    def documents(self, doc_type=None, valid_on=None):
+        """Documents, optionally of one type and/or still valid on an ISO date"""
+        where, params = [], []
+        if doc_type is not None:
+            where.append("type = ?")
+            params.append(doc_type)
+        if valid_on is not None:
+            where.append("validity >= ?")
+            params.append(valid_on)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        return [self._document(r) for r in self.conn.execute(f"SELECT * FROM documents{clause} ORDER BY id", params)]
+
+    # ---------------------- Performance history ----------------------
+    def add_performance_record(self, tender_id, outcome, profit, lessons, date=None):
+        record = {
+            "tender_id": tender_id,
+            "outcome": outcome,
+            "profit": profit,
+            "lessons": lessons,
+            "date": date or datetime.now().isoformat()
+        }
+        with self.transaction():
+            self._insert_performance([record])
+            self.touch()
+        return record
+
+    def _insert_performance(self, records):
+        self.conn.executemany(
+            "INSERT INTO performance (tender_id, outcome, profit, lessons, date) VALUES (?, ?, ?, ?, ?)",
+            [(r.get("tender_id"), r.get("outcome"), r.get("profit"), r.get("lessons"), r.get("date")) for r in records]
+        )
+
+    def performance(self, tender_id=None, outcome=None, since=None, until=None, limit=None, with_id=False):
+        """Performance records, newest first, filtered on indexed columns (with_id adds the row id)"""
+        where, params = [], []
+        for column, op, value in (("tender_id", "=", tender_id), ("outcome", "=", outcome),
+                                  ("date", ">=", since), ("date", "<", until)):
+            if value is not None:
+                where.append(f"{column} {op} ?")
+                params.append(value)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        rows = self.conn.execute(
+            f"SELECT {'id, ' if with_id else ''}tender_id, outcome, profit, lessons, date FROM performance{clause} "
+            "ORDER BY date DESC, id DESC LIMIT ?",
+            params + [-1 if limit is None else limit]
+        )
+        return [dict(r) for r in rows]
+
+    def performance_summary(self, since=None):
+        """Bids, wins and profit per outcome, aggregated inside SQLite"""
+        rows = self.conn.execute(
+            "SELECT outcome, COUNT(*) AS bids, COALESCE(SUM(profit), 0) AS profit FROM performance"
+            + (" WHERE date >= ?" if since else "") + " GROUP BY outcome",
+            (since,) if since else ()
+        )
+        return {r["outcome"]: {"bids": r["bids"], "profit": r["profit"]} for r in rows}
+
+    # ---------------------- Whole profile ----------------------
+    def load(self):
+        """The profile in company_profile.json layout"""
+        return {
+            "company_name": self.get("company_name", ""),
+            "resources": self.resources(),
+            "document_vault": self.documents(),
+            "historical_performance": self.performance()[::-1],
+            "capabilities": self.capabilities(),
+            "last_updated": self.get("last_updated", datetime.now().isoformat())
+        }
+
+    def import_profile(self, profile):
+        """Load a company_profile.json dict (one transaction)"""
+        with self.transaction():
+            self._import(profile)
+
+    def seed(self, profile):
+        """Import `profile` unless the store already has data; the check and import share one write lock"""
+        with self.transaction():
+            if not self.is_empty():
+                return False
+            self._import(profile)
+        return True
+
+    def _import(self, profile):
+        for key, value in profile.items():
+            if key not in ("resources", "document_vault", "historical_performance", "capabilities"):
+                self.set(key, value)
+        for name, value in (profile.get("resources") or {}).items():
+            self.set_resource(name, value)
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO capabilities (name, added_at) VALUES (?, ?)",
+            [(c, profile.get("last_updated")) for c in profile.get("capabilities") or []]
+        )
+        for doc in profile.get("document_vault") or []:
+            self._insert_document(doc)
+        self._insert_performance(profile.get("historical_performance") or [])
@@ -0,0 +1,174 @@
+# scheduler.py
+from datetime import date, datetime, timedelta
+import numpy as np
+
+RESOURCE_TYPES = ("workers", "engineers", "vehicles")
+DEFAULT_HORIZON_DAYS = 365
+
+
+def parse_day(value, default=None):
+    """Convert an ISO date/datetime string (or date object) to a date"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value)[:10]).date()
+    except ValueError:
+        return default
+
+
+class CapacityScheduler:
+    """Day-by-day resource timeline for checking whether new work fits the company"""
+
+    def __init__(self, company_resources, today=None, horizon_days=DEFAULT_HORIZON_DAYS):
+        """
+        Args:
+            company_resources: dict with workers/engineers/vehicles counts and
+                current_projects (name, duration, start_date, per-resource usage)
+            today: first day of the timeline (defaults to the current date)
+            horizon_days: initial timeline length, grown on demand
+        """
+        self.today = parse_day(today, date.today())
+        self.capacity = np.array(
+            [float(company_resources.get(r, 0) or 0) for r in RESOURCE_TYPES]
+        )
+        self.usage = np.zeros((len(RESOURCE_TYPES), horizon_days))
+        self.projects = company_resources.get("current_projects", [])
+        for proj in self.projects:
+            start = parse_day(proj.get("start_date"), self.today)
+            self.reserve(start, proj.get("duration", 0), proj)
+
+    def copy(self):
+        """Return an independent scheduler with the same timeline"""
+        clone = CapacityScheduler.__new__(CapacityScheduler)
+        clone.today = self.today
+        clone.capacity = self.capacity.copy()
+        clone.usage = self.usage.copy()
+        clone.projects = list(self.projects)
+        return clone
+
+    @property
+    def horizon(self):
+        return self.usage.shape[1]
+
+    def _grow(self, days):
+        if days > self.horizon:
+            extra = np.zeros((len(RESOURCE_TYPES), days - self.horizon))
+            self.usage = np.hstack([self.usage, extra])
+
+    def _offset(self, start):
+        return max(0, (parse_day(start, self.today) - self.today).days)
+
+    @staticmethod
+    def demand_vector(requirements):
+        """Turn a {resource: amount} dict into an array aligned with RESOURCE_TYPES"""
+        requirements = requirements or {}
+        return np.array([float(requirements.get(r, 0) or 0) for r in RESOURCE_TYPES])
+
+    def reserve(self, start, duration, requirements):
+        """Book resources for [start, start + duration) on the timeline"""
+        duration = int(duration or 0)
+        if duration <= 0:
+            return
+        first_day = parse_day(start, self.today)
+        end = (first_day - self.today).days + duration
+        if end <= 0:
+            return
+        begin = max(0, (first_day - self.today).days)
+        self._grow(end)
+        self.usage[:, begin:end] += self.demand_vector(requirements)[:, None]
+
+    def utilization(self):
+        """Return usage / capacity per resource and day (0 where capacity is 0)"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = self.usage / self.capacity[:, None]
+        return np.nan_to_num(ratio, nan=0.0, posinf=0.0)
+
+    def earliest_start(self, duration, requirements, start_date=None):
+        """
+        Find the first day offset >= start_date where the demand fits for the whole duration
+
+        Returns:
+            int day offset from `today`, or None if the demand exceeds total capacity
+        """
+        demand = self.demand_vector(requirements)
+        if np.any(demand > self.capacity):
+            return None
+        duration = max(1, int(duration or 0))
+        first = self._offset(start_date)
+        self._grow(first + duration)
+
+        blocked = np.any(self.usage + demand[:, None] > self.capacity[:, None], axis=0)
+        # Past the horizon nothing is booked, so every window eventually fits
+        blocked = np.concatenate([blocked, np.zeros(duration, dtype=bool)])
+        blocked_count = np.concatenate([[0], np.cumsum(blocked)])
+        window = blocked_count[duration:] - blocked_count[:-duration]
+        free = np.flatnonzero(window[first:] == 0)
+        return first + int(free[0])
+
+    def check_feasibility(self, duration, requirements, start_date=None):
+        """
+        Check whether a new job fits on the requested start date
+
+        Returns:
+            dict: earliest start, delay, peak utilization and a 0-100 feasibility score
+        """
+        duration = int(duration or 0)
+        first = self._offset(start_date)
+        offset = self.earliest_start(duration, requirements, start_date)
+
+        window = slice(first, first + max(1, duration))
+        committed = self.usage[:, window].sum(axis=0)
+        demand = self.demand_vector(requirements)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            peak = np.nan_to_num(
+                (self.usage[:, window] + demand[:, None]) / self.capacity[:, None],
+                nan=0.0, posinf=1.0
+            ).max(initial=0.0)
+
+        if offset is None:
+            delay = None
+            feasibility_score = 0.0
+        else:
+            delay = offset - first
+            feasibility_score = max(0.0, 100 - (delay / max(1, duration)) * 100)
+
+        return {
+            "required_duration": duration,
+            "current_workload": float(committed.sum()),
+            "earliest_start": (self.today + timedelta(days=offset)).isoformat() if offset is not None else None,
+            "delay_days": delay,
+            "peak_utilization": float(peak),
+            "feasibility_score": feasibility_score,
+            "is_feasible": feasibility_score >= 70
+        }
+
+    def check_many(self, candidates):
+        """
+        Check a batch of candidate tenders against the same timeline
+
+        Args:
+            candidates: iterable of dicts with duration_days, start_date and resource_requirements
+
+        Returns:
+            list of feasibility dicts in input order
+        """
+        cache = {}
+        results = []
+        for cand in candidates:
+            key = (
+                int(cand.get("duration_days", 0) or 0),
+                self._offset(cand.get("start_date")),
+                tuple(self.demand_vector(cand.get("resource_requirements"))),
+            )
+            if key not in cache:
+                cache[key] = self.check_feasibility(
+                    cand.get("duration_days", 0),
+                    cand.get("resource_requirements"),
+                    cand.get("start_date")
+                )
+            results.append(dict(cache[key]))
+        return results
@@ -1,11 +1,16 @@
 # estimation_model.py
 import json
 import os
-from datetime import datetime
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill
-from openpyxl.utils import get_column_letter
+import sys
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import metrics
+from core.document_vault import VAULT_PATH, DocumentVault
+from core.issuer_index import default_index
+from core.market_data import default_lookup
+from core.scheduler import CapacityScheduler
+
+_LOOKUP = object()  # assess_risks default: look the stats up (None means looked up, nothing found)
 
 # Ukrainian construction standards database (sample data)
 AVK5_STANDARDS = {
@@ -120,8 +125,13 @@ class AVK5Estimator:
             "currency": "UAH"
         }
     
+    @metrics.timed("excel.avk5_estimate")
     def export_to_excel(self, estimate, filename):
         """Export cost estimate to Excel with Ukrainian formatting"""
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, PatternFill
+        from openpyxl.utils import get_column_letter
+
         wb = Workbook()
         ws = wb.active
         if ws is None:
@@ -209,93 +219,70 @@ class AVK5Estimator:
 class DocumentComplianceChecker:
     """Check tender document requirements against company's document vault"""
     
-    def __init__(self, document_vault_path="/opt/render/project/src/data/document_vault.json"):
+    def __init__(self, document_vault_path=VAULT_PATH):
         self.vault_path = document_vault_path
-        self.document_vault = self.load_document_vault()
+        self.vault = DocumentVault(document_vault_path)
     
-    def load_document_vault(self):
-        """Load company document metadata from JSON file"""
-        if os.path.exists(self.vault_path):
-            with open(self.vault_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return {
-            "documents": [],
-            "categories": {},
-            "last_updated": datetime.now().isoformat()
-        }
+    @property
+    def document_vault(self):
+        """Vault contents in document_vault.json layout"""
+        return self.vault.snapshot()
     
     def save_document_vault(self):
-        os.makedirs(os.path.dirname(self.vault_path), exist_ok=True)
-        """Save document vault to file"""
-        with open(self.vault_path, "w", encoding="utf-8") as f:
-            json.dump(self.document_vault, f, ensure_ascii=False, indent=2)
+        """Fold pending journal entries into document_vault.json"""
+        self.vault.compact()
     
     def add_document(self, doc_name, doc_type, validity, file_path, tags=None):
-        """Add document to company vault"""
-        new_doc = {
-            "id": f"DOC-{len(self.document_vault['documents']) + 1:04d}",
-            "name": doc_name,
-            "type": doc_type,
-            "validity": validity,
-            "path": file_path,
-            "tags": tags or [],
-            "added_date": datetime.now().isoformat()
-        }
-        self.document_vault['documents'].append(new_doc)
-        
-        # Update categories
-        if doc_type not in self.document_vault['categories']:
-            self.document_vault['categories'][doc_type] = []
-        self.document_vault['categories'][doc_type].append(new_doc['id'])
-        
-        self.save_document_vault()
-        return new_doc
+        """Add document to company vault (re-adding the same content is a no-op)"""
+        return self.vault.add(doc_name, doc_type, validity, file_path, tags)
     
-    def check_compliance(self, required_docs):
+    def check_compliance(self, required_docs, on_date=None):
         """
         Check compliance with tender document requirements
         
         Args:
             required_docs: list of required document types
+            on_date: ISO date the documents must be valid on (default today)
         
         Returns:
-            dict: compliance report with missing documents
+            dict: compliance report with missing and expired documents
         """
-        available_types = set(doc['type'] for doc in self.document_vault['documents'])
-        
-        missing = []
-        for doc_type in required_docs:
-            if doc_type not in available_types:
-                missing.append(doc_type)
-        
-        compliance_score = 1 - (len(missing) / len(required_docs)) if required_docs else 1.0
-        
-        return {
-            "required_documents": required_docs,
-            "available_documents": list(available_types),  # Convert set to list
-            "missing_documents": missing,
-            "compliance_score": compliance_score,
-            "is_compliant": len(missing) == 0
-        }
+        return self.vault.check_compliance(required_docs, on_date)
     
-    def suggest_alternatives(self, missing_docs):
-        """Suggest similar documents for missing requirements"""
-        suggestions = {}
-        doc_types = set(doc['type'] for doc in self.document_vault['documents'])
-        
-        for doc in missing_docs:
-            # Simple matching - in real app use NLP similarity
-            matches = [t for t in doc_types if doc.lower() in t.lower()]
-            suggestions[doc] = matches
-        
-        return suggestions
+    def suggest_alternatives(self, missing_docs, limit=5):
+        """Suggest similar documents for missing requirements (scored, best first)"""
+        return self.vault.suggest_alternatives(missing_docs, limit)
 
 class ProfitabilityAnalyzer:
     """Analyze tender profitability considering costs, risks, and timeline"""
     
-    def __init__(self, avk5_estimator):
+    def __init__(self, avk5_estimator, market=None, issuers=None):
         self.estimator = avk5_estimator
+        self.market = market    # MarketLookup; the shared market aggregates when None
+        self.issuers = issuers  # IssuerIndex; the tender store's when None
+
+    def _issuer_index(self):
+        return self.issuers if self.issuers is not None else default_index()
+
+    def issuer_stats(self, tender_data):
+        """The buyer's track record by EDRPOU (None without an issuer_id or enough tenders)"""
+        index = self._issuer_index() if tender_data.get("issuer_id") else None
+        return index.get(tender_data["issuer_id"]) if index is not None else None
+
+    def market_stats(self, tender_data):
+        """Award history for the tender's issuer/CPV/region (None without those keys or enough awards)"""
+        if not any(tender_data.get(k) for k in ("cpv", "region", "issuer_id")):
+            return None
+        market = self.market if self.market is not None else default_lookup()
+        return market.lookup(tender_data.get("cpv"), tender_data.get("region"), tender_data.get("issuer_id"))
+
+    @staticmethod
+    def bid_discount(stats):
+        """Typical winning discount to budget, bounded to 0-50%"""
+        discount = (stats or {}).get("median_discount")
+        return min(max(float(discount), 0.0), 0.5) if discount is not None else 0.0
     
+    @metrics.timed("score.analyze_tender")
     def analyze_tender(self, tender_data, company_resources):
         """
         Comprehensive profitability analysis for a tender
@@ -308,12 +295,14 @@ class ProfitabilityAnalyzer:
             dict: enriched profitability analysis report
         """
         # Estimate cost from materials, labor, and equipment
-        cost_estimate = self.estimator.calculate_estimate(
-            tender_data.get("materials", {}),
-            tender_data.get("labor", {}),
-            tender_data.get("equipment", {})
-        )
-        estimated_cost = cost_estimate["final_price"]
+        with metrics.span("estimate.avk5"):
+            cost_estimate = self.estimator.calculate_estimate(
+                tender_data.get("materials", {}),
+                tender_data.get("labor", {}),
+                tender_data.get("equipment", {})
+            )
+        # AVK5 line items when given, else the cost the caller estimated (custom materials)
+        estimated_cost = cost_estimate["final_price"] or float(tender_data.get("estimated_cost") or 0)
 
         # Extract tender value safely
         tender_value = tender_data.get("budget", 0)
@@ -322,8 +311,12 @@ class ProfitabilityAnalyzer:
         except:
             tender_value = 0.0
 
-        gross_profit = tender_value - estimated_cost
-        profit_margin = gross_profit / tender_value if tender_value else 0
+        # Price at the typical winning discount for comparable past tenders
+        market = self.market_stats(tender_data)
+        bid_price = tender_value * (1 - self.bid_discount(market))
+
+        gross_profit = bid_price - estimated_cost
+        profit_margin = gross_profit / bid_price if bid_price else 0
 
         # Resource gap
         resource_gap = self.analyze_resource_gap(
@@ -334,11 +327,14 @@ class ProfitabilityAnalyzer:
         # Timeline feasibility
         timeline_feasibility = self.assess_timeline(
             tender_data.get("timeline", {}),
-            company_resources.get("current_projects", [])
+            company_resources.get("current_projects", []),
+            tender_data.get("resource_requirements", {}),
+            company_resources
         )
 
         # Risk scoring
-        risk_factors = self.assess_risks(tender_data)
+        buyer = self.issuer_stats(tender_data)
+        risk_factors = self.assess_risks(tender_data, market, buyer)
 
         # ROI Score
         roi_score = self.calculate_roi_score(
@@ -350,6 +346,7 @@ class ProfitabilityAnalyzer:
 
         return {
             "tender_value": tender_value,
+            "bid_price": bid_price,
             "estimated_cost": estimated_cost,
             "gross_profit": gross_profit,
             "profit_margin": profit_margin,
@@ -358,10 +355,140 @@ class ProfitabilityAnalyzer:
             "timeline_feasibility": timeline_feasibility,
             "risk_factors": risk_factors,
             "roi_score": roi_score,
-            "recommendation": "BID" if roi_score >= 70 else "NO-BID"
+            "recommendation": "BID" if roi_score >= 70 else "NO-BID",
+            "market": market and {
+                "level": market["level"],
+                "tenders": int(market["tenders"]),
+                "typical_discount": self.bid_discount(market),
+                "bidders": market["median_bidders"],
+                "single_bidder_share": market["single_bidder_share"],
+                "top_suppliers": market["top_suppliers"],
+            },
+            "buyer": buyer
         }
 
     
+    @metrics.timed("score.analyze_many")
+    def analyze_many(self, tenders, company_resources):
+        """
+        Vectorized profitability analysis for a whole table of tenders
+
+        Produces the same numbers as analyze_tender, one row per tender.
+
+        Args:
+            tenders: DataFrame, pyarrow Table or list of tender dicts
+                (same keys as analyze_tender's tender_data)
+            company_resources: dict with company capabilities
+
+        Returns:
+            DataFrame: input columns plus margin, resource gap, timeline,
+            risk and ROI columns, ranked by roi_score (original index kept)
+        """
+        import pandas as pd
+
+        if hasattr(tenders, "to_pandas"):
+            tenders = tenders.to_pandas()
+        df = pd.DataFrame(tenders).copy()
+        n = len(df)
+
+        def column(name, default):
+            if name in df.columns:
+                return df[name].where(df[name].notna(), default)
+            return pd.Series([default] * n, index=df.index, dtype=object)
+
+        def dict_column(name):
+            return [v if isinstance(v, dict) else {} for v in column(name, None)]
+
+        # Estimated cost (breakdowns are nested dicts, so only this step is per row)
+        if {"materials", "labor", "equipment"} & set(df.columns):
+            with metrics.span("estimate.avk5_batch", rows=n):
+                estimated_cost = pd.Series([
+                    self.estimator.calculate_estimate(m, l, e)["final_price"]
+                    for m, l, e in zip(dict_column("materials"), dict_column("labor"), dict_column("equipment"))
+                ], index=df.index, dtype=float)
+        else:
+            estimated_cost = pd.Series(0.0, index=df.index)
+        given_cost = pd.to_numeric(column("estimated_cost", 0), errors="coerce").fillna(0.0)
+        estimated_cost = estimated_cost.where(estimated_cost != 0, given_cost).astype(float)
+
+        # Tender value, same parsing rule as analyze_tender
+        first_token = column("budget", 0).astype(str).str.replace(",", "", regex=False).str.split().str[0]
+        tender_value = pd.to_numeric(first_token, errors="coerce").fillna(0.0)
+
+        # Market aggregates, looked up once per distinct (cpv, region, issuer)
+        keys = list(zip(*(column(k, "").astype(str) for k in ("cpv", "region", "issuer_id"))))
+        looked_up = {}
+        for key in set(keys):
+            looked_up[key] = self.market_stats(dict(zip(("cpv", "region", "issuer_id"), key))) or {}
+        stats = [looked_up[key] for key in keys]
+        discount = pd.Series([self.bid_discount(s) for s in stats], index=df.index, dtype=float)
+        market_bidders = pd.Series([s.get("median_bidders") for s in stats], index=df.index, dtype=float)
+        df["market_level"] = [s.get("level") for s in stats]
+
+        # Buyer track record, one batched primary-key lookup
+        issuer_ids = column("issuer_id", "").astype(str)
+        index = self._issuer_index() if (issuer_ids != "").any() else None
+        buyers = index.get_many(issuer_ids) if index is not None else {}
+        df["buyer_risk"] = pd.Series([(buyers.get(i) or {}).get("buyer_risk") for i in issuer_ids],
+                                     index=df.index, dtype=float)
+        df["typical_discount"] = discount
+
+        df["tender_value"] = tender_value
+        df["bid_price"] = bid_price = tender_value * (1 - discount)
+        df["estimated_cost"] = estimated_cost
+        df["gross_profit"] = bid_price - estimated_cost
+        df["profit_margin"] = np.where(bid_price != 0, df["gross_profit"] / bid_price.where(bid_price != 0, 1), 0.0)
+
+        # Resource gap
+        requirements = dict_column("resource_requirements")
+        required = pd.DataFrame(requirements, index=df.index)
+        if required.shape[1]:
+            available = pd.Series({r: company_resources.get(r, 0) for r in required.columns})
+            gap = required - available
+            present = required.notna()
+            for resource in required.columns:
+                df[f"gap_{resource}"] = gap[resource]
+            covered = ((gap <= 0) & present).sum(axis=1)
+            total = present.sum(axis=1)
+            df["resource_availability_score"] = np.where(total > 0, covered / total.where(total > 0, 1) * 100, 100.0)
+        else:
+            df["resource_availability_score"] = 100.0
+
+        # Timeline feasibility on one shared schedule
+        timelines = dict_column("timeline")
+        scheduler = CapacityScheduler(company_resources)
+        feasibility = pd.DataFrame(scheduler.check_many([
+            {
+                "duration_days": t.get("duration_days", 0),
+                "start_date": t.get("start_date"),
+                "resource_requirements": r
+            } for t, r in zip(timelines, requirements)
+        ]), index=df.index)
+        df["feasibility_score"] = feasibility["feasibility_score"] if n else pd.Series(dtype=float)
+        df["earliest_start"] = feasibility["earliest_start"] if n else pd.Series(dtype=object)
+        df["is_feasible"] = feasibility["is_feasible"] if n else pd.Series(dtype=bool)
+
+        # Risk components
+        df["technical_complexity"] = pd.to_numeric(column("complexity", 0)).astype(float) * 0.3
+        df["payment_terms_risk"] = np.where(column("payment_terms", "") == "deferred", 0.4, 0.1)
+        df["penalty_clauses"] = np.where(column("has_penalties", False).astype(bool), 0.2, 0.05)
+        competitors = market_bidders.fillna(pd.to_numeric(column("competitors", 0)).astype(float))
+        df["market_bidders"] = market_bidders
+        df["competition_level"] = np.minimum(1.0, competitors * 0.1)
+        df["composite_risk"] = (df[[
+            "technical_complexity", "payment_terms_risk", "penalty_clauses", "competition_level"
+        ]].sum(axis=1) + df["buyer_risk"].fillna(0)) / (4 + df["buyer_risk"].notna())
+
+        df["roi_score"] = self.calculate_roi_score(
+            df["profit_margin"],
+            df["composite_risk"],
+            df["resource_availability_score"],
+            df["feasibility_score"]
+        )
+        df["recommendation"] = np.where(df["roi_score"] >= 70, "BID", "NO-BID")
+
+        return df.sort_values("roi_score", ascending=False, kind="stable")
+    
     def analyze_resource_gap(self, requirements, resources):
         """Analyze gap between required and available resources"""
         gap_analysis = {}
@@ -389,30 +516,43 @@ class ProfitabilityAnalyzer:
             "resource_availability_score": (availability_score / total_resources) * 100 if total_resources else 100
         }
     
-    def assess_timeline(self, timeline, current_projects):
-        """Assess timeline feasibility considering current workload"""
-        required_duration = timeline.get("duration_days", 0)
-        start_date = timeline.get("start_date")
+    def assess_timeline(self, timeline, current_projects, requirements=None, company_resources=None):
+        """Assess timeline feasibility against the company's dated resource schedule"""
+        resources = dict(company_resources or {})
+        resources["current_projects"] = current_projects
+        scheduler = CapacityScheduler(resources)
         
-        # Simplified - in real app use project scheduling
-        current_workload = sum(proj["duration"] for proj in current_projects)
-        feasibility_score = max(0, 100 - (current_workload / 30) * 100)  # Assume 30 days max capacity
-        
-        return {
-            "required_duration": required_duration,
-            "current_workload": current_workload,
-            "feasibility_score": feasibility_score,
-            "is_feasible": feasibility_score >= 70
-        }
+        return scheduler.check_feasibility(
+            timeline.get("duration_days", 0),
+            requirements or {},
+            timeline.get("start_date")
+        )
     
-    def assess_risks(self, tender_data):
-        """Assess project risks based on tender details"""
+    def assess_risks(self, tender_data, market=_LOOKUP, buyer=_LOOKUP):
+        """
+        Assess project risks based on tender details
+
+        Competition comes from the typical bidder count of comparable past
+        tenders when market data exists (market: market_stats() result),
+        otherwise from tender_data["competitors"]. A buyer_risk factor is
+        added when the issuer has a track record (buyer: issuer_stats() result).
+        Either is looked up only when not passed; an explicit None means none found.
+        """
+        if market is _LOOKUP:
+            market = self.market_stats(tender_data)
+        competitors = (market or {}).get("median_bidders")
+        if competitors is None:
+            competitors = tender_data.get("competitors", 0)
         risks = {
             "technical_complexity": tender_data.get("complexity", 0) * 0.3,
             "payment_terms": 0.4 if tender_data.get("payment_terms") == "deferred" else 0.1,
             "penalty_clauses": 0.2 if tender_data.get("has_penalties") else 0.05,
-            "competition_level": min(1.0, tender_data.get("competitors", 0) * 0.1)
+            "competition_level": min(1.0, competitors * 0.1)
         }
+        if buyer is _LOOKUP:
+            buyer = self.issuer_stats(tender_data)
+        if buyer:
+            risks["buyer_risk"] = buyer["buyer_risk"]
         
         composite_risk = sum(risks.values()) / len(risks) if risks else 0
         risks["composite_risk"] = composite_risk
@@ -474,8 +614,10 @@ if __name__ == "__main__":
         "engineers": 3,
         "vehicles": 2,
         "current_projects": [
-            {"name": "Hospital Project", "duration": 45},
-            {"name": "Apartment Building", "duration": 30}
+            {"name": "Hospital Project", "duration": 45, "start_date": "2025-08-01",
+             "workers": 8, "engineers": 1, "vehicles": 1},
+            {"name": "Apartment Building", "duration": 30, "start_date": "2025-10-15",
+             "workers": 4, "engineers": 1, "vehicles": 1}
         ]
     }
     
@@ -0,0 +1,257 @@
+# semantic_index.py
+import json
+import os
+import sys
+import time
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.priority_queue import slack_days
+from core.tender_text import build_tender_text
+from core.text_utils import tokenize
+
+INDEX_DIR = "/opt/render/project/src/data/semantic_index"
+TENDER_DIR = "/opt/render/project/src/tenders"
+EMBEDDING_DIM = 512
+
+
+def _word_and_char_ngrams(text):
+    """Stemmed words plus their 3-5 character n-grams, so inflections and typos still overlap"""
+    features = []
+    for token in tokenize(text):
+        features.append(token)
+        padded = f"<{token}>"
+        for n in (3, 4, 5):
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return features
+
+
+class HashedNgramEmbedder:
+    """CPU-only text embedder: hashed word/char n-grams projected into a fixed dense space"""
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.dim = dim
+        self.hasher = HashingVectorizer(
+            analyzer=_word_and_char_ngrams, n_features=dim,
+            alternate_sign=True, norm="l2", dtype=np.float32
+        )
+
+    def embed(self, texts):
+        """Return an (n, dim) float32 array of L2-normalized vectors"""
+        return self.hasher.transform(list(texts)).toarray()
+
+
+class IVFIndex:
+    """Inverted-file ANN index: k-means coarse cells, exact cosine search inside the probed cells"""
+
+    def __init__(self, dim=EMBEDDING_DIM, nlist=None, nprobe=8):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = np.zeros((0, dim), dtype=np.float32)
+        self.vectors = np.zeros((0, dim), dtype=np.float32)  # stored grouped by cell
+        self.offsets = np.zeros(1, dtype=np.int64)            # cell c is vectors[offsets[c]:offsets[c+1]]
+        self.ids = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _normalize(x):
+        norms = np.linalg.norm(x, axis=1, keepdims=True)
+        return x / np.where(norms == 0, 1, norms)
+
+    def train(self, vectors, iterations=10, seed=0):
+        """Spherical k-means over a sample of vectors to place the coarse cells"""
+        nlist = self.nlist or max(1, int(np.sqrt(len(vectors))))
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), min(len(vectors), nlist * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), min(nlist, len(sample)), replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(len(centroids)):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = self._normalize(centroids)
+        self.centroids = centroids.astype(np.float32)
+        self.offsets = np.zeros(len(self.centroids) + 1, dtype=np.int64)
+
+    def _needs_training(self, count):
+        """True when the coarse cells are missing or the index has outgrown them by 2× (4× the vectors)"""
+        target = self.nlist or max(1, int(np.sqrt(count)))
+        return len(self.centroids) * 2 <= min(target, count)
+
+    def add(self, ids, vectors):
+        """
+        Add vectors (re-adding an id replaces its previous vector)
+
+        The cells are (re)trained on everything indexed so far whenever the
+        index has outgrown them, so a small first batch does not leave later
+        searches scanning a handful of huge cells.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        replaced = set(ids)
+        keep = np.array([i not in replaced for i in self.ids], dtype=bool)
+        all_ids = [i for i, kept in zip(self.ids, keep) if kept] + list(ids)
+        all_vectors = np.vstack([np.asarray(self.vectors)[keep], vectors])
+        if all_ids and self._needs_training(len(all_ids)):
+            self.train(all_vectors)
+
+        cells = np.argmax(all_vectors @ self.centroids.T, axis=1) if len(all_ids) else np.zeros(0, dtype=int)
+        order = np.argsort(cells, kind="stable")
+        self.vectors = all_vectors[order]
+        self.ids = [all_ids[i] for i in order]
+        counts = np.bincount(cells, minlength=len(self.centroids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def search(self, query, k=10, nprobe=None):
+        """
+        Return the top-k (id, cosine score) pairs for a single query vector
+
+        Only the `nprobe` cells closest to the query are scanned.
+        """
+        if not len(self.ids):
+            return []
+        query = self._normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        cells = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in cells])
+        if not len(rows):
+            return []
+        scores = self.vectors[rows] @ query
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[rows[i]], float(scores[i])) for i in top]
+
+    def save(self, index_dir=INDEX_DIR):
+        """Write the index as .npy files plus an id list"""
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, "centroids.npy"), self.centroids)
+        np.save(os.path.join(index_dir, "vectors.npy"), self.vectors)
+        np.save(os.path.join(index_dir, "offsets.npy"), self.offsets)
+        with open(os.path.join(index_dir, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "nprobe": self.nprobe, "ids": self.ids}, f)
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR):
+        """Load an index; vectors are memory-mapped so only probed cells are read from disk"""
+        with open(os.path.join(index_dir, "ids.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(dim=meta["dim"], nprobe=meta["nprobe"])
+        index.centroids = np.load(os.path.join(index_dir, "centroids.npy"))
+        index.vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+        index.offsets = np.load(os.path.join(index_dir, "offsets.npy"))
+        index.ids = meta["ids"]
+        return index
+
+
+class TenderMatcher:
+    """Answer "which open tenders fit us" with a nearest-neighbour lookup instead of rescoring"""
+
+    def __init__(self, company_profile, index_dir=INDEX_DIR, tender_dir=TENDER_DIR):
+        """
+        Args:
+            company_profile: CompanyProfile instance or its profile dict
+            index_dir: directory holding the on-disk IVF index
+            tender_dir: folder with ProZorro_{id}.json files (used for past wins)
+        """
+        self.profile = getattr(company_profile, "profile", company_profile)
+        self.index_dir = index_dir
+        self.tender_dir = tender_dir
+        self.embedder = HashedNgramEmbedder()
+        if os.path.exists(os.path.join(index_dir, "ids.json")):
+            self.index = IVFIndex.load(index_dir)
+        else:
+            self.index = IVFIndex(dim=self.embedder.dim)
+        self.deadlines = {}  # tender id → tenderPeriod.endDate
+        deadlines_path = os.path.join(index_dir, "deadlines.json")
+        if os.path.exists(deadlines_path):
+            with open(deadlines_path, "r", encoding="utf-8") as f:
+                self.deadlines = json.load(f)
+
+    def save(self):
+        self.index.save(self.index_dir)
+        with open(os.path.join(self.index_dir, "deadlines.json"), "w", encoding="utf-8") as f:
+            json.dump(self.deadlines, f)
+
+    def index_tenders(self, tenders, save=True):
+        """
+        Embed and index tenders
+
+        Args:
+            tenders: iterable of ProZorro tender dicts (must contain "id")
+        """
+        tenders = list(tenders)
+        if not tenders:
+            return 0
+        vectors = self.embedder.embed(build_tender_text(t) for t in tenders)
+        self.index.add([t["id"] for t in tenders], vectors)
+        for t in tenders:
+            self.deadlines[t["id"]] = (t.get("tenderPeriod") or {}).get("endDate")
+        if save:
+            self.save()
+        return len(tenders)
+
+    def index_directory(self, save=True):
+        """Index every ProZorro_*.json file in the tender folder"""
+        tenders = []
+        for filename in os.listdir(self.tender_dir):
+            if filename.startswith("ProZorro_") and filename.endswith(".json"):
+                with open(os.path.join(self.tender_dir, filename), "r", encoding="utf-8") as f:
+                    tenders.append(json.load(f))
+        return self.index_tenders(tenders, save=save)
+
+    def company_texts(self):
+        """Capabilities plus texts of tenders the company has won before"""
+        texts = [" ".join(self.profile.get("capabilities", []) + self.profile.get("keywords", []))]
+        for record in self.profile.get("historical_performance", []):
+            if str(record.get("outcome", "")).lower() not in ("won", "win"):
+                continue
+            path = os.path.join(self.tender_dir, f"ProZorro_{record['tender_id']}.json")
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    texts.append(build_tender_text(json.load(f)))
+            elif record.get("lessons"):
+                texts.append(record["lessons"])
+        return [t for t in texts if t.strip()]
+
+    def company_vector(self):
+        """Mean embedding of the company's capabilities and past wins"""
+        vectors = self.embedder.embed(self.company_texts())
+        return vectors.mean(axis=0) if len(vectors) else np.zeros(self.embedder.dim, dtype=np.float32)
+
+    def is_open(self, tender_id, now=None):
+        """True unless the tender's submission deadline has passed (unknown deadlines count as open)"""
+        slack = slack_days(self.deadlines.get(tender_id), now)
+        return slack is None or slack > 0
+
+    def top_k(self, k=20, nprobe=None, open_only=True):
+        """
+        Return the k indexed tenders closest to the company profile as (tender_id, score)
+
+        With open_only, tenders past tenderPeriod.endDate are skipped; the search
+        widens until k open tenders are found or the probed cells run out.
+        """
+        query = self.company_vector()
+        if not open_only:
+            return self.index.search(query, k=k, nprobe=nprobe)
+        now = time.time()
+        fetch = k
+        while True:
+            hits = self.index.search(query, k=fetch, nprobe=nprobe)
+            found = [(i, score) for i, score in hits if self.is_open(i, now)]
+            if len(found) >= k or len(hits) < fetch:
+                return found[:k]
+            fetch *= 2
+
+
+if __name__ == "__main__":
+    from core.company_profile import CompanyProfile
+
+    matcher = TenderMatcher(CompanyProfile())
+    print(f"📚 Indexed {matcher.index_directory()} tenders")
+    for tender_id, score in matcher.top_k(10):
+        print(f"  {score:.3f}  {tender_id}")
@@ -0,0 +1,394 @@
+# synthetic.py
+"""
+Synthetic ProZorro-shaped tenders for load testing
+
+Every tender is a pure function of (index, seed), so a corpus of any size can
+be streamed without holding it in memory, regenerated identically, or served
+at random by index (the benchmark fixture server does exactly that).
+
+    python -m core.cli synth --count 1000000 --files /tmp/tenders --db /tmp/tenders.db
+"""
+import json
+import os
+import random
+import sys
+import zlib
+from datetime import datetime, timedelta, timezone
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+SEED = 42
+LOT_RATIO = 0.2          # share of multi-lot tenders
+COMPLETE_RATIO = 0.25    # share of completed tenders carrying bids, awards and contracts
+STEP_SECONDS = 1         # dateModified spacing between consecutive tenders
+STORE_BATCH = 1000       # store writes per transaction
+
+REGIONS = [  # locality, region, postal code, "… міської ради" form
+    ("Київ", "м. Київ", "01001", "Київської"), ("Львів", "Львівська область", "79000", "Львівської"),
+    ("Одеса", "Одеська область", "65000", "Одеської"), ("Харків", "Харківська область", "61000", "Харківської"),
+    ("Дніпро", "Дніпропетровська область", "49000", "Дніпровської"),
+    ("Вінниця", "Вінницька область", "21000", "Вінницької"), ("Полтава", "Полтавська область", "36000", "Полтавської"),
+    ("Житомир", "Житомирська область", "10000", "Житомирської"), ("Ужгород", "Закарпатська область", "88000", "Ужгородської"),
+    ("Чернігів", "Чернігівська область", "14000", "Чернігівської"), ("Бровари", "Київська область", "07400", "Броварської"),
+    ("Біла Церква", "Київська область", "09100", "Білоцерківської"),
+]
+ENTITIES = [
+    ("Управління освіти {council} міської ради", "general"),
+    ("КНП «Міська клінічна лікарня №{n}» {council} міської ради", "general"),
+    ("Департамент житлово-комунального господарства {council} міської ради", "general"),
+    ("Служба відновлення та розвитку інфраструктури ({region})", "authority"),
+    ("Виконавчий комітет {council} міської ради", "authority"),
+    ("КП «Водоканал» м. {city}", "special"),
+    ("Заклад загальної середньої освіти №{n} {council} міської ради", "general"),
+]
+STREETS = ["вул. Шевченка", "вул. Грушевського", "просп. Незалежності", "вул. Франка", "вул. Соборна", "вул. Лесі Українки"]
+
+# topic, CPV (ДК021), CPV description, title templates, item templates (description, unit)
+WORKS = [
+    ("Construction", "45261000-4", "Зведення каркасів покрівель і покрівельні роботи",
+     ["Капітальний ремонт покрівлі будівлі {obj}", "Поточний ремонт покрівлі {obj}"],
+     [("Демонтаж покрівельного покриття", "м2"), ("Улаштування покрівлі з профнастилу", "м2"),
+      ("Монтаж водостічної системи", "м")]),
+    ("Construction", "45453000-7", "Капітальний ремонт і реставрація",
+     ["Капітальний ремонт приміщень {obj}", "Реконструкція {obj} з термомодернізацією"],
+     [("Утеплення фасаду мінераловатними плитами", "м2"), ("Заміна віконних блоків", "шт"),
+      ("Улаштування підлог", "м2")]),
+    ("Construction", "45233142-6", "Ремонт доріг",
+     ["Поточний середній ремонт дороги по {street}", "Капітальний ремонт вулично-дорожньої мережі"],
+     [("Фрезерування асфальтобетонного покриття", "м2"), ("Улаштування покриття з асфальтобетону", "м2")]),
+    ("Construction", "45331100-7", "Монтаж систем центрального опалення",
+     ["Реконструкція системи опалення {obj}", "Монтаж індивідуального теплового пункту {obj}"],
+     [("Монтаж трубопроводів опалення", "м"), ("Монтаж радіаторів", "шт")]),
+    ("Construction", "45215100-8", "Будівельні роботи щодо будівель, пов’язаних з охороною здоров’я",
+     ["Будівництво амбулаторії загальної практики сімейної медицини", "Нове будівництво укриття {obj}"],
+     [("Улаштування фундаментів", "компл"), ("Монтаж каркасу будівлі", "компл")]),
+    ("IT", "48000000-8", "Пакети програмного забезпечення та інформаційні системи",
+     ["Закупівля ліцензій на програмне забезпечення", "Супровід інформаційної системи документообігу"],
+     [("Ліцензія на програмне забезпечення", "шт"), ("Послуги технічної підтримки", "міс")]),
+    ("IT", "30210000-4", "Машини для обробки даних (апаратна частина)",
+     ["Закупівля комп’ютерної техніки для {obj}", "Постачання серверного обладнання"],
+     [("Комп’ютер персональний", "шт"), ("Сервер стійковий", "шт"), ("Монітор 24\"", "шт")]),
+    ("Medicine", "33100000-1", "Медичне обладнання",
+     ["Закупівля медичного обладнання для {obj}", "Постачання апарату УЗД"],
+     [("Апарат ультразвукової діагностики", "шт"), ("Монітор пацієнта", "шт")]),
+    ("Medicine", "33600000-6", "Фармацевтична продукція",
+     ["Закупівля лікарських засобів", "Постачання медикаментів для потреб лікарні"],
+     [("Лікарський засіб (за МНН)", "уп"), ("Розчин для інфузій", "фл")]),
+    ("Transport", "34110000-1", "Легкові автомобілі",
+     ["Закупівля легкового автомобіля", "Постачання шкільного автобуса"],
+     [("Автомобіль легковий", "шт"), ("Автобус шкільний", "шт")]),
+    ("Education", "39160000-1", "Шкільні меблі",
+     ["Закупівля меблів для {obj}", "Постачання обладнання для кабінету фізики"],
+     [("Парта учнівська двомісна", "шт"), ("Стілець учнівський", "шт")]),
+]
+OBJECTS = ["школи №{n}", "дитячого садка №{n}", "міської лікарні №{n}", "ліцею «Гармонія»", "адміністративної будівлі",
+           "гуртожитку", "спортивного комплексу", "будинку культури"]
+REQUIREMENTS = [
+    ("Досвід виконання аналогічних договорів", "integer", "не менше {k}"),
+    ("Наявність обладнання та матеріально-технічної бази", "boolean", True),
+    ("Наявність працівників відповідної кваліфікації", "integer", "не менше {k}"),
+    ("Гарантійний строк, років", "integer", "{k}"),
+    ("Кошторисна документація складена в ПК АВК-5", "boolean", True),
+    ("Наявність сертифіката ISO 9001", "boolean", True),
+]
+DOCUMENTS = ["Тендерна документація.pdf", "Проєкт договору.docx", "Технічне завдання.pdf",
+             "Дефектний акт.xlsx", "Кошторис.pdf", "Інструкція з підготовки тендерної пропозиції.pdf"]
+SUPPLIERS = ["ТОВ «Будівельна компанія Граніт»", "ТОВ «Укрбудсервіс»", "ПП «Ремонтбуд-Схід»", "ТОВ «Дорбудтрест»",
+             "ТОВ «Фармацевтична компанія Вітал»", "ТОВ «Медтехпостач»", "ФОП Коваленко О.П.", "ТОВ «Енергомонтаж»",
+             "ТОВ «Альфа-Буд»", "ТОВ «Західбудінвест»"]
+CANCELLATION_REASONS = ["Відсутність подальшої потреби в закупівлі", "Скорочення видатків на здійснення закупівлі",
+                        "Неможливість усунення порушень законодавства"]
+METHODS = ["aboveThresholdUA", "aboveThresholdUA", "belowThreshold", "aboveThresholdEU"]
+
+
+def topic_of(tender):
+    """Topic of a generated tender, from its first item's CPV code"""
+    cpv = tender.get("items", [{}])[0].get("classification", {}).get("id")
+    return next((topic for topic, code, *_ in WORKS if code == cpv), None)
+
+
+def _hex(rng):
+    return f"{rng.getrandbits(128):032x}"
+
+
+def _requirements(rng, work_topic):
+    picked = rng.sample(REQUIREMENTS, rng.randint(2, 4))
+    if work_topic == "Construction" and REQUIREMENTS[4] not in picked and rng.random() < 0.6:
+        picked.append(REQUIREMENTS[4])
+    return [{
+        "id": _hex(rng),
+        "title": title,
+        "dataType": data_type,
+        "status": "active",
+        "expectedValue": value.format(k=rng.randint(1, 10)) if isinstance(value, str) else value
+    } for title, data_type, value in picked]
+
+
+def _complete(tender, rng):
+    """Close a tender: bids (more bidders → deeper discount), the lowest one awarded and contracted"""
+    tender["status"] = "complete"
+    units = [(lot["id"], lot["value"]["amount"]) for lot in tender.get("lots", [])] or [(None, tender["value"]["amount"])]
+    bidders = rng.sample(SUPPLIERS, rng.randint(1, 6))
+    tender["numberOfBids"] = len(bidders)
+    tender["bids"], tender["awards"], tender["contracts"] = [], [], []
+    offers = {}
+    for name in bidders:
+        tenderer = {"name": name, "identifier": {"scheme": "UA-EDR", "id": f"{zlib.crc32(name.encode()) % 100_000_000:08d}",
+                                                 "legalName": name}}
+        values = []
+        for lot_id, budget in units:
+            discount = min(0.4, max(0.0, rng.gauss(0.015 + 0.025 * len(bidders), 0.02)))
+            amount = round(budget * (1 - discount), 2)
+            offers.setdefault(lot_id, []).append((amount, tenderer))
+            values.append({"value": {"amount": amount, "currency": "UAH"}, **({"relatedLot": lot_id} if lot_id else {})})
+        bid = {"id": _hex(rng), "status": "active", "tenderers": [tenderer], "date": tender["tenderPeriod"]["endDate"]}
+        bid.update({"lotValues": values} if tender.get("lots") else values[0])
+        tender["bids"].append(bid)
+    for lot_id, lot_offers in offers.items():
+        amount, supplier = min(lot_offers, key=lambda offer: offer[0])
+        award = {"id": _hex(rng), "status": "active", "date": tender["dateModified"], "suppliers": [supplier],
+                 "value": {"amount": amount, "currency": "UAH", "valueAddedTaxIncluded": True}}
+        if lot_id:
+            award["lotID"] = lot_id
+        tender["awards"].append(award)
+        signed = datetime.fromisoformat(tender["tenderPeriod"]["endDate"]) + timedelta(days=rng.randint(5, 40))
+        tender["contracts"].append({"id": _hex(rng), "awardID": award["id"], "status": "active", "suppliers": [supplier],
+                                    "value": dict(award["value"]), "dateSigned": signed.isoformat()})
+
+
+def generate_tender(index, seed=SEED, modified=None, lot_ratio=LOT_RATIO, topics=None, complete_ratio=COMPLETE_RATIO):
+    """
+    One ProZorro API 2.4 tender document
+
+    Args:
+        index: position in the corpus; also the 32-hex-digit tender id
+        modified: dateModified (defaults to now - index seconds)
+        topics: restrict to these WORKS topics (e.g. ["Construction"])
+        complete_ratio: share of tenders generated already completed, with bids, awards and contracts
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    modified = modified or datetime.now(timezone.utc).replace(microsecond=0) - timedelta(seconds=index * STEP_SECONDS)
+    works = [w for w in WORKS if not topics or w[0] in topics] or WORKS
+    work_topic, cpv, cpv_desc, titles, item_templates = rng.choice(works)
+
+    city, region, postal, council = rng.choice(REGIONS)
+    n = rng.randint(1, 150)
+    entity_template, kind = rng.choice(ENTITIES)
+    entity = entity_template.format(city=city, council=council, region=region, n=n)
+    obj = rng.choice(OBJECTS).format(n=n)
+    title = rng.choice(titles).format(obj=obj, street=rng.choice(STREETS))
+    address = {"countryName": "Україна", "region": region, "locality": city,
+               "streetAddress": f"{rng.choice(STREETS)}, {rng.randint(1, 120)}", "postalCode": postal}
+
+    start = modified - timedelta(days=rng.randint(0, 10))
+    end = start + timedelta(days=rng.randint(7, 45))
+    amount = float(rng.randint(50, 40_000) * 1000)
+
+    lot_count = rng.randint(2, 5) if rng.random() < lot_ratio else 0
+    lots = [{
+        "id": _hex(rng),
+        "title": f"Лот {k + 1}: {rng.choice(item_templates)[0].lower()}",
+        "status": "active",
+        "value": {"amount": round(amount / lot_count, 2), "currency": "UAH", "valueAddedTaxIncluded": True}
+    } for k in range(lot_count)]
+
+    items = []
+    for k in range(rng.randint(1, 6)):
+        description, unit = rng.choice(item_templates)
+        item = {
+            "id": _hex(rng),
+            "description": description,
+            "quantity": rng.randint(1, 5000),
+            "unit": {"name": unit},
+            "classification": {"scheme": "ДК021", "id": cpv, "description": cpv_desc},
+            "deliveryAddress": address,
+            "deliveryDate": {"endDate": (end + timedelta(days=rng.randint(30, 240))).isoformat()},
+        }
+        if lots:
+            item["relatedLot"] = lots[k % lot_count]["id"]
+        items.append(item)
+
+    criteria = [{
+        "id": _hex(rng),
+        "title": "Технічні, якісні та кількісні характеристики предмета закупівлі",
+        "source": "tenderer",
+        "classification": {"scheme": "ESPD211", "id": "CRITERION.OTHER.SUBJECT_OF_PROCUREMENT.TECHNICAL_FEATURES"},
+        "requirementGroups": [{"id": _hex(rng), "description": "Підтверджується тендерною пропозицією",
+                               "requirements": _requirements(rng, work_topic)}]
+    }]
+    if rng.random() < 0.7:
+        criteria.append({
+            "id": _hex(rng),
+            "title": "Наявність документально підтвердженого досвіду виконання аналогічних договорів",
+            "source": "tenderer",
+            "classification": {"scheme": "ESPD211", "id": "CRITERION.SELECTION.TECHNICAL_PROFESSIONAL_ABILITY.REFERENCES"},
+            "requirementGroups": [{"id": _hex(rng), "requirements": [{
+                "id": _hex(rng), "title": "Кількість аналогічних договорів", "dataType": "integer",
+                "minValue": rng.randint(1, 3)}]}]
+        })
+
+    tender = {
+        "id": f"{index:032x}",
+        "tenderID": f"UA-{start:%Y-%m-%d}-{index % 1_000_000:06d}-{'abcd'[index % 4]}",
+        "date": start.isoformat(),
+        "dateModified": modified.isoformat(),
+        "status": "active.tendering",
+        "procurementMethod": "open",
+        "procurementMethodType": rng.choice(METHODS),
+        "mainProcurementCategory": "works" if work_topic == "Construction" else "goods",
+        "title": title,
+        "description": f"{title}. {cpv_desc}. Місце виконання: {city}, {region}.",
+        "procuringEntity": {
+            "name": entity,
+            "kind": kind,
+            "identifier": {"scheme": "UA-EDR", "id": f"{zlib.crc32(entity.encode()) % 100_000_000:08d}",
+                           "legalName": entity},
+            "address": address,
+            "contactPoint": {"name": rng.choice(["Олена Коваль", "Іван Мельник", "Оксана Бондар", "Петро Шевчук"]),
+                             "telephone": f"+38044{rng.randint(1_000_000, 9_999_999)}",
+                             "email": f"tender{n}@example.gov.ua"},
+        },
+        "value": {"amount": amount, "currency": "UAH", "valueAddedTaxIncluded": True},
+        "minimalStep": {"amount": round(amount * 0.005, 2), "currency": "UAH", "valueAddedTaxIncluded": True},
+        "tenderPeriod": {"startDate": start.isoformat(), "endDate": end.isoformat()},
+        "enquiryPeriod": {"startDate": start.isoformat(), "endDate": (end - timedelta(days=3)).isoformat()},
+        "items": items,
+        "criteria": criteria,
+        "documents": [{"id": _hex(rng), "title": doc, "format": "application/pdf",
+                       "datePublished": start.isoformat()}
+                      for doc in rng.sample(DOCUMENTS, rng.randint(2, 5))],
+    }
+    if lots:
+        tender["lots"] = lots
+    if rng.random() < complete_ratio:
+        _complete(tender, rng)
+    # A few buyers cancel and draw complaints far more often than the rest
+    troubled = zlib.crc32(entity.encode()) % 5 == 0
+    if tender["status"] != "complete" and rng.random() < (0.3 if troubled else 0.04):
+        tender["status"] = "cancelled"
+        tender["cancellations"] = [{"id": _hex(rng), "status": "active", "date": modified.isoformat(),
+                                    "reason": rng.choice(CANCELLATION_REASONS)}]
+    if rng.random() < (0.4 if troubled else 0.05):
+        tender["complaints"] = [{"id": _hex(rng), "type": "complaint", "status": rng.choice(["satisfied", "declined"]),
+                                 "title": "Дискримінаційні вимоги тендерної документації"}]
+    return tender
+
+
+def iter_tenders(count, seed=SEED, start_index=0, newest=None, **kwargs):
+    """Stream `count` tenders, newest first, one STEP_SECONDS apart in dateModified"""
+    newest = newest or datetime.now(timezone.utc).replace(microsecond=0)
+    for index in range(start_index, start_index + count):
+        yield generate_tender(index, seed, newest - timedelta(seconds=index * STEP_SECONDS), **kwargs)
+
+
+AMENDMENTS = ["deadline", "budget", "documents", "criteria"]
+
+
+def amend_tender(tender, kind=None, seed=SEED, minutes=60):
+    """
+    A later version of a tender with one typical amendment
+
+    Args:
+        kind: deadline (end date moved), budget (value changed), documents (a
+            clarification added), criteria (a requirement reworded) — random if None
+        minutes: how much later the new dateModified is
+    """
+    rng = random.Random(seed * 104729 + int(tender["id"], 16))
+    kind = kind or rng.choice(AMENDMENTS)
+    tender = json.loads(json.dumps(tender))
+    modified = datetime.fromisoformat(tender["dateModified"]) + timedelta(minutes=minutes)
+    tender["dateModified"] = modified.isoformat()
+    if kind == "deadline":
+        end = datetime.fromisoformat(tender["tenderPeriod"]["endDate"]) + timedelta(days=rng.randint(3, 14))
+        tender["tenderPeriod"]["endDate"] = end.isoformat()
+    elif kind == "budget":
+        tender["value"]["amount"] = round(tender["value"]["amount"] * rng.uniform(0.85, 1.2), 2)
+    elif kind == "documents":
+        tender.setdefault("documents", []).append({
+            "id": _hex(rng), "title": "Зміни до тендерної документації.pdf", "format": "application/pdf",
+            "documentType": "clarifications", "datePublished": modified.isoformat(),
+            "url": f"https://public-docs.prozorro.gov.ua/get/{_hex(rng)}",
+        })
+    elif kind == "criteria" and tender.get("criteria"):
+        requirement = tender["criteria"][0]["requirementGroups"][0]["requirements"][0]
+        requirement["title"] = f"{requirement['title']} (у редакції змін)"
+    return tender
+
+
+def analysis_record(tender, seed=SEED):
+    """What Claude's extraction returns for a tender, including the formatting noise seen in practice"""
+    rng = random.Random(seed * 7919 + int(tender["id"], 16))
+    topic = topic_of(tender) or "Construction"
+    address = tender["procuringEntity"]["address"]
+    amount = tender["value"]["amount"]
+    deadline = datetime.fromisoformat(tender["tenderPeriod"]["endDate"])
+    requirements = [r["title"] for c in tender.get("criteria", [])
+                    for g in c["requirementGroups"] for r in g["requirements"]]
+    return {
+        "tender_id": tender["id"],
+        "title": tender["title"],
+        "issuer": tender["procuringEntity"]["name"],
+        "deadline": rng.choice([deadline.strftime("%Y-%m-%d"), deadline.strftime("%d.%m.%Y"),
+                                deadline.isoformat(), "Not specified"]),
+        "budget": rng.choice([f"{amount:,.0f} UAH", f"{amount:.2f} UAH", f"UAH {amount:,.0f}", "Not specified"]),
+        "location": f"{address['locality']}, {address['region']}",
+        "project_type": rng.choice({
+            "Construction": ["Construction", "Renovation", "Road repair works", "Energy efficiency"],
+            "IT": ["IT services", "Software licensing"], "Medicine": ["Healthcare supply"],
+            "Transport": ["Transport logistics"], "Education": ["Education training"],
+        }[topic]),
+        "required_documents": requirements[:4] + ["Довідка про відсутність заборгованості"],
+        "avk5_required": any("АВК" in r for r in requirements),
+        "technical_specs": "; ".join(f"{i['description']} — {i['quantity']} {i['unit']['name']}" for i in tender["items"]),
+        "payment_terms": rng.choice(["standard", "deferred", "Оплата протягом 30 днів"]),
+        "resource_requirements": f"{rng.randint(2, 30)} workers, {rng.randint(0, 5)} engineers, {rng.randint(0, 6)} vehicles",
+        "timeline_feasibility": rng.choice(["adequate", "risky", "inadequate"]),
+        "profitability": rng.choice(["high", "medium", "low"]),
+        "Filename": f"ProZorro_{tender['id']}.json",
+        "cpv": tender["items"][0]["classification"]["id"].split("-")[0],
+    }
+
+
+# ---------------------- Writers ----------------------
+def write_files(tenders, output_dir):
+    """Save each tender as ProZorro_{id}.json; returns the number written"""
+    from core.downloader import save_tender
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = 0
+    for tender in tenders:
+        save_tender(tender, output_dir)
+        written += 1
+    return written
+
+
+def write_jsonl(tenders, path):
+    """One tender JSON per line"""
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for tender in tenders:
+            f.write(json.dumps(tender, ensure_ascii=False) + "\n")
+            written += 1
+    return written
+
+
+def write_store(tenders, store, analyses=False, batch=STORE_BATCH):
+    """Upsert tenders (and optionally synthetic analyses) into a TenderStore, STORE_BATCH per transaction"""
+    written = 0
+    pending = []
+
+    def commit():
+        with store.transaction():
+            for tender in pending:
+                store.upsert_tender(tender, topic=topic_of(tender), file=f"ProZorro_{tender['id']}.json")
+                if analyses:
+                    store.save_analysis(tender["id"], analysis_record(tender))
+        pending.clear()
+
+    for tender in tenders:
+        pending.append(tender)
+        written += 1
+        if len(pending) >= batch:
+            commit()
+    if pending:
+        commit()
+    return written
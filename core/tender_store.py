@@ -0,0 +1,260 @@
+# tender_store.py
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+STORE_PATH = "/opt/render/project/src/data/tenders.db"
+
+# upsert_tender outcomes
+NEW = "new"               # first time this tender is stored
+AMENDED = "amended"       # a newer version whose content changed
+UNCHANGED = "unchanged"   # same content (re-delivered, or only dateModified moved)
+STALE = "stale"           # older than the stored version; nothing written
+
+# Columns exposed by query_analyses: name -> SQL expression over the analyses table
+ANALYSIS_COLUMNS = {
+    "tender_id": "tender_id",
+    "title": "json_extract(analysis, '$.title')",
+    "issuer": "json_extract(analysis, '$.issuer')",
+    "budget": "json_extract(analysis, '$.budget')",
+    "deadline": "json_extract(analysis, '$.deadline')",
+    "location": "json_extract(analysis, '$.location')",
+    "project_type": "json_extract(analysis, '$.project_type')",
+    "profitability": "json_extract(analysis, '$.profitability')",
+    "timeline_feasibility": "json_extract(analysis, '$.timeline_feasibility')",
+    "duplicate_of": "duplicate_of",
+    "created_at": "created_at",
+}
+SEARCH_COLUMNS = ("title", "issuer", "location", "project_type")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenders (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    date_modified TEXT,
+    budget REAL,
+    topic TEXT,
+    file TEXT,
+    cluster_id TEXT,
+    data TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    tender_id TEXT PRIMARY KEY,
+    cluster_id TEXT,
+    duplicate_of TEXT,
+    analysis TEXT,
+    created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS scores (
+    tender_id TEXT PRIMARY KEY,
+    roi_score REAL,
+    recommendation TEXT,
+    evaluation TEXT,
+    created_at TEXT
+);
+"""
+
+
+def connect(db_path):
+    """Open a SQLite connection shared safely by the UI and worker processes"""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # SQLite's LOWER() only folds ASCII; Cyrillic titles need Python's casefold
+    conn.create_function("casefold", 1, lambda v: v.casefold() if isinstance(v, str) else v, deterministic=True)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class TenderStore:
+    """SQLite store for downloaded tenders and their Claude analyses"""
+
+    def __init__(self, db_path=STORE_PATH):
+        from core.amendments import AmendmentLog
+        from core.issuer_index import IssuerIndex
+
+        self.db_path = db_path
+        self.conn = connect(db_path)
+        self.conn.executescript(SCHEMA)
+        self.issuers = IssuerIndex(db_path, self.conn)
+        self.amendments = AmendmentLog(db_path, self.conn)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group writes into one commit (the connection autocommits otherwise)
+
+        IMMEDIATE takes the write lock up front: a deferred BEGIN that reads
+        first fails with "database is locked" on its upgrade to a write
+        instead of waiting. Joins an already open transaction.
+        """
+        if self.conn.in_transaction:
+            yield self
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    # ---------------------- Tenders ----------------------
+    def upsert_tender(self, tender_data, topic=None, file=None, cluster_id=None):
+        """
+        Insert or refresh a ProZorro tender (and its issuer's running totals)
+
+        An older version than the stored one is ignored, so the stored tender
+        stays the head of its amendment history. The read, the amendment log,
+        the write and the issuer update are one transaction, so concurrent
+        upserts of the same tender cannot log or count a version twice.
+
+        Returns:
+            dict: {"status": NEW | AMENDED | UNCHANGED | STALE, "tender_id",
+            "categories", "patch"}; categories and patch are only non-empty for AMENDED
+        """
+        with self.transaction():
+            return self._upsert_tender(tender_data, topic, file, cluster_id)
+
+    def _upsert_tender(self, tender_data, topic, file, cluster_id):
+        change = {"status": NEW, "tender_id": tender_data["id"], "categories": [], "patch": []}
+        previous = self.get_tender(tender_data["id"])
+        if previous:
+            if (previous.get("dateModified") or "") > (tender_data.get("dateModified") or ""):
+                return {**change, "status": STALE}
+            amendment = self.amendments.record(previous, tender_data)  # None: this very version is stored
+            change = {**(amendment or change), "status": AMENDED if amendment and amendment["patch"] else UNCHANGED}
+        self.conn.execute(
+            """
+            INSERT INTO tenders (id, title, date_modified, budget, topic, file, cluster_id, data, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                title=excluded.title, date_modified=excluded.date_modified, budget=excluded.budget,
+                topic=COALESCE(excluded.topic, tenders.topic), file=COALESCE(excluded.file, tenders.file),
+                cluster_id=COALESCE(excluded.cluster_id, tenders.cluster_id),
+                data=excluded.data, updated_at=excluded.updated_at
+            """,
+            (
+                tender_data["id"],
+                tender_data.get("title", "Без назви"),
+                tender_data.get("dateModified", ""),
+                (tender_data.get("value") or {}).get("amount", 0),
+                topic,
+                file,
+                cluster_id,
+                json.dumps(tender_data, ensure_ascii=False),
+                datetime.now().isoformat()
+            )
+        )
+        self.issuers.update(tender_data)
+        return change
+
+    def get_tender(self, tender_id):
+        """Return the full tender JSON, or None"""
+        row = self.conn.execute("SELECT data FROM tenders WHERE id = ?", (tender_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def list_tenders(self, limit=None):
+        """Return tender summaries (id, title, date, budget, file), newest first"""
+        rows = self.conn.execute(
+            "SELECT id, title, date_modified, budget, file FROM tenders ORDER BY date_modified DESC LIMIT ?",
+            (-1 if limit is None else limit,)
+        ).fetchall()
+        return [
+            {"id": r["id"], "title": r["title"], "date": r["date_modified"], "budget": r["budget"], "file": r["file"]}
+            for r in rows
+        ]
+
+    def iter_tenders(self, awarded_only=False):
+        """Yield the full JSON of every stored tender (only those with awards for the market history)"""
+        rows = self.conn.execute(
+            "SELECT data FROM tenders" + (" WHERE json_extract(data, '$.awards') IS NOT NULL" if awarded_only else "")
+        )
+        for row in rows:
+            yield json.loads(row["data"])
+
+    # ---------------------- Analyses ----------------------
+    def save_analysis(self, tender_id, analysis, cluster_id=None, duplicate_of=None):
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO analyses (tender_id, cluster_id, duplicate_of, analysis, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (tender_id, cluster_id or tender_id, duplicate_of,
+             json.dumps(analysis, ensure_ascii=False), datetime.now().isoformat())
+        )
+
+    def analyzed_at(self, tender_id):
+        """When the stored analysis of a tender was saved (ISO timestamp), or None"""
+        row = self.conn.execute("SELECT created_at FROM analyses WHERE tender_id = ?", (tender_id,)).fetchone()
+        return row["created_at"] if row else None
+
+    def get_analysis(self, tender_id):
+        row = self.conn.execute("SELECT analysis FROM analyses WHERE tender_id = ?", (tender_id,)).fetchone()
+        return json.loads(row["analysis"]) if row else None
+
+    def query_analyses(self, search=None, tender_ids=None, sort_by="created_at", descending=True, limit=50, offset=0):
+        """
+        One page of analysis summaries, filtered and sorted inside SQLite
+
+        Args:
+            search: case-insensitive substring matched against title/issuer/location/project type
+            tender_ids: optional list restricting the query to these tenders
+            sort_by: a key of ANALYSIS_COLUMNS
+
+        Returns:
+            tuple: (list of summary dicts for the page, total matching rows)
+        """
+        where, params = [], []
+        if tender_ids is not None:
+            tender_ids = list(tender_ids)
+            where.append(f"tender_id IN ({','.join('?' * len(tender_ids))})")
+            params.extend(tender_ids)
+        if search:
+            where.append("(" + " OR ".join(f"casefold({ANALYSIS_COLUMNS[c]}) LIKE ?" for c in SEARCH_COLUMNS) + ")")
+            params.extend([f"%{search.casefold()}%"] * len(SEARCH_COLUMNS))
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+        total = self.conn.execute(f"SELECT COUNT(*) FROM analyses{clause}", params).fetchone()[0]
+        order = ANALYSIS_COLUMNS.get(sort_by, "created_at")
+        select = ", ".join(f"{expr} AS {name}" for name, expr in ANALYSIS_COLUMNS.items())
+        rows = self.conn.execute(
+            f"SELECT {select} FROM analyses{clause} ORDER BY {order} {'DESC' if descending else 'ASC'}, tender_id "
+            f"LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return [dict(r) for r in rows], total
+
+    def get_analyses(self, tender_ids=None):
+        """Return stored analyses (optionally only for the given ids), in request order"""
+        if tender_ids is None:
+            rows = self.conn.execute("SELECT tender_id, analysis FROM analyses ORDER BY created_at").fetchall()
+        else:
+            tender_ids = list(tender_ids)
+            placeholders = ",".join("?" * len(tender_ids))
+            rows = self.conn.execute(
+                f"SELECT tender_id, analysis FROM analyses WHERE tender_id IN ({placeholders})", tender_ids
+            ).fetchall()
+            order = {tid: i for i, tid in enumerate(tender_ids)}
+            rows = sorted(rows, key=lambda r: order[r["tender_id"]])
+        return [json.loads(r["analysis"]) for r in rows]
+
+    # ---------------------- Scores ----------------------
+    def save_score(self, tender_id, evaluation):
+        """Store a ProfitabilityAnalyzer report for a tender"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO scores (tender_id, roi_score, recommendation, evaluation, created_at) VALUES (?, ?, ?, ?, ?)",
+            (tender_id, evaluation.get("roi_score"), evaluation.get("recommendation"),
+             json.dumps(evaluation, ensure_ascii=False, default=str), datetime.now().isoformat())
+        )
+
+    def get_score(self, tender_id):
+        row = self.conn.execute("SELECT evaluation FROM scores WHERE tender_id = ?", (tender_id,)).fetchone()
+        return json.loads(row["evaluation"]) if row else None
@@ -0,0 +1,45 @@
+# tender_text.py
+
+def build_tender_text(tender_json):
+    """Flatten a ProZorro tender JSON into the plain-text block sent to Claude"""
+    title = tender_json.get("title", "")
+    description = tender_json.get("description", "")
+    issuer = tender_json.get("procuringEntity", {}).get("name", "")
+    issuer_id = tender_json.get("procuringEntity", {}).get("identifier", {}).get("id", "")
+    address = tender_json.get("procuringEntity", {}).get("address", {})
+    location = f"{address.get('locality', '')}, {address.get('region', '')}".strip(", ")
+    budget = tender_json.get("value", {}).get("amount", "N/A")
+    currency = tender_json.get("value", {}).get("currency", "UAH")
+    deadline = tender_json.get("tenderPeriod", {}).get("endDate", "Not specified")
+
+    items = tender_json.get("items", [])
+    item_descriptions = [
+        f"- {item.get('description', '')} ({item.get('classification', {}).get('description', '')})"
+        for item in items
+    ]
+
+    tech_specs = []
+    for criterion in tender_json.get("criteria", []):
+        for group in criterion.get("requirementGroups", []):
+            for req in group.get("requirements", []):
+                req_title = req.get("title", "")
+                expected = req.get("expectedValues", []) or [req.get("expectedValue", "")]
+                if req_title:
+                    tech_specs.append(f"{req_title}: {', '.join(str(v) for v in expected if v)}")
+
+    return f"""
+Tender Title: {title}
+Issuer: {issuer}{f" (EDRPOU {issuer_id})" if issuer_id else ""}
+Location: {location}
+Budget: {budget} {currency}
+Deadline: {deadline}
+
+Goods/Services:
+{chr(10).join(item_descriptions)}
+
+Description:
+{description}
+
+Technical Requirements:
+{chr(10).join(tech_specs)}
+""".strip()
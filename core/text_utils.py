@@ -0,0 +1,56 @@
+# text_utils.py
+import re
+
+# Ukrainian function words plus the common English ones that appear in mixed tender texts
+UKRAINIAN_STOP_WORDS = {
+    "а", "аби", "або", "але", "б", "без", "би", "бо", "був", "була", "були", "було", "бути",
+    "в", "вам", "вас", "весь", "вже", "ви", "від", "він", "вона", "вони", "воно", "все",
+    "всі", "втім", "геть", "де", "для", "до", "е", "є", "ж", "же", "з", "за", "зі", "і", "із",
+    "її", "їх", "й", "його", "к", "коли", "котрий", "крім", "куди", "лише", "ми", "на", "над",
+    "нам", "нас", "не", "неї", "нема", "них", "ні", "ніж", "о", "об", "однак", "окрім", "от",
+    "п", "по", "під", "після", "при", "про", "проте", "та", "так", "також", "там", "те",
+    "тим", "то", "тобто", "той", "тощо", "ту", "у", "усі", "це", "цей", "ці", "цих", "цього",
+    "ця", "чи", "через", "що", "щоб", "як", "який", "яка", "які", "якщо", "ще", "шт", "грн",
+    "рік", "року", "ст"
+}
+ENGLISH_STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "of",
+    "on", "or", "the", "to", "with", "none", "nan", "not", "specified"
+}
+STOP_WORDS = UKRAINIAN_STOP_WORDS | ENGLISH_STOP_WORDS
+
+# Longest first so "ування" wins over "ння"
+UKRAINIAN_SUFFIXES = sorted([
+    "ування", "ювання", "ення", "ання", "іння", "ість", "ості", "ами", "ями", "ові", "еві",
+    "ого", "ому", "ими", "их", "ий", "ій", "ої", "ою", "ею", "ам", "ям", "ах", "ях",
+    "а", "я", "у", "ю", "і", "и", "о", "е", "ь", "ї"
+], key=len, reverse=True)
+
+APOSTROPHES = re.compile(r"[’ʼ`′‘]")
+TOKEN_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)*", re.UNICODE)
+CYRILLIC_RE = re.compile(r"[а-яіїєґ]")
+
+
+def normalize_text(text):
+    """Lowercase, unify apostrophe variants and collapse whitespace"""
+    text = APOSTROPHES.sub("'", str(text or "").lower())
+    return " ".join(text.split())
+
+
+def stem_uk(token):
+    """Light suffix stripping so inflected Ukrainian forms share a stem (школа/школи/школу)"""
+    if len(token) <= 4 or not CYRILLIC_RE.search(token):
+        return token
+    for suffix in UKRAINIAN_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text):
+    """Tokenize Ukrainian/English tender text: keeps apostrophe words, drops stop words, stems"""
+    return [
+        stem_uk(token)
+        for token in TOKEN_RE.findall(normalize_text(text))
+        if len(token) > 1 and token not in STOP_WORDS and not token.isdigit()
+    ]
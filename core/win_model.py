@@ -0,0 +1,253 @@
+# win_model.py
+import math
+import os
+import random
+import sys
+from datetime import datetime
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.evaluation import safe_budget
+
+MODEL_PATH = "/opt/render/project/src/data/win_model.joblib"
+N_FEATURES = 2 ** 18     # hashed feature space
+EPOCHS = 20              # passes over the history on a full fit; new outcomes get one pass
+MIN_EXAMPLES = 10        # below this (or with one class only) predictions fall back to the win rate
+
+WON = {"won", "win", "winner", "awarded", "перемога", "виграли", "виграно"}
+LOST = {"lost", "loss", "lose", "rejected", "disqualified", "програли", "програно", "відхилено"}
+
+
+def outcome_label(outcome):
+    """1 for a win, 0 for a loss, None for anything else (cancelled, pending…)"""
+    outcome = str(outcome or "").strip().casefold()
+    return 1 if outcome in WON else 0 if outcome in LOST else None
+
+
+def _days_between(start, end):
+    try:
+        start = datetime.fromisoformat(str(start)[:19])
+        end = datetime.fromisoformat(str(end)[:19])
+    except ValueError:
+        return None
+    return (end - start).total_seconds() / 86400
+
+
+def tender_features(tender=None, analysis=None, evaluation=None):
+    """
+    Feature dict for one tender, from whatever is known about it
+
+    Only fields known while the tender is still open are used: bids and
+    numberOfBids appear after it closes, so a model trained on them would see
+    a different distribution from the open tenders it ranks.
+
+    Args:
+        tender: ProZorro tender JSON (budget, CPV, region, issuer EDRPOU, tender period)
+        analysis: Claude analysis (budget, location, issuer, project type, deadline) used where
+            the JSON is missing
+        evaluation: ProfitabilityAnalyzer report (AVK5 estimate margin, resources, timeline)
+    """
+    tender, analysis, evaluation = tender or {}, analysis or {}, evaluation or {}
+    features = {}
+
+    budget = (tender.get("value") or {}).get("amount") or safe_budget(analysis.get("budget"))
+    if budget:
+        features["log_budget"] = math.log10(1 + float(budget)) / 10
+
+    items = tender.get("items") or []
+    cpv = ((items[0].get("classification") or {}).get("id") or "") if items else ""
+    if cpv:
+        features[f"cpv2={cpv[:2]}"] = 1
+        features[f"cpv3={cpv[:3]}"] = 1
+    elif analysis.get("project_type"):
+        features[f"project_type={str(analysis['project_type']).casefold()}"] = 1
+
+    entity = tender.get("procuringEntity") or {}
+    region = (entity.get("address") or {}).get("region") or analysis.get("location")
+    if region:
+        features[f"region={str(region).casefold()}"] = 1
+    issuer = (entity.get("identifier") or {}).get("id") or analysis.get("issuer")
+    if issuer:
+        features[f"issuer={str(issuer).casefold()}"] = 1
+    if entity.get("kind"):
+        features[f"kind={entity['kind']}"] = 1
+    if tender.get("procurementMethodType"):
+        features[f"method={tender['procurementMethodType']}"] = 1
+
+    # bid window the issuer gave: deadline minus publication, the same whenever it is computed
+    # (days left until the deadline would differ between training on old tenders and ranking open ones)
+    period = tender.get("tenderPeriod") or {}
+    slack = _days_between(period.get("startDate") or tender.get("date"),
+                          period.get("endDate") or analysis.get("deadline"))
+    if slack is not None:
+        features["slack_days"] = max(min(slack, 60), 0) / 60
+
+    if "profit_margin" in evaluation:
+        features["margin"] = max(min(float(evaluation["profit_margin"] or 0), 1), -1)
+    if "resource_availability_score" in evaluation:
+        features["resources"] = float(evaluation["resource_availability_score"] or 0) / 100
+    if analysis.get("avk5_required"):
+        features["avk5_required"] = 1
+    return features
+
+
+def training_examples(records, store):
+    """
+    Join performance records with stored tenders, analyses and scores
+
+    Args:
+        records: historical_performance entries (tender_id, outcome, profit, date)
+        store: TenderStore holding the tenders
+
+    Returns:
+        tuple: (feature dicts, labels) for records with a win/loss outcome
+    """
+    features, labels = [], []
+    for record in records:
+        label = outcome_label(record.get("outcome"))
+        if label is None:
+            continue
+        tender_id = record.get("tender_id")
+        features.append(tender_features(
+            store.get_tender(tender_id), store.get_analysis(tender_id), store.get_score(tender_id)
+        ))
+        labels.append(label)
+    return features, labels
+
+
+class WinModel:
+    """
+    Win probability from past bids: hashed tender features into an SGD
+    logistic regression. fit() trains on the whole history; update() folds in
+    new outcomes with partial_fit, so retraining costs one pass over the new rows.
+    """
+
+    def __init__(self, path=MODEL_PATH):
+        from sklearn.feature_extraction import FeatureHasher
+
+        self.path = path
+        self.hasher = FeatureHasher(n_features=N_FEATURES, input_type="dict")
+        self.classifier = None
+        self.wins = 0
+        self.examples = 0
+        self.learned = set()  # ids of the performance records learned from
+        if path and os.path.exists(path):
+            self.load()
+
+    # ---------------------- Persistence ----------------------
+    def load(self):
+        import joblib
+
+        state = joblib.load(self.path)
+        self.classifier = state["classifier"]
+        self.wins, self.examples = state["wins"], state["examples"]
+        self.learned = set(state.get("learned", ()))  # empty for older model files: refit on next training
+
+    def save(self):
+        import joblib
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        joblib.dump({
+            "classifier": self.classifier, "wins": self.wins,
+            "examples": self.examples, "learned": sorted(self.learned)
+        }, tmp_path)
+        os.replace(tmp_path, self.path)
+
+    # ---------------------- Training ----------------------
+    @property
+    def trained(self):
+        return self.classifier is not None and self.examples >= MIN_EXAMPLES and 0 < self.wins < self.examples
+
+    @property
+    def win_rate(self):
+        return (self.wins + 1) / (self.examples + 2)  # Laplace-smoothed prior
+
+    def _new_classifier(self):
+        from sklearn.linear_model import SGDClassifier
+
+        return SGDClassifier(loss="log_loss", alpha=1e-4, learning_rate="optimal", random_state=0)
+
+    def fit(self, features, labels, epochs=EPOCHS, seed=0):
+        """
+        Train from scratch on the full history
+
+        With no outcomes or only one class there is nothing to separate: the
+        classifier is left unset and predictions use the win rate.
+        """
+        self.classifier = None
+        self.wins, self.examples = int(sum(labels)), len(labels)
+        if len(set(labels)) < 2:
+            return self
+        self.classifier = self._new_classifier()
+        order = list(range(len(labels)))
+        rng = random.Random(seed)
+        X = self.hasher.transform(features)
+        y = np.asarray(labels)
+        for _ in range(epochs):
+            rng.shuffle(order)
+            self.classifier.partial_fit(X[order], y[order], classes=[0, 1])
+        return self
+
+    def update(self, features, labels):
+        """Fold newly arrived outcomes into the model (one partial_fit pass)"""
+        if not labels:
+            return self
+        if self.classifier is None:
+            self.classifier = self._new_classifier()
+        self.classifier.partial_fit(self.hasher.transform(features), np.asarray(labels), classes=[0, 1])
+        self.wins += int(sum(labels))
+        self.examples += len(labels)
+        return self
+
+    def train_from_profile(self, profile, store, full=False):
+        """
+        Learn from the company's performance history
+
+        Only records not learned from yet (by record id, so same-day and
+        backdated outcomes are picked up) are folded in, unless full=True or
+        nothing has been learned yet, which refits on the whole history.
+
+        Args:
+            profile: CompanyProfile
+            store: TenderStore with the bid tenders
+
+        Returns:
+            int: number of outcomes learned from
+        """
+        full = full or self.classifier is None or not self.learned
+        records = [r for r in profile.performance(with_id=True)
+                   if outcome_label(r.get("outcome")) is not None and (full or r["id"] not in self.learned)]
+        features, labels = training_examples(records, store)
+        if full:
+            self.fit(features, labels)
+            self.learned = set()
+        else:
+            self.update(features, labels)
+        if self.classifier is not None:
+            self.learned.update(r["id"] for r in records)
+        if self.path:
+            self.save()
+        return len(labels)
+
+    # ---------------------- Serving ----------------------
+    def predict(self, features):
+        """Win probability for each feature dict (the smoothed win rate until the model is trained)"""
+        if not self.trained:
+            return np.full(len(features), self.win_rate)
+        return self.classifier.predict_proba(self.hasher.transform(features))[:, 1]
+
+    def predict_tenders(self, analyses, store=None, evaluations=None):
+        """
+        Batched predictions for analyzed tenders
+
+        Args:
+            analyses: analysis dicts with tender_id
+            store: optional TenderStore to pull the full ProZorro JSON from
+            evaluations: optional evaluation dicts aligned with analyses
+        """
+        evaluations = evaluations or [None] * len(analyses)
+        features = [
+            tender_features(store.get_tender(a.get("tender_id")) if store else None, a, e)
+            for a, e in zip(analyses, evaluations)
+        ]
+        return self.predict(features)
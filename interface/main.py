@@ -1,230 +1,353 @@
-import re
 import streamlit as st
-from datetime import datetime, timedelta
+from datetime import datetime
+import functools
+import hashlib
 import json
+import math
 import os
 import sys
-import time
-import anthropic
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
 from dotenv import load_dotenv
-from io import BytesIO
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import metrics
 from core.score_matrix import AVK5Estimator, DocumentComplianceChecker, ProfitabilityAnalyzer
-import requests
-import xml.etree.ElementTree as ET
-from urllib.parse import urlencode
-
-PROZORRO_API_URL = "https://public.api.openprocurement.org/api/2.4/tenders"
-OUTPUT_DIR = "/opt/render/project/src/tenders"
-MAX_RESULTS = 3
-RATE_LIMIT_DELAY = 1.5
+from core.compliance_matrix import TAXONOMY_PATH, build_matrix, load_taxonomy
+from core.portfolio import PortfolioOptimizer, expected_profit
+from core.dedup import DuplicateIndex
+from core.tender_text import build_tender_text
+from core.priority_queue import deadline_of
+from core.excel import build_analysis_workbook, build_evaluation_workbook, build_materials_workbook
+from core.evaluation import DEFAULT_COMPANY_RESOURCES, build_evaluation_tender
+from core.market_data import AGGREGATES_FILE, MARKET_DIR
+from core.tender_store import ANALYSIS_COLUMNS, TenderStore
+from core.company_profile import CompanyProfile
+from core.win_model import MODEL_PATH, WinModel, tender_features
+from core.jobs import JobQueue, start_workers
+
 # Load environment variables
 load_dotenv()
 
-def setup_environment():
-    """Create output directory if it doesn't exist"""
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    print(f"📁 Output directory created: {OUTPUT_DIR}")
-def download_prozorro_tenders(topic=None, total_to_download=1, days_back=None):
-    """
-    Download tenders from ProZorro API based on tender topic (using keywords.json)
-    """
-    print(f"🔍 Downloading tenders for topic: {topic}")
+def claude_key_configured():
+    """Claude runs in the background workers; the UI only checks the key is set"""
+    if not os.getenv("CLAUDE_API_KEY"):
+        st.error("❌ Claude API key not found in .env file")
+        return False
+    return True
 
-    # Load topic keywords
-    keywords_path = "/opt/render/project/src/data/keywords.json"
-    if not os.path.exists(keywords_path):
-        raise FileNotFoundError("❌ keywords.json not found!")
+# ---------------------- Cached data loaders ----------------------
+# Streamlit reruns the whole script on every interaction, so reference data,
+# the tender index and derived evaluations are cached. File-backed entries are
+# keyed on modification times, so edits on disk invalidate them automatically.
+DATA_DIR = "/opt/render/project/src/data"
+TENDERS_DIR = "/opt/render/project/src/tenders"
 
-    with open(keywords_path, "r", encoding="utf-8") as f:
-        topic_keywords = json.load(f).get(topic, [])
-    
-    if not topic_keywords:
-        raise ValueError(f"❌ No keywords found for topic '{topic}' in keywords.json")
+def file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+@st.cache_data(show_spinner=False)
+def _load_json_file(path, mtime):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_json(path):
+    return _load_json_file(path, file_mtime(path))
+
+@st.cache_resource(show_spinner=False)
+def _tender_summaries():
+    """Per-file summary cache shared by all sessions: path -> (mtime, summary)"""
+    return {}
+
+def _summarize_tender(path, filename):
+    with open(path, "r", encoding="utf-8") as f:
+        tender_data = json.load(f)
+    return {
+        "id": filename.replace("ProZorro_", "").replace(".json", ""),
+        "title": tender_data.get("title", "Без назви"),
+        "date": tender_data.get("dateModified", ""),
+        "budget": tender_data.get("value", {}).get("amount", 0),
+        "file": filename
+    }
 
-    setup_environment()
-    
-    downloaded = []
-    offset_time = datetime.now()
-    checked = 0
-
-    while len(downloaded) < total_to_download and checked < 500:
-        params = {
-            "descending": 1,
-            "limit": 100,
-            "offset": offset_time.strftime("%Y-%m-%dT%H:%M:%S")
-        }
+@st.cache_data(show_spinner=False)
+def _tender_index(tenders_dir, digest, _entries):
+    summaries = _tender_summaries()
+    tender_files, errors = [], []
+    for filename, mtime in _entries:
+        path = os.path.join(tenders_dir, filename)
+        cached = summaries.get(path)
+        if cached is None or cached[0] != mtime:
+            try:
+                summaries[path] = (mtime, _summarize_tender(path, filename))
+            except Exception as e:
+                errors.append(f"Error loading {filename}: {e}")
+                continue
+        tender_files.append(summaries[path][1])
+    return tender_files, errors
+
+def load_tender_index(tenders_dir=TENDERS_DIR):
+    """List downloaded tenders; only files whose mtime changed are re-read"""
+    if not os.path.exists(tenders_dir):
+        return [], []
+    with os.scandir(tenders_dir) as entries:
+        listing = sorted(
+            (e.name, e.stat().st_mtime_ns) for e in entries
+            if e.name.startswith("ProZorro_") and e.name.endswith(".json")
+        )
+    # Hash the listing once here; Streamlit would otherwise hash every tuple on each call
+    digest = hashlib.sha1(repr(listing).encode("utf-8")).hexdigest()
+    return _tender_index(tenders_dir, digest, listing)
 
-        try:
-            response = requests.get(PROZORRO_API_URL, params=params)
-            response.raise_for_status()
-            tenders = response.json().get("data", [])
-            if not tenders:
-                print("🚫 No more tenders found.")
-                break
-
-            for tender in tenders:
-                tender_id = tender["id"]
-                try:
-                    tender_url = f"{PROZORRO_API_URL}/{tender_id}"
-                    tender_response = requests.get(tender_url)
-                    tender_response.raise_for_status()
-                    tender_data = tender_response.json()["data"]
-
-                    title = tender_data.get("title", "").lower()
-                    description = tender_data.get("description", "").lower()
-
-                    # Check if any keyword matches
-                    if any(kw.lower() in title or kw.lower() in description for kw in topic_keywords):
-                        filename = f"ProZorro_{tender_id}.json"
-                        filepath = os.path.join(OUTPUT_DIR, filename)
-
-                        with open(filepath, "w", encoding="utf-8") as f:
-                            json.dump(tender_data, f, ensure_ascii=False, indent=2)
-
-                        downloaded.append({
-                            "id": tender_id,
-                            "title": tender_data.get("title", "Без назви"),
-                            "date": tender_data.get("dateModified", ""),
-                            "budget": tender_data.get("value", {}).get("amount", 0),
-                            "file": filename
-                        })
-                        print(f"✅ Saved: {filename}")
-
-                        if len(downloaded) >= total_to_download:
-                            break
-
-                    checked += 1
-                    time.sleep(RATE_LIMIT_DELAY)
-
-                except Exception as e:
-                    print(f"⚠️ Error for {tender_id}: {e}")
-                    continue
+@st.cache_resource(show_spinner=False)
+def _document_vault(path, mtime, journal_mtime):
+    return DocumentComplianceChecker(path)
 
-            # Update offset to last tender timestamp
-            offset_time -= timedelta(minutes=10)
+def get_document_vault():
+    path = os.path.join(DATA_DIR, "document_vault.json")
+    return _document_vault(path, file_mtime(path), file_mtime(f"{path}.journal"))
 
-        except Exception as e:
-            print(f"❌ API error: {e}")
-            break
+@st.cache_data(show_spinner=False, max_entries=8)
+def _compliance_matrix(analysis_results, vault_version, taxonomy_mtime, on_date):
+    return build_matrix(analysis_results, get_document_vault(), load_taxonomy(TAXONOMY_PATH, taxonomy_mtime), on_date)
 
-    print(f"\n💾 Total downloaded tenders: {len(downloaded)} for topic: {topic}")
-    return downloaded
+def cached_compliance_matrix(analysis_results):
+    """Tenders × document types for every analyzed tender, rebuilt when the vault or taxonomy changes"""
+    path = os.path.join(DATA_DIR, "document_vault.json")
+    vault_version = (file_mtime(path), file_mtime(f"{path}.journal"))
+    return _compliance_matrix(analysis_results, vault_version, file_mtime(TAXONOMY_PATH), datetime.now().date().isoformat())
 
-# Initialize Claude client
-def get_claude_client():
-    api_key = os.getenv("CLAUDE_API_KEY")
-    if not api_key:
-        st.error("❌ Claude API key not found in .env file")
-        return None
-    return anthropic.Anthropic(api_key=api_key)
-
-# Enhanced parser function
-def analyze_tender(text, client):
-    prompt = f"""
-You are an expert in Ukrainian public procurement tenders. Analyze the tender text and extract the following information:
-
-1. Basic Information:
-   - Title or Project Name
-   - Issuer or Client
-   - Submission Deadline
-   - Estimated Budget (with currency)
-   - Location (City, Region)
-   - Project Type/Scope
-
-2. Critical Requirements:
-   - List ALL required documents (comma-separated)
-   - Does this tender require PC AVK5 cost estimates? (true/false)
-   - Key technical specifications (summarize key requirements)
-
-3. Financial & Legal:
-   - Payment terms and schedule
-   - References to Ukrainian laws/regulations (list)
-
-4. Viability Analysis:
-   - Resource requirements (equipment, personnel, etc.)
-   - Timeline feasibility assessment (adequate/risky/inadequate)
-   - Profitability assessment (high/medium/low)
-
-Return the result STRICTLY in JSON format with these keys:
-{{
-  "title": "...",
-  "issuer": "...",
-  "deadline": "...",
-  "budget": "...",
-  "location": "...",
-  "project_type": "...",
-  "required_documents": ["doc1", "doc2", ...],
-  "avk5_required": true/false,
-  "technical_specs": "...",
-  "payment_terms": "...",
-  "resource_requirements": "...",
-  "timeline_feasibility": "...",
-  "profitability": "..."
-}}
-
-Tender Text:
-\"\"\"
-{text[:15000]}  # Truncate to 15,000 characters
-\"\"\"
-"""
-    try:
-        response = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1024,
-            temperature=0.0,
-            system="You are a procurement specialist analyzing Ukrainian tenders. Focus on PC AVK5 compliance and document requirements.",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        if response.content:
-            result = ''.join(block.text for block in response.content if hasattr(block, 'text'))
-            try:
-                return json.loads(result)
-            except json.JSONDecodeError:
-                match = re.search(r'({.*})', result, re.DOTALL)
-                if match:
-                    try:
-                        return json.loads(match.group(1))
-                    except:
-                        pass
-                st.error("❌ Claude returned invalid JSON.")
-                return {}
-    except Exception as e:
-        st.error(f"❌ Error analyzing tender: {e}")
-        return {}
-
-# Excel formatting
-def format_excel(ws):
-    header_font = Font(bold=True, size=11)
-    header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
+@st.cache_resource(show_spinner=False)
+def get_profitability_analyzer():
+    return ProfitabilityAnalyzer(AVK5Estimator())
+
+def history_version():
+    """
+    Changes when the market aggregates are rebuilt or synced tenders update the issuer index
+
+    Keyed on the issuer table's content rather than the database file, which
+    job heartbeats touch every second.
+    """
+    return (file_mtime(os.path.join(MARKET_DIR, AGGREGATES_FILE)), get_tender_store().issuers.version())
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_tender_analysis(tender, company, history_version=None):
+    return get_profitability_analyzer().analyze_tender(tender, company)
+
+@st.cache_resource(show_spinner=False)
+def _win_model(path, mtime):
+    return WinModel(path)
+
+def get_win_model():
+    return _win_model(MODEL_PATH, file_mtime(MODEL_PATH))
+
+@st.cache_resource(show_spinner=False)
+def get_company_profile():
+    return CompanyProfile(os.path.join(DATA_DIR, "company_profile.json"))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_ranking(analysis_results, company, win_model_version=None, history_version=None):
+    store = get_tender_store()
+    ranking = get_profitability_analyzer().analyze_many(
+        [
+            {**build_evaluation_tender(r, tender=store.get_tender(r["tender_id"])),
+             "tender_id": r["tender_id"], "cluster_id": r.get("cluster_id", r["tender_id"])}
+            for r in analysis_results
+        ],
+        company
     )
-    
-    # Set column widths
-    col_widths = [40, 30, 15, 15, 20, 25, 40, 15, 50, 30, 40, 20, 20, 30]
-    columns = [
-        "Title", "Issuer", "Deadline", "Budget", "Location", 
-        "Project Type", "Required Documents", "PC AVK5 Required",
-        "Technical Specifications", "Payment Terms", "Resource Requirements",
-        "Timeline Feasibility", "Profitability Assessment", "Filename"
-    ]
-    
-    for col_num, (column_title, width) in enumerate(zip(columns, col_widths), 1):
-        cell = ws.cell(row=1, column=col_num, value=column_title)
-        cell.font = header_font
-        cell.alignment = header_alignment
-        cell.border = thin_border
-        ws.column_dimensions[get_column_letter(col_num)].width = width
-    
-    return ws, columns
+    # Keep one row per near-duplicate cluster so clones don't flood the ranking
+    ranking = ranking.drop_duplicates("cluster_id")
+    model = get_win_model()
+    if model.trained:
+        analyses = {r["tender_id"]: r for r in analysis_results}
+        ranking["win_probability"] = model.predict([
+            tender_features(store.get_tender(row["tender_id"]), analyses[row["tender_id"]], row)
+            for row in ranking.to_dict("records")
+        ])
+    return ranking
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_portfolio(candidates, company):
+    return PortfolioOptimizer(company).optimize(candidates)
+
+# ---------------------- Background jobs ----------------------
+# Downloads and Claude analyses run in worker processes fed by a SQLite queue.
+# Job ids live in the URL query string, so a page reload picks the jobs back up.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", min(4, os.cpu_count() or 1)))
+JOB_POLL_SECONDS = 2
+ACTIVE_STATUSES = ("queued", "running")
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue():
+    return JobQueue()
+
+@st.cache_resource(show_spinner=False)
+def get_tender_store():
+    return TenderStore()
+
+@st.cache_resource(show_spinner=False)
+def _local_workers():
+    return start_workers(JOB_WORKERS)
+
+def ensure_workers():
+    """Start local workers unless a separate worker service is already heartbeating"""
+    if get_job_queue().live_workers():
+        return
+    if not any(proc.is_alive() for proc in _local_workers()):
+        _local_workers.clear()
+        _local_workers()
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress(job_ids, label):
+    """Live progress for running jobs; reruns the whole page once they have all finished"""
+    ensure_workers()
+    jobs = [job for job in (get_job_queue().get(j) for j in job_ids) if job]
+    active = [job for job in jobs if job["status"] in ACTIVE_STATUSES]
+    if not active:
+        st.rerun()
+    overall = sum(job["progress"] for job in jobs) / max(1, len(jobs))
+    st.progress(overall, text=f"⏳ {label}: {len(jobs) - len(active)}/{len(jobs)} jobs finished")
+    for job in active:
+        st.caption(f"#{job['id']} {job['kind']} — {job['status']} {job['message'] or ''}")
+
+# ---------------------- Performance panel ----------------------
+# Spans and counters from this process, the job workers and CLI runs all land in
+# the same events.jsonl; the sidebar aggregates its tail.
+@st.cache_data(show_spinner=False, max_entries=4)
+def _metrics_summary(path, mtime):
+    return metrics.summarize_events(path)
+
+def performance_panel():
+    # a flush per rerun would touch the mtime (the cache key) every time
+    metrics.flush_if_due()
+    path = metrics.events_path()
+    summary = _metrics_summary(path, file_mtime(path))
+    with st.sidebar.expander("⏱️ Performance"):
+        if not summary["spans"] and not summary["counters"]:
+            st.caption("No timings recorded yet.")
+            return
+        rows = [
+            {"span": name, "calls": stats["count"], "total s": round(stats["total"], 2),
+             "mean ms": round(stats["mean"] * 1000, 1), "max ms": round(stats["max"] * 1000, 1)}
+            for name, stats in sorted(summary["spans"].items(), key=lambda kv: -kv[1]["total"])
+        ]
+        st.dataframe(rows, hide_index=True)
+        counters = summary["counters"]
+        cols = st.columns(2)
+        for i, (label, key) in enumerate([
+            ("HTTP requests", "http.requests"), ("MB downloaded", "http.bytes"),
+            ("Tokens in", "llm.tokens_in"), ("Tokens out", "llm.tokens_out"),
+            ("Cache hits", "cache.analysis_hits"), ("Pages OCR'd", "pdf.pages_ocr"),
+        ]):
+            value = counters.get(key, 0)
+            cols[i % 2].metric(label, f"{value / 1e6:.1f}" if key == "http.bytes" else f"{value:,.0f}")
+
+# ---------------------- Paged tables ----------------------
+# Large tender/result sets are shown as one dataframe page at a time instead of
+# one widget group per row; details are only rendered for the selected row.
+PAGE_SIZE = 50
+
+def paginate(total, key):
+    """Page selector; returns the row offset of the current page"""
+    pages = max(1, math.ceil(total / PAGE_SIZE))
+    if st.session_state.get(key, 1) > pages:
+        st.session_state[key] = pages
+    page = st.number_input(f"Page (of {pages}, {total} rows)", min_value=1, max_value=pages, step=1, key=key)
+    return (int(page) - 1) * PAGE_SIZE
+
+def _sync_selection(table_key, page_ids):
+    """Merge the ticked rows of one page into the running selection"""
+    rows = st.session_state[table_key].selection.rows
+    chosen = {page_ids[i] for i in rows}
+    kept = [tid for tid in st.session_state.selected_tenders if tid not in page_ids]
+    st.session_state.selected_tenders = kept + [tid for tid in page_ids if tid in chosen]
+
+def tender_picker(tenders):
+    """Filterable, paged tender table; ticked rows accumulate in session_state.selected_tenders"""
+    if "selected_tenders" not in st.session_state:
+        st.session_state.selected_tenders = []
+    import pandas as pd
+
+    search = st.text_input("🔎 Filter tenders by id or title", key="tender_filter").strip()
+
+    frame = pd.DataFrame(tenders, columns=["id", "title", "date", "budget"])
+    if search:
+        mask = frame["title"].astype(str).str.contains(search, case=False, regex=False)
+        frame = frame[mask | frame["id"].astype(str).str.contains(search, case=False, regex=False)]
+    offset = paginate(len(frame), "tender_page")
+    page = frame.iloc[offset:offset + PAGE_SIZE].copy()
+    page.insert(0, "selected", page["id"].isin(st.session_state.selected_tenders))
+
+    table_key = f"tender_table_{search}_{offset}"
+    st.dataframe(
+        page, hide_index=True, key=table_key,
+        on_select=functools.partial(_sync_selection, table_key, page["id"].tolist()),
+        selection_mode="multi-row"
+    )
+    col1, col2 = st.columns([3, 1])
+    col1.caption(f"✅ {len(st.session_state.selected_tenders)} tenders selected")
+    if st.session_state.selected_tenders and col2.button("Clear selection"):
+        st.session_state.selected_tenders = []
+        st.rerun()
+
+def render_analysis_detail(res):
+    if res.get("duplicate_of"):
+        st.caption(f"♻️ Near-duplicate of {res['duplicate_of']} — analysis reused")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Issuer", res.get("issuer", "N/A"))
+        st.metric("Deadline", res.get("deadline", "N/A"))
+        st.metric("Budget", res.get("budget", "N/A"))
+        st.metric("Location", res.get("location", "N/A"))
+        st.metric("Project Type", res.get("project_type", "N/A"))
+        st.metric("PC AVK5 Required", "✅ Yes" if res.get("avk5_required") else "❌ No")
+    with col2:
+        st.subheader("Required Documents")
+        for doc in res.get("required_documents", []):
+            st.write(f"- {doc}")
+        st.subheader("Technical Specifications")
+        st.info(res.get("technical_specs", "No technical specs"))
+        st.subheader("Viability")
+        st.metric("Timeline Feasibility", res.get("timeline_feasibility", "N/A"))
+        st.metric("Profitability", res.get("profitability", "N/A"))
+
+def results_browser(tender_ids=None):
+    """
+    Paged analysis table: filtering, sorting and paging run as SQLite queries,
+    and the full analysis is fetched only for the selected row
+
+    Returns:
+        int: number of matching results
+    """
+    import pandas as pd
+
+    store = get_tender_store()
+    col1, col2, col3 = st.columns([3, 2, 1])
+    search = col1.text_input("🔎 Filter results", key="results_filter").strip()
+    sort_by = col2.selectbox("Sort by", list(ANALYSIS_COLUMNS), index=list(ANALYSIS_COLUMNS).index("created_at"),
+                             format_func=lambda c: c.replace("_", " ").title())
+    descending = col3.toggle("Descending", value=True)
+
+    _, total = store.query_analyses(search, tender_ids, limit=0)
+    if not total:
+        return 0
+    offset = paginate(total, "results_page")
+    rows, _ = store.query_analyses(search, tender_ids, sort_by, descending, PAGE_SIZE, offset)
+
+    event = st.dataframe(
+        pd.DataFrame(rows).drop(columns=["created_at"]), hide_index=True,
+        on_select="rerun", selection_mode="single-row", key=f"results_table_{search}_{sort_by}_{descending}_{offset}"
+    )
+    if event.selection.rows:
+        tender_id = rows[event.selection.rows[0]]["tender_id"]
+        res = store.get_analysis(tender_id)
+        if res:
+            st.markdown(f"#### {res.get('title', 'Untitled')} - {tender_id}")
+            render_analysis_detail(res)
+    else:
+        st.caption("Select a row to see the full analysis.")
+    return total
 
 # Streamlit App
 st.set_page_config(page_title="AI Tender Optimizer", layout="wide")
@@ -239,14 +362,7 @@ if "excel_buffer" not in st.session_state:
 if "analysis_attempted" not in st.session_state:
     st.session_state.analysis_attempted = False
 if "company_resources" not in st.session_state:
-    st.session_state.company_resources = {
-        "workers": 10,
-        "engineers": 2,
-        "vehicles": 3,
-        "current_projects": []
-    }
-if "document_vault" not in st.session_state:
-    st.session_state.document_vault = DocumentComplianceChecker()
+    st.session_state.company_resources = {**DEFAULT_COMPANY_RESOURCES, "current_projects": []}
 
 # Sidebar
 st.sidebar.title("🛠️ Tender Settings")
@@ -265,44 +381,52 @@ days_range = st.sidebar.slider(
     value=30
 )
 
+performance_panel()
+
 # Main Page
 st.title("📦 AI Tender Optimizer")
 
 if tab == "📥 Data Downloader":
     st.header("📥 Download Tenders from ProZorro")
 
-    # Load topics from keywords.json dynamically
-    with open("/opt/render/project/src/data/keywords.json", "r", encoding="utf-8") as f:
-        topic_keywords = json.load(f)
-    topic_list = list(topic_keywords.keys())
+    # CPV-routed topics from topics.json, plus any keyword-only topics left in keywords.json
+    topic_specs = load_json(os.path.join(DATA_DIR, "topics.json"))
+    legacy_topics = load_json(os.path.join(DATA_DIR, "keywords.json"))
+    topic_list = list(topic_specs) + [t for t in legacy_topics if t not in topic_specs]
 
     topic = st.selectbox("📚 Choose Tender Topic", topic_list)
     num_tenders = st.slider("📦 Number of Tenders to Download", min_value=5, max_value=100, value=20, step=5)
     days_back = st.slider("📅 Search Tenders from Last N Days", min_value=1, max_value=60, value=30)
 
     if st.button("🚀 Start Download"):
-        with st.spinner("Downloading..."):
-            tenders = download_prozorro_tenders(
-                topic=topic,
-                total_to_download=num_tenders,
-                days_back=days_back
-            )
-
+        ensure_workers()
+        job_id = get_job_queue().submit("download", {"topic": topic, "count": num_tenders, "days_back": days_back})
+        st.query_params["download_job"] = str(job_id)
+
+    job = get_job_queue().get(int(st.query_params["download_job"])) if "download_job" in st.query_params else None
+    if job and job["status"] in ACTIVE_STATUSES:
+        job_progress([job["id"]], f"Downloading '{job['payload']['topic']}' tenders")
+    elif job and job["status"] == "failed":
+        st.error(f"❌ Download failed: {job['error']}")
+    elif job and job["status"] == "done":
+        tenders = job["result"] or []
+        job_topic = job["payload"]["topic"]
         if tenders:
-            st.success(f"✅ {len(tenders)} tenders downloaded for topic '{topic}'")
+            st.success(f"✅ {len(tenders)} tenders downloaded for topic '{job_topic}'")
             st.session_state["tenders_downloaded"] = tenders
 
             with st.expander("📄 Tender Summary"):
                 st.json({
-                    "topic": topic,
-                    "keywords": topic_keywords[topic],
+                    "topic": job_topic,
+                    "cpv": topic_specs.get(job_topic, {}).get("cpv", []),
+                    "keywords": topic_specs.get(job_topic, {}).get("keywords") or legacy_topics.get(job_topic, []),
                     "total_downloaded": len(tenders)
                 })
 
             st.download_button(
                 label="📁 Download Tender Metadata",
                 data=json.dumps(tenders, ensure_ascii=False, indent=2),
-                file_name=f"{topic.lower()}_tenders_summary.json",
+                file_name=f"{job_topic.lower()}_tenders_summary.json",
                 mime="application/json"
             )
         else:
@@ -312,31 +436,11 @@ if tab == "📥 Data Downloader":
 elif tab == "🔍 Tender Analysis":
     st.header("🔍 Tender Analysis")
 
-    # Check for existing tender files
-    def load_existing_tenders():
-        tender_files = []
-        tenders_dir = "/opt/render/project/src/tenders"
-        if os.path.exists(tenders_dir):
-            for filename in os.listdir(tenders_dir):
-                if filename.startswith("ProZorro_") and filename.endswith(".json"):
-                    tender_id = filename.replace("ProZorro_", "").replace(".json", "")
-                    try:
-                        with open(os.path.join(tenders_dir, filename), "r", encoding="utf-8") as f:
-                            tender_data = json.load(f)
-                            tender_files.append({
-                                "id": tender_id,
-                                "title": tender_data.get("title", "Без назви"),
-                                "date": tender_data.get("dateModified", ""),
-                                "budget": tender_data.get("value", {}).get("amount", 0),
-                                "file": filename
-                            })
-                    except Exception as e:
-                        st.warning(f"Error loading {filename}: {e}")
-        return tender_files
-
     # Load tenders if missing
     if not st.session_state.tenders_downloaded:
-        existing = load_existing_tenders()
+        existing, load_errors = load_tender_index()
+        for error in load_errors:
+            st.warning(error)
         if existing:
             st.session_state.tenders_downloaded = existing
             st.success(f"✅ Loaded {len(existing)} tenders from folder.")
@@ -344,121 +448,70 @@ elif tab == "🔍 Tender Analysis":
             st.warning("⚠️ No tender files found.")
             st.stop()
 
-    tender_options = {t['id']: t['title'] for t in st.session_state.tenders_downloaded}
-    selected_tenders = st.multiselect(
-        "Select tenders to analyze:",
-        options=list(tender_options.keys()),
-        format_func=lambda x: f"{x} - {tender_options[x][:50]}..."
-    )
+    st.subheader("Tenders")
+    tender_picker(st.session_state.tenders_downloaded)
+    selected_tenders = st.session_state.selected_tenders
 
+    batch = st.query_params.get("analysis_batch")
     if not selected_tenders:
         st.info("ℹ️ Please select at least one tender to analyze.")
-        st.stop()
-
-    client = get_claude_client()
-    if not client:
-        st.stop()
-
-    status_text = st.empty()
-    analyze_clicked = st.button("🔍 Analyze Selected Tenders", key="analyze_button")
 
-    if analyze_clicked:
-        st.session_state.analysis_attempted = True
-        results = []
-        progress_bar = st.progress(0)
-
-        for i, tid in enumerate(selected_tenders):
-            tender = next((t for t in st.session_state.tenders_downloaded if t['id'] == tid), None)
-            if not tender:
-                continue
-
-            progress_bar.progress((i + 1) / len(selected_tenders))
-            status_text.text(f"Analyzing {tid}...")
+    if selected_tenders:
+        if not claude_key_configured():
+            st.stop()
 
-            path = f"/opt/render/project/src/tenders/ProZorro_{tid}.json"
-            if os.path.exists(path):
+        if st.button("🔍 Analyze Selected Tenders", key="analyze_button"):
+            st.session_state.analysis_attempted = True
+            # Group near-duplicates up front so each cluster costs one Claude call
+            dedup = DuplicateIndex()
+            tender_deadlines = {}
+            for tid in selected_tenders:
+                path = os.path.join(TENDERS_DIR, f"ProZorro_{tid}.json")
+                if not os.path.exists(path):
+                    continue
                 with open(path, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                content = f"""
-Tender Title: {data.get('title', '')}
-Issuer: {data.get('procuringEntity', {}).get('name', '')}
-Location: {data.get('procuringEntity', {}).get('address', {}).get('locality', '')}, {data.get('procuringEntity', {}).get('address', {}).get('region', '')}
-Budget: {data.get('value', {}).get('amount', '')} {data.get('value', {}).get('currency', 'UAH')}
-Deadline: {data.get('tenderPeriod', {}).get('endDate', '')}
-Description: {data.get('description', '')}
-""".strip()
-                result = analyze_tender(content, client)
-                if result:
-                    result["tender_id"] = tid
-                    result["Filename"] = f"{tid}.txt"
-                    results.append(result)
-            time.sleep(1.5)
+                dedup.add(tid, build_tender_text(data))
+                tender_deadlines[tid] = deadline_of(data)
+            dedup.save()  # merges with concurrent runs, so clusters are read back afterwards
+
+            clusters, deadlines = {}, {}
+            for tid, deadline in tender_deadlines.items():
+                representative = dedup.representative(tid)
+                clusters.setdefault(representative, []).append(tid)
+                if deadline:
+                    deadlines[representative] = min(filter(None, [deadlines.get(representative), deadline]))
+
+            ensure_workers()
+            # Workers take the clusters closing soonest first
+            batch = get_job_queue().submit_batch(
+                "analyze", [{"cluster_id": rep, "tender_ids": members, "deadline": deadlines.get(rep)}
+                            for rep, members in clusters.items()]
+            )
+            st.query_params["analysis_batch"] = batch
+
+    if batch and st.session_state.get("loaded_batch") != batch:
+        jobs = get_job_queue().batch(batch)
+        if any(job["status"] in ACTIVE_STATUSES for job in jobs):
+            job_progress([job["id"] for job in jobs], "Analyzing tenders")
+            st.stop()
 
+        for job in jobs:
+            if job["status"] == "failed":
+                st.error(f"❌ Error analyzing {job['payload'].get('cluster_id')}: {job['error']}")
+        tender_ids = [tid for job in jobs for tid in job["payload"].get("tender_ids", [])]
+        results = get_tender_store().get_analyses(tender_ids)
         st.session_state.analysis_results = results
-        status_text.text("✅ Analysis complete.")
-        progress_bar.empty()
-
-        # Save to Excel
-        if results:
-            wb = Workbook()
-            ws = wb.active
-            if ws is None:
-                ws = wb.create_sheet("Tender Analysis")
-            else:
-                ws.title = "Tender Analysis"
-            ws, columns = format_excel(ws)
-            for idx, res in enumerate(results, 2):
-                row_data = [
-                    res.get("title", "N/A"),
-                    res.get("issuer", "N/A"),
-                    res.get("deadline", "N/A"),
-                    res.get("budget", "N/A"),
-                    res.get("location", "N/A"),
-                    res.get("project_type", "N/A"),
-                    ", ".join(res.get("required_documents", [])),
-                    "Yes" if res.get("avk5_required", False) else "No",
-                    res.get("technical_specs", "N/A"),
-                    res.get("payment_terms", "N/A"),
-                    res.get("resource_requirements", "N/A"),
-                    res.get("timeline_feasibility", "N/A"),
-                    res.get("profitability", "N/A"),
-                    res.get("Filename", "N/A")
-                ]
-                for col_idx, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=idx, column=col_idx, value=value)
-                    cell.alignment = Alignment(wrap_text=True, vertical='top')
-            buf = BytesIO()
-            wb.save(buf)
-            buf.seek(0)
-            st.session_state.excel_buffer = buf
-
-    # 🔁 Always restore results
-    results = st.session_state.get("analysis_results", [])
-    if not results:
-        st.warning("⚠️ No analysis results found. Run analysis first.")
-        st.stop()
+        st.session_state.excel_buffer = build_analysis_workbook(results) if results else None
+        st.session_state.loaded_batch = batch
 
-    # 📋 SHOW ANALYSIS RESULTS
+    # 📋 SHOW ANALYSIS RESULTS (paged from the tender store)
     st.subheader("Analysis Results")
-    for res in results:
-        with st.expander(f"{res.get('title', 'Untitled')} - {res.get('tender_id', '')}"):
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Issuer", res.get("issuer", "N/A"))
-                st.metric("Deadline", res.get("deadline", "N/A"))
-                st.metric("Budget", res.get("budget", "N/A"))
-                st.metric("Location", res.get("location", "N/A"))
-                st.metric("Project Type", res.get("project_type", "N/A"))
-                st.metric("PC AVK5 Required", "✅ Yes" if res.get("avk5_required") else "❌ No")
-            with col2:
-                st.subheader("Required Documents")
-                for doc in res.get("required_documents", []):
-                    st.write(f"- {doc}")
-                st.subheader("Technical Specifications")
-                st.info(res.get("technical_specs", "No technical specs"))
-                st.subheader("Viability")
-                st.metric("Timeline Feasibility", res.get("timeline_feasibility", "N/A"))
-                st.metric("Profitability", res.get("profitability", "N/A"))
+    batch_ids = [r["tender_id"] for r in st.session_state.analysis_results if r.get("tender_id")]
+    only_batch = bool(batch_ids) and st.toggle("Only the latest analysis run", value=True)
+    if not results_browser(batch_ids if only_batch else None):
+        st.warning("⚠️ No analysis results found. Run analysis first.")
+        st.stop()
 
     if st.session_state.excel_buffer:
         st.download_button(
@@ -483,20 +536,39 @@ elif tab == "🏢 Company Profile":
     vehicles = col3.number_input("Number of Vehicles", 
                                 value=st.session_state.company_resources["vehicles"],
                                 min_value=0, step=1)
+    bid_capacity_days = st.number_input("Bid Preparation Days Available",
+                                        value=st.session_state.company_resources.get("bid_capacity_days", 20),
+                                        min_value=0, step=1)
     
     # Current projects
     st.subheader("Current Projects")
     projects = st.session_state.company_resources["current_projects"]
     for i, project in enumerate(projects):
-        col1, col2, col3 = st.columns([3, 2, 1])
-        project_name = col1.text_input(f"Project {i+1} Name", value=project["name"])
-        duration = col2.number_input(f"Duration (days)", value=project["duration"], min_value=1)
-        if col3.button("❌", key=f"del_proj_{i}"):
+        col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+        project["name"] = col1.text_input(f"Project {i+1} Name", value=project["name"], key=f"proj_name_{i}")
+        project["start_date"] = col2.date_input(
+            "Start Date",
+            value=datetime.fromisoformat(project.get("start_date", datetime.now().date().isoformat())).date(),
+            key=f"proj_start_{i}"
+        ).isoformat()
+        project["duration"] = col3.number_input(f"Duration (days)", value=project["duration"], min_value=1, key=f"proj_dur_{i}")
+        if col4.button("❌", key=f"del_proj_{i}"):
             projects.pop(i)
             st.rerun()
+        rcol1, rcol2, rcol3 = st.columns(3)
+        project["workers"] = rcol1.number_input("Workers assigned", value=project.get("workers", 0), min_value=0, step=1, key=f"proj_workers_{i}")
+        project["engineers"] = rcol2.number_input("Engineers assigned", value=project.get("engineers", 0), min_value=0, step=1, key=f"proj_engineers_{i}")
+        project["vehicles"] = rcol3.number_input("Vehicles assigned", value=project.get("vehicles", 0), min_value=0, step=1, key=f"proj_vehicles_{i}")
     
     if st.button("➕ Add Project"):
-        projects.append({"name": "New Project", "duration": 30})
+        projects.append({
+            "name": "New Project",
+            "duration": 30,
+            "start_date": datetime.now().date().isoformat(),
+            "workers": 0,
+            "engineers": 0,
+            "vehicles": 0
+        })
         st.rerun()
     
     # Document vault
@@ -515,18 +587,53 @@ elif tab == "🏢 Company Profile":
         with open(file_path, "wb") as f:
             f.write(uploaded_file.getbuffer())
         
-        # Add to vault
-        st.session_state.document_vault.add_document(
+        # Add to vault (the same file under the same type is only stored once)
+        doc = get_document_vault().add_document(
             doc_name, doc_type, validity.isoformat(), file_path
         )
-        st.success(f"✅ Document '{doc_name}' added to vault!")
+        if doc["name"] == doc_name:
+            st.success(f"✅ Document '{doc_name}' added to vault!")
+        else:
+            st.info(f"♻️ Same document already in vault as '{doc['name']}'")
+
+    vault_docs = get_document_vault().document_vault["documents"]
+    if vault_docs:
+        today = datetime.now().date().isoformat()
+        st.dataframe(
+            [{"Name": d["name"], "Type": d["type"], "Valid until": d["validity"],
+              "Status": "⌛ Expired" if str(d["validity"]) < today else "✅ Valid"} for d in vault_docs],
+            hide_index=True
+        )
     
+    # Bid outcomes feed the win-probability model
+    st.subheader("🏁 Bid Outcomes")
+    company_profile = get_company_profile()
+    win_model = get_win_model()
+    ocol1, ocol2, ocol3 = st.columns(3)
+    ocol1.metric("Recorded Outcomes", win_model.examples)
+    ocol2.metric("Win Rate", f"{win_model.wins / win_model.examples * 100:.0f}%" if win_model.examples else "—")
+    ocol3.metric("Win Model", "✅ Trained" if win_model.trained else "⏳ Needs more outcomes")
+
+    with st.form("outcome_form"):
+        analyzed = {r["tender_id"]: r.get("title", "") for r in st.session_state.analysis_results}
+        ocol1, ocol2 = st.columns(2)
+        outcome_tender = ocol1.selectbox("Tender", list(analyzed), format_func=lambda x: f"{analyzed[x][:50]} ({x})") if analyzed \
+            else ocol1.text_input("Tender ID")
+        outcome = ocol2.radio("Outcome", ["won", "lost"], horizontal=True)
+        outcome_profit = ocol1.number_input("Profit (UAH)", value=0.0, step=10000.0)
+        lessons = ocol2.text_input("Lessons learned")
+        if st.form_submit_button("➕ Record Outcome") and outcome_tender:
+            company_profile.add_performance_record(outcome_tender, outcome, outcome_profit, lessons)
+            learned = WinModel(MODEL_PATH).train_from_profile(company_profile, get_tender_store())
+            st.success(f"✅ Outcome recorded; win model updated with {learned} new outcome(s)")
+
     # Save resources
     if st.button("💾 Save Company Profile"):
         st.session_state.company_resources = {
             "workers": workers,
             "engineers": engineers,
             "vehicles": vehicles,
+            "bid_capacity_days": bid_capacity_days,
             "current_projects": projects
         }
         st.success("Company profile updated!")
@@ -538,9 +645,46 @@ elif tab == "📊 Tender Evaluation":
         st.warning("⚠️ No tender analysis available. Please analyze tenders first.")
         st.stop()
 
-    avk5_data = json.load(open("/opt/render/project/src/data/avk5_standards.json", "r", encoding="utf-8"))
-    compliance = st.session_state.document_vault
-    profitability = ProfitabilityAnalyzer(AVK5Estimator())
+    avk5_data = load_json(os.path.join(DATA_DIR, "avk5_standards.json"))
+    compliance = cached_compliance_matrix(st.session_state.analysis_results)
+
+    # ---------------------- 🏆 Ranking of all analyzed tenders ----------------------
+    ranking = cached_ranking(st.session_state.analysis_results, st.session_state.company_resources,
+                             file_mtime(MODEL_PATH), history_version())
+    with st.expander("🏆 Tender Ranking", expanded=True):
+        win_column = ["win_probability"] if "win_probability" in ranking.columns else []
+        st.dataframe(
+            ranking[[
+                "tender_id", "title", "roi_score", "recommendation", *win_column, "profit_margin",
+                "typical_discount", "market_bidders", "buyer_risk",
+                "resource_availability_score", "feasibility_score", "composite_risk"
+            ]].rename(columns={
+                "tender_id": "Tender", "title": "Title", "roi_score": "ROI Score",
+                "recommendation": "Recommendation", "win_probability": "Win Probability",
+                "profit_margin": "Profit Margin", "typical_discount": "Typical Discount",
+                "market_bidders": "Typical Bidders", "buyer_risk": "Buyer Risk",
+                "resource_availability_score": "Resources", "feasibility_score": "Timeline",
+                "composite_risk": "Risk"
+            }),
+            hide_index=True
+        )
+
+    # ---------------------- 📋 Document readiness of all analyzed tenders ----------------------
+    with st.expander("📋 Ready to Bid (document coverage)", expanded=False):
+        readiness = compliance.ranking()
+        rcol1, rcol2 = st.columns(2)
+        rcol1.metric("Ready Now", f"{int(readiness['ready'].sum())}/{len(readiness)}")
+        rcol2.metric("Average Coverage", f"{readiness['coverage'].mean()*100:.1f}%" if len(readiness) else "—")
+        st.dataframe(
+            readiness.assign(ready=readiness["ready"].map({True: "✅", False: "❌"}), coverage=readiness["coverage"] * 100).rename(columns={
+                "tender_id": "Tender", "title": "Title", "ready": "Ready", "coverage": "Coverage %",
+                "required": "Required", "missing": "Missing", "expired": "Expired",
+                "missing_documents": "Missing Documents", "expired_documents": "Expired Documents"
+            }),
+            hide_index=True
+        )
+        st.caption("Coverage matrix (✅ in vault, ⌛ expired, ❌ missing)")
+        st.dataframe(compliance.to_frame())
 
     tender_options = {r["tender_id"]: r["title"] for r in st.session_state.analysis_results}
     selected_tender = st.selectbox("Select tender for evaluation:", options=list(tender_options.keys()), format_func=lambda x: f"{tender_options[x][:50]}...")
@@ -553,15 +697,26 @@ elif tab == "📊 Tender Evaluation":
     # ---------------------- 📄 Document Compliance ----------------------
     with st.expander("📄 Document Compliance Check", expanded=True):
         if tender_data.get("required_documents"):
-            doc_report = compliance.check_compliance(tender_data["required_documents"])
+            doc_report = compliance.report(selected_tender)
             col1, col2 = st.columns([1, 3])
             col1.metric("Compliance Score", f"{doc_report['compliance_score']*100:.1f}%")
             col2.metric("Status", "✅ Compliant" if doc_report["is_compliant"] else "❌ Non-Compliant")
 
             st.subheader("Document Status")
             for doc in tender_data["required_documents"]:
-                status = "✅ Available" if doc in doc_report["available_documents"] else "❌ Missing"
-                st.write(f"{status} - {doc}")
+                if doc in doc_report["missing_documents"]:
+                    status = "❌ Missing"
+                elif doc in doc_report["expired_documents"]:
+                    status = "⌛ Expired"
+                else:
+                    status = "✅ Available"
+                st.write(f"{status} - {doc} ({doc_report['canonical'][doc]})")
+
+            if doc_report["missing_documents"]:
+                st.subheader("💡 Similar Documents in Vault")
+                for doc, candidates in get_document_vault().suggest_alternatives(doc_report["missing_documents"], limit=3).items():
+                    if candidates:
+                        st.write(f"**{doc}**: " + "; ".join(f"{c['name']} ({c['type']}, {c['score']*100:.0f}%)" for c in candidates))
         else:
             st.info("No document requirements specified in this tender.")
 
@@ -612,63 +767,11 @@ elif tab == "📊 Tender Evaluation":
 
         # Export to Excel
         if st.button("📥 Download AVK5 Material Costs (Excel)"):
-            wb = Workbook()
-            ws = wb.active
-            if ws is None:
-                ws = wb.create_sheet(title="AVK5 Custom Materials")
-            else:
-                ws.title = "AVK5 Custom Materials"
-            headers = ["Category", "Specification", "Quantity", "Unit Price", "Total"]
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_num, value=header)
-                cell.font = Font(bold=True)
-                ws.column_dimensions[get_column_letter(col_num)].width = 20
-            for i, m in enumerate(st.session_state.custom_materials, 2):
-                ws.cell(row=i, column=1, value=m["category"])
-                ws.cell(row=i, column=2, value=m["specification"])
-                ws.cell(row=i, column=3, value=m["quantity"])
-                ws.cell(row=i, column=4, value=m["unit_price"])
-                ws.cell(row=i, column=5, value=m["total"])
-            ws.cell(row=len(st.session_state.custom_materials) + 2, column=4, value="Total:")
-            ws.cell(row=len(st.session_state.custom_materials) + 2, column=5, value=total)
-
-            excel_buffer = BytesIO()
-            wb.save(excel_buffer)
-            excel_buffer.seek(0)
+            excel_buffer = build_materials_workbook(st.session_state.custom_materials, total)
             st.download_button("📥 Download AVK5 Estimate", data=excel_buffer, file_name=f"avk5_materials_{selected_tender}.xlsx")
 
     # ---------------------- 💰 Profitability Analysis ----------------------
     with st.expander("💰 Profitability Analysis", expanded=True):
-        def extract_resources(text):
-            import re
-            resources = {"workers": 0, "engineers": 0, "vehicles": 0}
-            patterns = {
-                "workers": r"(\d+)\s*(workers|laborers|people)",
-                "engineers": r"(\d+)\s*(engineers)",
-                "vehicles": r"(\d+)\s*(vehicles|trucks|cars)"
-            }
-            for key, pattern in patterns.items():
-                found = re.search(pattern, text, re.IGNORECASE)
-                if found:
-                    resources[key] = int(found.group(1))
-            return resources
-
-        def estimate_complexity(text):
-            text = text.lower()
-            if any(w in text for w in ["automation", "bim", "hvac", "deep foundation"]): return 8
-            if any(w in text for w in ["roof", "paving", "electrical"]): return 5
-            if any(w in text for w in ["painting", "doors"]): return 3
-            return 4
-
-        def safe_budget(budget_raw):
-            try:
-                return float(budget_raw.split()[0].replace(",", ""))
-            except:
-                return 0.0
-
-        auto_resource_req = extract_resources(tender_data.get("resource_requirements", ""))
-        auto_complexity = estimate_complexity(tender_data.get("technical_specs", ""))
-        auto_budget = safe_budget(tender_data.get("budget", "0"))
         # Calculate total cost from AVK5 custom materials if available
         custom_materials = st.session_state.get("custom_materials", [])
         estimated_cost = 0
@@ -677,24 +780,10 @@ elif tab == "📊 Tender Evaluation":
             estimated_cost = sum(m["total"] for m in custom_materials)
             st.markdown(f"💸 **Estimated Cost from AVK5 Inputs**: `{estimated_cost:,.2f} UAH`")
 
-        tender = {
-            "title": tender_data.get("title", ""),
-            "budget": auto_budget,
-            "resource_requirements": auto_resource_req,
-            "estimated_cost": estimated_cost,
-            "timeline": {
-                "duration_days": 90,
-                "start_date": "2025-09-01"
-            },
-            "complexity": auto_complexity,
-            "payment_terms": tender_data.get("payment_terms", "standard").lower(),
-            "has_penalties": False,
-            "competitors": 3,
-            "required_docs": tender_data.get("required_documents", [])
-        }
+        tender = build_evaluation_tender(tender_data, estimated_cost, get_tender_store().get_tender(selected_tender))
 
         company = st.session_state.company_resources
-        analysis = profitability.analyze_tender(tender, company)
+        analysis = cached_tender_analysis(tender, company, history_version())
 
         col1, col2, col3 = st.columns(3)
         col1.metric("ROI Score", f"{analysis['roi_score']:.1f}/100")
@@ -704,6 +793,9 @@ elif tab == "📊 Tender Evaluation":
         st.subheader("Resource Gap Analysis")
         st.subheader("📈 Financial Breakdown")
         st.markdown(f"- **Tender Value**: {analysis['tender_value']:,.2f} UAH")
+        if analysis.get("market"):
+            st.markdown(f"- **Bid Price** (typical {analysis['market']['typical_discount']*100:.1f}% discount): "
+                        f"{analysis['bid_price']:,.2f} UAH")
         st.markdown(f"- **Estimated Cost**: {analysis['estimated_cost']:,.2f} UAH")
         st.markdown(f"- **Gross Profit**: {analysis['gross_profit']:,.2f} UAH")
 
@@ -719,7 +811,34 @@ elif tab == "📊 Tender Evaluation":
                 st.write(f"- {cat}: {val}")
 
         st.subheader("⏱️ Timeline Feasibility")
-        st.info(f"{analysis.get('timeline_feasibility', 'N/A')}")
+        timeline = analysis["timeline_feasibility"]
+        tcol1, tcol2, tcol3 = st.columns(3)
+        tcol1.metric("Feasibility Score", f"{timeline['feasibility_score']:.0f}/100")
+        tcol2.metric("Earliest Start", timeline["earliest_start"] or "Over capacity")
+        tcol3.metric("Peak Utilization", f"{timeline['peak_utilization']*100:.0f}%")
+
+        market = analysis.get("market")
+        if market:
+            st.subheader("📊 Market History")
+            st.caption(f"{market['tenders']} comparable awarded tenders (matched by {market['level'].replace('_', ' + ')})")
+            mcol1, mcol2, mcol3 = st.columns(3)
+            mcol1.metric("Typical Discount", f"{market['typical_discount']*100:.1f}%")
+            mcol2.metric("Typical Bidders", f"{market['bidders']:.0f}" if market["bidders"] is not None else "—")
+            mcol3.metric("Single-Bidder Share", f"{(market['single_bidder_share'] or 0)*100:.0f}%")
+            if market["top_suppliers"]:
+                st.markdown("**Frequent winners:** " + ", ".join(f"{name} ({wins})" for name, wins in market["top_suppliers"]))
+        else:
+            st.info("No award history for this issuer, CPV or region yet (python -m core.cli market).")
+
+        buyer = analysis.get("buyer")
+        if buyer:
+            st.subheader("🏛️ Buyer Track Record")
+            st.caption(f"{buyer['name']} (EDRPOU {buyer['issuer_id']}), {buyer['tenders']} tenders seen")
+            bcol1, bcol2, bcol3, bcol4 = st.columns(4)
+            bcol1.metric("Cancellation Rate", f"{buyer['cancellation_rate']*100:.0f}%" if buyer["cancellation_rate"] is not None else "—")
+            bcol2.metric("Complaints", buyer["complaints"])
+            bcol3.metric("Contract / Budget", f"{buyer['contract_ratio']*100:.0f}%" if buyer["contract_ratio"] is not None else "—")
+            bcol4.metric("Lead Time", f"{buyer['lead_days']:.0f} days" if buyer["lead_days"] is not None else "—")
 
         st.subheader("⚠️ Risk Factors")
         for factor in analysis.get("risk_factors", []):
@@ -734,68 +853,50 @@ elif tab == "📊 Tender Evaluation":
 
         # Export Evaluation to Excel
         if st.button("📥 Download Evaluation Report (Excel)"):
-            wb = Workbook()
-            ws = wb.active
-            if ws is None:
-                ws = wb.create_sheet(title="Tender Evaluation")
-            else:
-                ws.title = "Tender Evaluation"
-                
-            ws.append(["Tender Title", tender["title"]])
-            ws.append(["Budget", tender["budget"]])
-            ws.append(["Duration (days)", tender["timeline"]["duration_days"]])
-            ws.append(["Complexity", tender["complexity"]])
-            ws.append(["Payment Terms", tender["payment_terms"]])
-            ws.append(["Has Penalties", tender["has_penalties"]])
-            ws.append(["Competitors", tender["competitors"]])
-            ws.append(["ROI Score", analysis["roi_score"]])
-            ws.append(["Profit Margin", analysis["profit_margin"]])
-            ws.append(["Recommendation", analysis["recommendation"]])
-            ws.append([])
-
-            # Financial Breakdown
-            ws.append(["📈 Financial Breakdown"])
-            ws.append(["Tender Value", analysis["tender_value"]])
-            ws.append(["Estimated Cost", analysis["estimated_cost"]])
-            ws.append(["Gross Profit", analysis["gross_profit"]])
-            ws.append([])
-
-            # Cost Breakdown
-            ws.append(["📦 Cost Breakdown"])
-            ws.append(["Category", "Amount (UAH)"])
-            for cat, val in analysis.get("cost_breakdown", {}).items():
-                ws.append([cat, val])
-            ws.append([])
-
-            # Timeline Feasibility
-            ws.append(["⏱️ Timeline Feasibility", analysis.get("timeline_feasibility", "N/A")])
-            ws.append([])
-
-            # Risk Factors
-            ws.append(["⚠️ Risk Factors"])
-            for risk in analysis.get("risk_factors", []):
-                ws.append([risk])
-            ws.append([])
-
-            # Resource Gaps
-            ws.append(["Resource", "Required", "Available", "Gap", "Gap %"])
-            for resource, data in analysis["resource_gap"]["gap_analysis"].items():
-                ws.append([
-                    resource,
-                    data["required"],
-                    data["available"],
-                    data["gap"],
-                    f"{data['gap_percent']*100:.1f}%"
-                ])
-
-            # Export
-            buffer = BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
+            buffer = build_evaluation_workbook(tender, analysis)
 
             st.download_button(
                 label="📊 Download Evaluation Report (Excel)",
                 data=buffer,
                 file_name=f"tender_evaluation_{selected_tender}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
\ No newline at end of file
+            )
+
+    # ---------------------- 🧩 Bid Portfolio ----------------------
+    with st.expander("🧩 Bid Portfolio (all analyzed tenders)", expanded=False):
+        st.caption("Best set of tenders to bid on given shared workers, engineers, vehicles and bid-preparation time.")
+        company = st.session_state.company_resources
+        candidates = [
+            {
+                "tender_id": row["tender_id"],
+                "title": row["title"],
+                "expected_profit": expected_profit(row),
+                "roi_score": row["roi_score"],
+                "duration_days": row["timeline"]["duration_days"],
+                "start_date": row["timeline"]["start_date"],
+                "resource_requirements": row["resource_requirements"],
+                "win_probability": row.get("win_probability", 1.0)
+            }
+            for row in ranking.to_dict("records")
+        ]
+
+        portfolio = cached_portfolio(candidates, company)
+
+        pcol1, pcol2, pcol3 = st.columns(3)
+        pcol1.metric("Selected Tenders", f"{len(portfolio['selected'])}/{len(candidates)}")
+        pcol2.metric("Expected Profit", f"{portfolio['expected_profit']:,.0f} UAH")
+        pcol3.metric("Optimality Gap", f"≤ {portfolio['optimality_gap']*100:.1f}%")
+
+        if portfolio["selected"]:
+            st.dataframe(
+                [{
+                    "Tender": p["tender_id"],
+                    "Title": p["title"][:60],
+                    "Expected Profit (UAH)": round(p["expected_value"], 2),
+                    "ROI Score": round(p["roi_score"], 1),
+                    "Planned Start": p["planned_start"],
+                    "Planned End": p["planned_end"]
+                } for p in portfolio["selected"]]
+            )
+        else:
+            st.info("No profitable tenders fit the current capacity.")
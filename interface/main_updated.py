@@ -1,15 +1,9 @@
 import streamlit as st
-from datetime import datetime, timedelta
 import json
 import os
 import sys
 import time
-import anthropic
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
 from dotenv import load_dotenv
-from io import BytesIO
 script_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, os.path.join(script_dir, '..'))
 from core.score_matrix import AVK5Estimator, DocumentComplianceChecker, ProfitabilityAnalyzer
@@ -18,118 +12,28 @@ from core.company_profile import CompanyProfile
 # Add core modules to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from core.downloader import download_prozorro_tenders, setup_environment
+from core.claude_client import analyze_text, get_client
+from core.excel import build_analysis_workbook
+from core.tender_text import build_tender_text
 
 # Load environment variables
 load_dotenv()
-def build_tender_text(tender_json: dict) -> str:
-    title = tender_json.get("title", "")
-    description = tender_json.get("description", "")
-    issuer = tender_json.get("procuringEntity", {}).get("name", "")
-    address = tender_json.get("procuringEntity", {}).get("address", {})
-    location = f"{address.get('locality', '')}, {address.get('region', '')}"
-    budget = tender_json.get("value", {}).get("amount", "N/A")
-    currency = tender_json.get("value", {}).get("currency", "UAH")
-    deadline = tender_json.get("tenderPeriod", {}).get("endDate", "Not specified")
-
-    # Extract technical requirements (if available)
-    tech_specs = []
-    for criterion in tender_json.get("criteria", []):
-        for group in criterion.get("requirementGroups", []):
-            for req in group.get("requirements", []):
-                title = req.get("title", "")
-                expected = req.get("expectedValues", []) or [req.get("expectedValue", "")]
-                tech_specs.append(f"{title}: {', '.join(str(v) for v in expected if v)}")
-
-    specs_block = "\n".join(tech_specs)
-
-    return f"""
-Tender Title: {title}
-Issuer: {issuer}
-Location: {location}
-Budget: {budget} {currency}
-Deadline: {deadline}
-Description: {description}
-
-Technical Requirements:
-{specs_block}
-""".strip()
-
 # Initialize Claude client
 def get_claude_client():
-    api_key = os.getenv("CLAUDE_API_KEY")
-    if not api_key:
+    client = get_client()
+    if client is None:
         st.error("❌ Claude API key not found in .env file")
-        return None
-    return anthropic.Anthropic(api_key=api_key)
+    return client
 
-# Enhanced parser function
 def analyze_tender(text, client):
-    prompt = f"""
-You are an expert in Ukrainian public procurement tenders. Analyze the tender text and extract the following information:
-
-... (same as before)
-
-Tender Text:
-\"\"\"
-{text[:15000]}
-\"\"\"
-"""
     try:
-        st.write("🔎 Prompt preview:", prompt[:1000])  # Log first 1000 characters
-        response = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1024,
-            temperature=0.0,
-            system="You are a procurement specialist analyzing Ukrainian tenders. Focus on PC AVK5 compliance and document requirements.",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        if response.content:
-            result_text = ''.join(block.text for block in response.content if hasattr(block, 'text'))
-            st.write("🧾 Raw Claude output:", result_text[:1000])  # First 1000 chars
-            try:
-                return json.loads(result_text)
-            except json.JSONDecodeError:
-                import re
-                match = re.search(r'\{[\s\S]+\}', result_text)
-                if match:
-                    try:
-                        return json.loads(match.group())
-                    except Exception as e:
-                        st.error(f"❌ Failed to parse Claude output: {e}")
-        else:
-            st.warning("⚠️ Claude returned empty content.")
+        result = analyze_text(text, client)
+        if not result:
+            st.warning("⚠️ Claude returned empty or invalid content.")
+        return result
     except Exception as e:
         st.error(f"Claude API error: {str(e)}")
     return {}
-# Excel formatting
-def format_excel(ws):
-    header_font = Font(bold=True, size=11)
-    header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Set column widths
-    col_widths = [40, 30, 15, 15, 20, 25, 40, 15, 50, 30, 40, 20, 20, 30]
-    columns = [
-        "Title", "Issuer", "Deadline", "Budget", "Location", 
-        "Project Type", "Required Documents", "PC AVK5 Required",
-        "Technical Specifications", "Payment Terms", "Resource Requirements",
-        "Timeline Feasibility", "Profitability Assessment", "Filename"
-    ]
-    
-    for col_num, (column_title, width) in enumerate(zip(columns, col_widths), 1):
-        cell = ws.cell(row=1, column=col_num, value=column_title)
-        cell.font = header_font
-        cell.alignment = header_alignment
-        cell.border = thin_border
-        ws.column_dimensions[get_column_letter(col_num)].width = width
-    
-    return ws, columns
 
 # Streamlit App
 st.set_page_config(page_title="AI Tender Optimizer", layout="wide")
@@ -171,20 +75,14 @@ if tab == "📥 Data Downloader":
         st.info("⏳ Starting download process...")
         setup_environment()
 
-        keyword_map = {
-            "IT": "IT",
-            "Construction": "будівництво",
-            "Medical Equipment": "медичне обладнання",
-            "Transport": "транспорт",
-            "Education": "освіта"
-        }
-        selected_keywords = [keyword_map[k] for k in keywords_option]
+        with open(os.path.join(script_dir, "..", "data", "keywords.json"), "r", encoding="utf-8") as f:
+            known_topics = json.load(f)
+        selected_keywords = [k for k in keywords_option if k in known_topics]
 
         with st.spinner("Downloading tenders from Prozorro..."):
-            tenders = download_prozorro_tenders(
-                keywords=selected_keywords,
-                days_back=days_range
-            )
+            tenders = []
+            for topic in selected_keywords:
+                tenders += download_prozorro_tenders(topic=topic, days_back=days_range)
 
         if tenders:
             st.session_state.tenders_downloaded = tenders
@@ -277,47 +175,7 @@ elif tab == "🔍 Tender Analysis":
         
         # Create Excel workbook
         if analysis_results:
-            wb = Workbook()
-            ws = wb.active
-            if ws is None:
-                ws = wb.create_sheet("Tender Analysis")
-            else:
-                ws.title = "Tender Analysis"
-            ws, columns = format_excel(ws)
-            
-            # Add data to Excel
-            for row_idx, result in enumerate(analysis_results, 2):
-                row_data = [
-                    result.get("title", "N/A"),
-                    result.get("issuer", "N/A"),
-                    result.get("deadline", "N/A"),
-                    result.get("budget", "N/A"),
-                    result.get("location", "N/A"),
-                    result.get("project_type", "N/A"),
-                    ", ".join(result.get("required_documents", [])),
-                    "Yes" if result.get("avk5_required", False) else "No",
-                    result.get("technical_specs", "N/A"),
-                    result.get("payment_terms", "N/A"),
-                    result.get("resource_requirements", "N/A"),
-                    result.get("timeline_feasibility", "N/A"),
-                    result.get("profitability", "N/A"),
-                    result.get("Filename", "N/A")
-                ]
-                
-                for col_idx, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                    cell.alignment = Alignment(wrap_text=True, vertical='top')
-                    cell.border = Border(
-                        left=Side(style='thin'),
-                        right=Side(style='thin'),
-                        bottom=Side(style='thin')
-                    )
-            
-            # Save to bytes for download
-            excel_buffer = BytesIO()
-            wb.save(excel_buffer)
-            excel_buffer.seek(0)
-            st.session_state.excel_buffer = excel_buffer
+            st.session_state.excel_buffer = build_analysis_workbook(analysis_results)
     
     # Display results if available
     if st.session_state.analysis_results:
@@ -470,6 +328,7 @@ elif tab == "🏢 Company Profile":
     if "company_profile" not in st.session_state:
        st.session_state.company_profile = CompanyProfile()
     profile = st.session_state.company_profile  # This is the instance
+    snapshot = profile.profile  # read once per render; writes go through the profile's methods
     
     with st.expander("📁 Document Vault"):
         st.subheader("Upload New Document")
@@ -488,10 +347,11 @@ elif tab == "🏢 Company Profile":
             profile.add_document(
                 doc_name, doc_type, validity.isoformat(), file_path
             )
+            snapshot = profile.profile
             st.success("Document added to vault!")
         
         st.subheader("Existing Documents")
-        for doc in profile.profile["document_vault"]:
+        for doc in snapshot["document_vault"]:
             col1, col2 = st.columns([3, 1])
             col1.write(f"**{doc['name']}** ({doc['type']})")
             col1.caption(f"Valid until: {doc['validity']}")
@@ -504,7 +364,7 @@ elif tab == "🏢 Company Profile":
     
     with st.expander("🛠️ Resource Capabilities"):
         st.subheader("Company Resources")
-        resources = profile.profile["resources"]
+        resources = snapshot["resources"]
         workers = st.number_input("Number of Workers", value=resources.get("workers", 0))
         engineers = st.number_input("Number of Engineers", value=resources.get("engineers", 0))
         vehicles = st.number_input("Number of Vehicles", value=resources.get("vehicles", 0))
@@ -527,8 +387,9 @@ elif tab == "🏢 Company Profile":
                 
                 if st.form_submit_button("Save Record"):
                     profile.add_performance_record(tender_id, outcome, profit, lessons)
+                    snapshot = profile.profile
         
-        for record in profile.profile["historical_performance"]:
+        for record in snapshot["historical_performance"]:
             st.write(f"**Tender {record['tender_id']}** - {record['outcome']}")
             st.write(f"Profit: {record['profit']} UAH")
             st.caption(f"Lessons: {record['lessons']}")
\ No newline at end of file
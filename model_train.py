@@ -3,120 +3,144 @@ import numpy as np
 import re
 from datetime import datetime
 import json
+import os
+import joblib
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from core.cpv import default_router
+from core.text_utils import tokenize
+
+VECTORIZER_PATH = "data/tfidf_vectorizer.joblib"
 
 class TenderIntelligence:
-    def __init__(self, tender_data, company_profile):
+    def __init__(self, tender_data, company_profile, vectorizer_path=None, refit=False):
         """
         Initialize the intelligence layer with tender data and company profile
         
         Args:
             tender_data (DataFrame): Extracted tender data from Claude
             company_profile (dict): Company capabilities and preferences
+            vectorizer_path (str): optional fitted TF-IDF vectorizer to reuse; when it
+                exists new tenders are only transformed, otherwise it is fitted and saved there
+            refit (bool): fit the vectorizer on this corpus and overwrite vectorizer_path
+                (when the saved vocabulary no longer matches the tenders being scored)
         """
         self.df = tender_data
         self.company = company_profile
         self.prepare_data()
-        self.vectorizer = TfidfVectorizer(stop_words='english')
+        self.vectorizer_path = vectorizer_path
+        self.vectorizer = None
+        if vectorizer_path and os.path.exists(vectorizer_path) and not refit:
+            self.vectorizer = joblib.load(vectorizer_path)
         
     def prepare_data(self):
         """Clean and preprocess tender data"""
-        self.df['clean_budget'] = self.df['Budget'].apply(self.extract_budget_value)
+        self.df['clean_budget'] = self.extract_budget_values(self.df['Budget'])
         
-        self.df['deadline_date'] = self.df['Deadline'].apply(self.parse_date)
+        self.df['deadline_date'] = self.parse_dates(self.df['Deadline'])
         
-        today = datetime.now().date()
-        self.df['days_until_deadline'] = self.df['deadline_date'].apply(
-            lambda x: (x - today).days if x and x > today else 0
-        )
+        today = pd.Timestamp(datetime.now().date())
+        days = (self.df['deadline_date'] - today).dt.days
+        self.df['days_until_deadline'] = days.where(days > 0, 0).fillna(0).astype(int)
+        
+        self.df['project_category'] = self.categorize_projects(self.df['Project Type'], self.df.get('CPV'))
         
-        self.df['project_category'] = self.df['Project Type'].apply(self.categorize_project)
-        
-    def extract_budget_value(self, budget_str):
-        """Convert budget strings to numeric values"""
-        if pd.isna(budget_str) or 'not specified' in str(budget_str).lower():
-            return 0
-        
-        match = re.search(r'([£€$]?[\d,\s]+(?:\.\d+)?)', str(budget_str))
-        if match:
-            value_str = match.group(1).replace(',', '').replace(' ', '')
-            value_str = re.sub(r'[£€$]', '', value_str)
-            try:
-                return float(value_str)
-            except:
-                return 0
-        return 0
+    def extract_budget_values(self, budgets):
+        """Convert a Series of budget strings to numeric values"""
+        text = budgets.map(str)
+        not_specified = budgets.isna() | text.str.lower().str.contains('not specified', regex=False)
+        
+        amount = text.str.extract(r'([£€$]?[\d,\s]+(?:\.\d+)?)', expand=False)
+        amount = amount.str.replace(r'[, £€$]', '', regex=True)
+        values = pd.to_numeric(amount, errors='coerce').fillna(0)
+        return values.where(~not_specified, 0)
     
-    def parse_date(self, date_str):
-        """Convert various date formats to datetime objects"""
-        if pd.isna(date_str) or 'not specified' in str(date_str).lower():
-            return None
-        
-        patterns = [
-            r'\d{1,2} (?:January|February|March|April|May|June|July|August|September|October|November|December) \d{4}',
-            r'\d{4}-\d{2}-\d{2}',
-            r'\d{1,2}/\d{1,2}/\d{4}',
-            r'\d{1,2} \w{3} \d{4}',
-            r'\d{1,2}\w{2} (?:January|February|March|April|May|June|July|August|September|October|November|December) \d{4}'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, str(date_str))
-            if match:
-                try:
-                    return datetime.strptime(match.group(), '%d %B %Y').date()
-                except:
-                    try:
-                        return datetime.strptime(match.group(), '%Y-%m-%d').date()
-                    except:
-                        continue
-        return None
+    def parse_dates(self, dates):
+        """Convert a Series of date strings ('1 March 2025' or ISO) to datetimes"""
+        text = dates.map(str)
+        specified = dates.notna() & ~text.str.lower().str.contains('not specified', regex=False)
+        
+        months = 'January|February|March|April|May|June|July|August|September|October|November|December'
+        named = text.str.extract(rf'(\d{{1,2}} (?:{months}) \d{{4}})', expand=False)
+        iso = text.str.extract(r'(\d{4}-\d{2}-\d{2})', expand=False)
+        
+        parsed = pd.to_datetime(named, format='%d %B %Y', errors='coerce')
+        parsed = parsed.fillna(pd.to_datetime(iso, format='%Y-%m-%d', errors='coerce'))
+        return parsed.where(specified)
     
-    def categorize_project(self, project_type):
-        """Categorize project types into standardized categories"""
-        if pd.isna(project_type):
-            return "Other"
-        
-        project_type = project_type.lower()
-        
-        categories = {
-            'construction|renovation|building': 'Construction',
-            'it|software|digital|technology': 'Technology',
-            'health|medical|pharmaceutical|dental': 'Healthcare',
-            'education|training|school': 'Education',
-            'financial|banking|investment|insurance': 'Finance',
-            'transport|logistics|vehicle': 'Transportation',
-            'energy|environment|sustainability': 'Energy/Environment',
-            'consulting|management|advisory': 'Consulting'
-        }
-        
-        for pattern, category in categories.items():
-            if re.search(pattern, project_type):
-                return category
+    def categorize_projects(self, project_types, cpv_codes=None):
+        """
+        Categorize tenders into standardized categories (data/topics.json)
+
+        The CPV code decides through the classifier trie; the project type
+        text is only matched against topic keywords when the code is missing.
+        Each distinct (code, text) pair is routed once.
+        """
+        router = default_router()
+        text = project_types.fillna('').map(str)
+        if cpv_codes is None:
+            codes = pd.Series('', index=project_types.index)
+        else:
+            # Excel hands codes back as numbers: 9310000.0 → '09310000'
+            codes = cpv_codes.map(lambda c: '' if pd.isna(c) else str(c).split('.')[0].split('-')[0])
+            codes = codes.where(codes == '', codes.str.zfill(8))
+        pairs = list(zip(codes, text))
+        categories = {pair: router.categorize(*pair) for pair in set(pairs)}
+        return pd.Series([categories[pair] for pair in pairs], index=project_types.index)
+    
+    def company_text(self):
+        """Text describing the company's capabilities for similarity scoring"""
+        return " ".join([
+            " ".join(self.company['capabilities']),
+            " ".join(self.company.get('keywords', []))
+        ])
+    
+    def tender_texts(self):
+        """Title, type and location of each tender as one string"""
+        df = self.df
+        return df['Title'].map(str) + " " + df['Project Type'].map(str) + " " + df['Location'].map(str)
+    
+    def fit_vectorizer(self, save=True):
+        """
+        Fit TF-IDF once over the whole tender corpus plus the company profile
         
-        return "Other"
+        Returns:
+            sparse matrix: TF-IDF rows for the tenders followed by the company profile
+        """
+        self.vectorizer = TfidfVectorizer(tokenizer=tokenize, token_pattern=None, lowercase=False)
+        matrix = self.vectorizer.fit_transform(list(self.tender_texts()) + [self.company_text()])
+        if save and self.vectorizer_path:
+            self.save_vectorizer(self.vectorizer_path)
+        return matrix
+    
+    def save_vectorizer(self, path=VECTORIZER_PATH):
+        """Persist the fitted vectorizer so later runs only need transform"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        joblib.dump(self.vectorizer, path)
+    
+    def text_similarity(self):
+        """Cosine similarity of every tender to the company profile in one sparse product"""
+        if self.vectorizer is None:
+            matrix = self.fit_vectorizer()
+            tender_matrix, company_vector = matrix[:-1], matrix[-1]
+        else:
+            tender_matrix = self.vectorizer.transform(self.tender_texts())
+            company_vector = self.vectorizer.transform([self.company_text()])
+        # TfidfVectorizer rows are L2-normalized, so the dot product is the cosine
+        return (tender_matrix @ company_vector.T).toarray().ravel()
     
     def calculate_scores(self):
         """Calculate multiple scores for each tender"""
         # Strategic Alignment Score
-        self.df['alignment_score'] = self.df.apply(
-            lambda row: self.calculate_strategic_alignment(row), axis=1
-        )
+        self.df['alignment_score'] = self.calculate_strategic_alignment()
         
         max_budget = self.df['clean_budget'].max() or 1  # Avoid division by zero
-        self.df['financial_score'] = self.df['clean_budget'].apply(
-            lambda x: min(x / max_budget, 1) * 100
-        )
+        self.df['financial_score'] = np.minimum(self.df['clean_budget'] / max_budget, 1) * 100
         
-        max_days = self.df['days_until_deadline'].max() or 1
-        self.df['urgency_score'] = self.df['days_until_deadline'].apply(
-            lambda x: max(0, 100 - (x / max_days * 100)) if x > 0 else 100
-        )
+        days = self.df['days_until_deadline']
+        max_days = days.max() or 1
+        self.df['urgency_score'] = np.where(days > 0, np.maximum(0, 100 - (days / max_days * 100)), 100)
         
-        self.df['risk_score'] = self.df.apply(
-            lambda row: self.assess_risks(row), axis=1
-        )
+        self.df['risk_score'] = self.assess_risks()
         
         weights = self.company.get('scoring_weights', {
             'alignment': 0.4,
@@ -136,30 +160,17 @@ class TenderIntelligence:
         
         return self.df
     
-    def calculate_strategic_alignment(self, tender):
-        """Calculate how well the tender aligns with company capabilities"""
-        type_match = 1 if tender['project_category'] in self.company['capabilities'] else 0
-        
-        location_match = 0
-        if 'location_preferences' in self.company:
-            for loc in self.company['location_preferences']:
-                if loc.lower() in str(tender['Location']).lower():
-                    location_match = 1
-                    break
-        
-        company_profile_text = " ".join([
-            " ".join(self.company['capabilities']),
-            " ".join(self.company.get('keywords', []))
-        ])
+    def calculate_strategic_alignment(self):
+        """Calculate how well each tender aligns with company capabilities"""
+        type_match = self.df['project_category'].isin(self.company['capabilities']).astype(int)
         
-        tender_text = " ".join([
-            str(tender['Title']),
-            str(tender['Project Type']),
-            str(tender['Location'])
-        ])
+        location_match = pd.Series(0, index=self.df.index)
+        preferences = self.company.get('location_preferences', [])
+        if preferences:
+            pattern = '|'.join(re.escape(loc.lower()) for loc in preferences)
+            location_match = self.df['Location'].map(str).str.lower().str.contains(pattern, regex=True).astype(int)
         
-        tfidf_matrix = self.vectorizer.fit_transform([company_profile_text, tender_text])
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+        similarity = pd.Series(self.text_similarity(), index=self.df.index)
         
         alignment_score = (
             0.4 * type_match * 100 +
@@ -167,30 +178,28 @@ class TenderIntelligence:
             0.3 * similarity * 100
         )
         
-        return max(0, min(alignment_score, 100))
+        return alignment_score.clip(0, 100)
     
-    def assess_risks(self, tender):
-        """Assess potential risks in the tender"""
-        risk_score = 0
-        
-        if tender['days_until_deadline'] < 14:
-            risk_score += 40
-        elif tender['days_until_deadline'] < 30:
-            risk_score += 20
-        
-        if tender['clean_budget'] == 0 or "not specified" in str(tender['Budget']).lower():
-            risk_score += 30
+    def assess_risks(self):
+        """Assess potential risks for every tender"""
+        days = self.df['days_until_deadline']
+        risk_score = pd.Series(np.select([days < 14, days < 30], [40, 20], 0), index=self.df.index)
+        
+        budget_missing = (
+            (self.df['clean_budget'] == 0) |
+            self.df['Budget'].map(str).str.lower().str.contains('not specified', regex=False)
+        )
+        risk_score += 30 * budget_missing
         
         compliance_terms = ['QES', 'digital signature', 'eIDAS', 'KEP', 'certified']
-        tender_text = f"{tender['Title']} {tender['Project Type']}".lower()
-        if any(term in tender_text for term in compliance_terms):
-            if not self.company.get('qes_certified', False):
-                risk_score += 50
+        tender_text = (self.df['Title'].map(str) + " " + self.df['Project Type'].map(str)).str.lower()
+        if not self.company.get('qes_certified', False):
+            compliance_pattern = '|'.join(re.escape(term) for term in compliance_terms)
+            risk_score += 50 * tender_text.str.contains(compliance_pattern, regex=True)
         
-        if 'framework' in tender_text or 'multi-lot' in tender_text:
-            risk_score += 20
+        risk_score += 20 * tender_text.str.contains('framework|multi-lot', regex=True)
         
-        return min(risk_score, 100)
+        return risk_score.clip(upper=100)
     
     def generate_recommendations(self, top_n=10):
         """Generate recommendations with explanations"""
@@ -255,12 +264,12 @@ class TenderIntelligence:
                 })
         
         risk_factors = {
-            'deadline_risk': sum(self.df['days_until_deadline'] < 14),
-            'budget_risk': sum((self.df['clean_budget'] == 0) | 
-                              (self.df['Budget'].str.contains('not specified', case=False, na=False))),
-            'compliance_risk': sum(self.df.apply(lambda x: 'qes' in str(x['Project Type']).lower() or 
-                                   'digital signature' in str(x['Project Type']).lower(), axis=1)) &
-                                 (not self.company.get('qes_certified', False))
+            'deadline_risk': int((self.df['days_until_deadline'] < 14).sum()),
+            'budget_risk': int(((self.df['clean_budget'] == 0) | 
+                              (self.df['Budget'].map(str).str.contains('not specified', case=False, na=False))).sum()),
+            'compliance_risk': int(
+                self.df['Project Type'].map(str).str.lower().str.contains('qes|digital signature', regex=True).sum()
+            ) if not self.company.get('qes_certified', False) else 0
         }
         risk_report['common_risk_factors'] = risk_factors
         
@@ -294,6 +303,12 @@ class TenderIntelligence:
         return max(risks, key=lambda x: x[1])[0]
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Score and rank extracted tenders")
+    parser.add_argument("--refit", action="store_true", help=f"refit the TF-IDF vectorizer saved in {VECTORIZER_PATH}")
+    args = parser.parse_args()
+    
     tender_df = pd.read_excel("tenders/claude_extracted.xlsx")
     
     company_profile = {
@@ -311,7 +326,7 @@ if __name__ == "__main__":
         }
     }
     
-    intel = TenderIntelligence(tender_df, company_profile)
+    intel = TenderIntelligence(tender_df, company_profile, vectorizer_path=VECTORIZER_PATH, refit=args.refit)
     
     scored_df = intel.calculate_scores()
     recommendations = intel.generate_recommendations(top_n=5)
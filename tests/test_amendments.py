@@ -0,0 +1,48 @@
+# test_amendments.py
+import pytest
+
+from core.amendments import apply, classify, diff, plan_reprocessing
+from core.synthetic import AMENDMENTS, amend_tender, iter_tenders
+
+
+@pytest.mark.parametrize("kind", AMENDMENTS)
+def test_diff_apply_round_trip(kind):
+    for old in iter_tenders(20, seed=5):
+        new = amend_tender(old, kind)
+        ops = diff(old, new)
+        assert classify(ops) == [kind]
+        patched = apply(old, ops)
+        assert {**patched, "dateModified": new["dateModified"]} == new
+        assert apply(new, ops, reverse=True) == {**old, "dateModified": new["dateModified"]}
+
+
+def test_reordered_keyed_list_is_not_a_change():
+    old = {"id": "t", "documents": [{"id": "a", "title": "A"}, {"id": "b", "title": "B"}]}
+    new = {"id": "t", "documents": [{"id": "b", "title": "B"}, {"id": "a", "title": "A"}]}
+    assert diff(old, new) == []
+
+
+def test_nested_edit_is_one_op():
+    old = {"id": "t", "items": [{"id": "1", "quantity": 5}, {"id": "2", "quantity": 7}]}
+    new = {"id": "t", "items": [{"id": "1", "quantity": 5}, {"id": "2", "quantity": 9}]}
+    ops = diff(old, new)
+    assert ops == [{"op": "replace", "path": ["items", "#2", "quantity"], "old": 7, "new": 9}]
+    assert classify(ops) == ["scope"]
+    assert apply(old, ops) == new
+
+
+def test_plan_reprocessing():
+    assert plan_reprocessing(["deadline"]) == {"score"}
+    assert plan_reprocessing(["documents", "budget"]) == {"extract", "score"}
+    assert plan_reprocessing(["other"]) == set()
+
+
+def test_readded_keyed_element_keeps_its_position():
+    v1 = {"id": "t", "documents": [{"id": "a"}, {"id": "b"}, {"id": "c"}]}
+    v2 = {"id": "t", "documents": [{"id": "a"}, {"id": "c"}]}
+    v3 = {"id": "t", "documents": [{"id": "x"}, {"id": "a"}, {"id": "b"}, {"id": "c"}]}
+    for old, new in ((v1, v2), (v2, v3), (v1, v3)):
+        ops = diff(old, new)
+        assert classify(ops) == ["documents"]
+        assert apply(old, ops) == new
+        assert apply(new, ops, reverse=True) == old
@@ -0,0 +1,48 @@
+# test_document_vault.py
+import json
+
+from core.document_vault import DocumentVault
+
+
+def state(vault):
+    return vault.snapshot()["documents"], dict(vault.valid_until)
+
+
+def test_journal_replay_restores_the_vault(tmp_path):
+    path = str(tmp_path / "vault.json")
+    vault = DocumentVault(path, compact_every=1000)
+    ids = [vault.add(f"Doc {i}", "Ліцензія" if i % 2 else "Tax certificate", f"2030-01-{i + 1:02d}",
+                     None, tags=[f"t{i % 3}"])["id"] for i in range(6)]
+    vault.remove(ids[1])
+    reloaded = DocumentVault(path)
+    assert state(reloaded) == state(vault)
+    assert reloaded.tagged("t0") == vault.tagged("t0")
+
+
+def test_replay_after_compaction(tmp_path):
+    path = str(tmp_path / "vault.json")
+    vault = DocumentVault(path, compact_every=3)
+    for i in range(7):
+        vault.add(f"Doc {i}", "Permit", f"2031-02-{i + 1:02d}", None)
+    vault.remove("DOC-0002")
+    assert state(DocumentVault(path)) == state(vault)
+
+
+def test_torn_final_journal_line_is_ignored(tmp_path):
+    path = str(tmp_path / "vault.json")
+    vault = DocumentVault(path, compact_every=1000)
+    vault.add("Doc", "Permit", "2030-05-01", None)
+    with open(vault.journal_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "add", "doc": {"id": "DOC-0009"}})[:20])
+    assert state(DocumentVault(path)) == state(vault)
+
+
+def test_replaying_twice_is_idempotent(tmp_path):
+    path = str(tmp_path / "vault.json")
+    vault = DocumentVault(path, compact_every=1000)
+    vault.add("Doc", "Permit", "2030-05-01", None)
+    with open(vault.journal_path, "r", encoding="utf-8") as f:
+        journal = f.read()
+    with open(vault.journal_path, "a", encoding="utf-8") as f:
+        f.write(journal)  # a crash between snapshot rename and journal reset replays entries again
+    assert state(DocumentVault(path)) == state(vault)
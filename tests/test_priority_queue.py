@@ -0,0 +1,69 @@
+# test_priority_queue.py
+import queue
+import time
+
+import pytest
+
+from core.priority_queue import CLOSED, NORMAL, URGENT, DeadlineQueue, by_deadline, priority_key
+
+DAY = 86400
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def deadline(days, now):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now + days * DAY))
+
+
+def test_priority_key_tiers():
+    now = time.time()
+    assert priority_key(deadline(1, now), now=now)[0] == URGENT
+    assert priority_key(deadline(10, now), now=now)[0] == NORMAL
+    assert priority_key(deadline(-1, now), now=now)[0] == CLOSED
+    assert priority_key(None, now=now)[0] == NORMAL
+
+
+def test_relevance_stretches_slack():
+    now = time.time()
+    relevant = priority_key(deadline(10, now), relevance=1.0, now=now)[1]
+    irrelevant = priority_key(deadline(10, now), relevance=0.0, now=now)[1]
+    assert irrelevant == pytest.approx(2 * relevant, rel=1e-3)
+
+
+def test_by_deadline_order():
+    now = time.time()
+    tenders = [{"id": i, "tenderPeriod": {"endDate": deadline(d, now)}} for i, d in enumerate([20, -3, 1, 5])]
+    assert [t["id"] for t in by_deadline(tenders, now=now)] == [2, 3, 0, 1]
+
+
+def test_aging_serves_long_waiting_items_first():
+    clock = Clock()
+    q = DeadlineQueue(rank=lambda item: item[1], clock=clock)
+    q.put(("old", (NORMAL, 10.0)))
+    clock.now += 48 * 3600  # two days of waiting forgive 48 days of slack
+    q.put(("new", (NORMAL, 5.0)))
+    assert [q.get()[0] for _ in range(2)] == ["old", "new"]
+
+
+def test_without_waiting_lower_slack_goes_first():
+    q = DeadlineQueue(rank=lambda item: item[1], clock=Clock())
+    q.put(("far", (NORMAL, 10.0)))
+    q.put(("near", (NORMAL, 5.0)))
+    q.put(("closed", (CLOSED, 1.0)))
+    q.put(("urgent", (URGENT, 1.5)))
+    assert [q.get()[0] for _ in range(4)] == ["urgent", "near", "far", "closed"]
+
+
+def test_urgent_items_preempt_a_full_queue():
+    q = DeadlineQueue(maxsize=1, rank=lambda item: item[1], clock=Clock())
+    q.put(("normal", (NORMAL, 3.0)))
+    with pytest.raises(queue.Full):
+        q.put(("blocked", (NORMAL, 1.0)), block=False)
+    q.put(("urgent", (URGENT, 0.5)), block=False)
+    assert q.get()[0] == "urgent"
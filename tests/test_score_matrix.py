@@ -0,0 +1,79 @@
+# test_score_matrix.py
+"""analyze_many must give the same numbers as analyze_tender, row by row"""
+import math
+
+import pytest
+
+from core.evaluation import build_evaluation_tender
+from core.score_matrix import AVK5Estimator, ProfitabilityAnalyzer
+from core.synthetic import analysis_record, iter_tenders
+
+COMPANY = {"workers": 10, "engineers": 2, "vehicles": 3, "current_projects": []}
+COLUMNS = ["tender_value", "bid_price", "estimated_cost", "gross_profit", "profit_margin", "roi_score"]
+
+
+class StubMarket:
+    """Market stats for every other CPV division, nothing for the rest"""
+
+    def lookup(self, cpv, region, issuer_id):
+        if not cpv or int(cpv[:2]) % 2:
+            return None
+        return {"level": "cpv2", "tenders": 12, "median_discount": 0.08, "median_bidders": 4.0,
+                "single_bidder_share": 0.2, "top_suppliers": []}
+
+
+class StubIssuers:
+    def get(self, issuer_id):
+        return {"buyer_risk": 0.3} if issuer_id.endswith(("1", "5")) else None
+
+    def get_many(self, issuer_ids):
+        return {i: self.get(i) for i in issuer_ids if self.get(i)}
+
+
+@pytest.fixture
+def analyzer():
+    return ProfitabilityAnalyzer(AVK5Estimator(), market=StubMarket(), issuers=StubIssuers())
+
+
+def evaluation_tenders():
+    tenders = [build_evaluation_tender(analysis_record(t), estimated_cost=(i % 3) * 50_000, tender=t)
+               for i, t in enumerate(iter_tenders(120, seed=3))]
+    tenders += [
+        {"budget": "", "resource_requirements": {}, "timeline": {}},
+        {"budget": "1,250,000.50 UAH", "payment_terms": "deferred", "has_penalties": True, "complexity": 8,
+         "resource_requirements": {"workers": 40}, "timeline": {"duration_days": 30}},
+        {"budget": 300000, "materials": {"concrete": (10, "M300")}, "labor": {"mason": (40, "senior")},
+         "resource_requirements": {"engineers": 1}, "timeline": {"duration_days": 10}},
+    ]
+    return tenders
+
+
+def test_analyze_many_matches_analyze_tender(analyzer):
+    tenders = evaluation_tenders()
+    batch = analyzer.analyze_many(tenders, COMPANY).sort_index()
+    assert len(batch) == len(tenders)
+    for i, tender in enumerate(tenders):
+        single = analyzer.analyze_tender(tender, COMPANY)
+        for column in COLUMNS:
+            assert math.isclose(batch.loc[i, column], single[column], rel_tol=1e-9, abs_tol=1e-9), (i, column)
+        assert batch.loc[i, "composite_risk"] == pytest.approx(single["risk_factors"]["composite_risk"])
+        assert batch.loc[i, "recommendation"] == single["recommendation"]
+
+
+def test_analyze_many_ranks_by_roi(analyzer):
+    scores = list(analyzer.analyze_many(evaluation_tenders(), COMPANY)["roi_score"])
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_analyze_tender_looks_up_a_miss_once():
+    calls = []
+
+    class CountingMarket:
+        def lookup(self, cpv, region, issuer_id):
+            calls.append(cpv)
+            return None
+
+    analyzer = ProfitabilityAnalyzer(AVK5Estimator(), market=CountingMarket(), issuers=StubIssuers())
+    report = analyzer.analyze_tender({"budget": 100000, "cpv": "45210000-2", "timeline": {}}, COMPANY)
+    assert calls == ["45210000-2"]
+    assert report["market"] is None
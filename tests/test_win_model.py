@@ -0,0 +1,24 @@
+# test_win_model.py
+import math
+
+from core.win_model import tender_features
+
+TENDER = {
+    "date": "2025-04-01T10:00:00+03:00",
+    "tenderPeriod": {"startDate": "2025-04-01T10:00:00+03:00", "endDate": "2025-04-21T10:00:00+03:00"},
+}
+
+
+def test_slack_is_the_bid_window_from_either_source():
+    from_json = tender_features(TENDER, {})
+    from_analysis = tender_features({"date": TENDER["date"]}, {"deadline": "2025-04-21T10:00:00+03:00"})
+    assert from_json["slack_days"] == from_analysis["slack_days"] == 20 / 60
+
+
+def test_slack_is_unknown_without_a_publication_date():
+    assert "slack_days" not in tender_features(None, {"deadline": "2025-04-21"})
+
+
+def test_budget_from_analysis_text():
+    features = tender_features(None, {"budget": "5 000 000 UAH for 2025"})
+    assert math.isclose(features["log_budget"], math.log10(1 + 5_000_000) / 10)